@@ -0,0 +1,55 @@
+"""抓取吞吐基准测试
+
+启动本地替身站点（stand_in_server.py），用 jsapi.crawler 的 construct_and_request_urls
+请求一批确定性生成的路径，报告每秒页面数、下载的JS数和传输量，无需联网。
+用法：python bench/bench_crawl.py [-p 路径数] [-c 并发数] [--latency-ms 延迟]
+"""
+import argparse
+import tempfile
+
+from common import timed
+from corpus import BundleGenerator
+from stand_in_server import StandInServer
+from jsapi import crawler
+from jsapi.link_extract import LinkExtractor
+from jsapi.planner import FetchPlanner
+from jsapi.store import JsStore
+
+def generate_paths(count, seed=0):
+    """生成 count 个不重复的路径，其中一部分是会返回 404 的接口路径"""
+    generator = BundleGenerator(seed)
+    paths = set()
+    while len(paths) < count:
+        paths.add(generator.path("/api/" if generator.random.random() < 0.3 else "/"))
+    return sorted(paths)
+
+def main():
+    parser = argparse.ArgumentParser(description="离线测量 construct_and_request_urls 的抓取吞吐")
+    parser.add_argument("-p", "--paths", type=int, default=500, help="请求的路径数")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="并发请求数")
+    parser.add_argument("--latency-ms", type=float, default=20, help="替身站点每个请求的模拟延迟（毫秒）")
+    parser.add_argument("--js-size-kb", type=int, default=64, help="替身站点每个脚本的大小（KB）")
+    parser.add_argument("--html-parser", default="auto", help="页面解析后端")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_paths(args.paths, args.seed)
+    with StandInServer(latency=args.latency_ms / 1000, js_size=args.js_size_kb * 1024,
+                       seed=args.seed) as server, tempfile.TemporaryDirectory(prefix="bench-crawl-") as workdir:
+        store = JsStore(workdir)
+        session = crawler.create_session(args.concurrency)
+        planner = FetchPlanner()
+        limiter = crawler.HostRateLimiter(0)
+        with LinkExtractor(args.html_parser, 1) as extractor:
+            new_files, elapsed = timed(crawler.construct_and_request_urls, server.url, paths, session,
+                                       store, limiter, args.concurrency, planner, extractor)
+
+        print(f"🌐 替身站点: {server.url}，延迟 {args.latency_ms:.0f} ms，并发 {args.concurrency}")
+        print(f"⏱️ 耗时 {elapsed:.2f} 秒")
+        print(f"📄 路径 {len(paths)} 个，{len(paths) / elapsed:.1f} 路径/秒")
+        print(f"📨 请求 {server.requests} 次，{server.requests / elapsed:.1f} 请求/秒，"
+              f"传输 {server.bytes_sent / 1024 / 1024:.1f} MB")
+        print(f"📥 新JS文件 {len(new_files)} 个")
+
+if __name__ == "__main__":
+    main()
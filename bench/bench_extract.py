@@ -0,0 +1,71 @@
+"""提取器基准测试
+
+在确定性的合成语料上测量各提取入口的 MB/秒 与 匹配数/秒：
+
+- re-simple.py 与 re-api-dir.py 使用的 jsapi.scanner.scan_directory
+- url-js.py 使用的 jsapi.analysis.analyze_js_files_for_paths 与 final_path_analysis
+
+修改 pattern_groups、参数提取或文件读取方式前后各跑一次，用相同参数比较结果。
+用法：python bench/bench_extract.py [-n 文件数] [-s 每个文件MB] [-r 重复次数] [-t 目标 ...]
+"""
+import os
+import argparse
+import tempfile
+
+from common import timed, directory_size
+from corpus import add_arguments, corpus_from_args
+from jsapi import analysis, scanner
+
+def bench_re_simple(directory, output_dir, workers):
+    return sum(1 for _ in scanner.scan_directory(directory, "simple", workers))
+
+def bench_re_api_dir(directory, output_dir, workers):
+    return sum(1 for _ in scanner.scan_directory(directory, "api-dir", workers))
+
+def bench_url_js_paths(directory, output_dir, workers):
+    return len(analysis.analyze_js_files_for_paths(directory))
+
+def bench_url_js_final(directory, output_dir, workers):
+    return analysis.final_path_analysis(directory, os.path.join(output_dir, "path.txt"))
+
+TARGETS = {
+    "re-simple": bench_re_simple,
+    "re-api-dir": bench_re_api_dir,
+    "url-js-paths": bench_url_js_paths,
+    "url-js-final": bench_url_js_final,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="测量各提取器在合成语料上的吞吐")
+    add_arguments(parser)
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="每个目标重复次数，取最快一次")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="扫描器的进程数")
+    parser.add_argument("-t", "--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS),
+                        help="要测量的目标")
+    parser.add_argument("-d", "--corpus", help="使用已有的语料目录，不生成新语料")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-extract-") as workdir:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = os.path.join(workdir, "corpus")
+            corpus_from_args(corpus, args)
+        size = directory_size(corpus)
+        print(f"📄 语料: {corpus}（{size / 1024 / 1024:.1f} MB），每个目标取 {args.repeat} 次中最快的一次")
+        print(f"\n{'目标':<16}{'耗时(秒)':>10}{'MB/秒':>10}{'匹配数':>10}{'匹配/秒':>12}")
+
+        for name in args.targets:
+            try:
+                best = None
+                for _ in range(args.repeat):
+                    matches, elapsed = timed(TARGETS[name], corpus, workdir, args.workers)
+                    if best is None or elapsed < best[1]:
+                        best = (matches, elapsed)
+            except ImportError as e:
+                print(f"{name:<16}⏭️ 跳过: 缺少依赖 {e.name}")
+                continue
+            matches, elapsed = best
+            print(f"{name:<16}{elapsed:>10.3f}{size / 1e6 / elapsed:>10.2f}{matches:>10}{matches / elapsed:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""HTML 页面JS链接提取基准测试
+
+在 bench/fixtures 下保存的 HTML 页面上比较各解析后端的每秒页面数，并以原先的
+BeautifulSoup 路径为基准给出加速比；--workers 大于 1 时额外测量进程池解析的吞吐。
+
+用法：python bench/bench_html_parse.py [-n 轮数] [-w 进程数] [-b 后端 ...]
+"""
+import os
+import sys
+import time
+import glob
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jsapi.link_extract import PARSERS, LinkExtractor  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASE_URL = "https://example.com/app/index.html"
+
+def load_fixtures(directory):
+    """读取所有保存的 HTML 页面，返回 [(文件名, 内容), ...]"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+def available_backends(names):
+    """过滤掉当前环境缺少依赖的后端"""
+    backends = []
+    for name in names:
+        try:
+            PARSERS[name]("<html></html>", BASE_URL)
+            backends.append(name)
+        except ImportError:
+            print(f"⏭️ 跳过 {name}: 未安装依赖")
+    return backends
+
+def bench_backend(name, pages, rounds):
+    """单线程依次解析所有页面 rounds 轮，返回 (每秒页面数, 每秒MB)"""
+    parse = PARSERS[name]
+    total_bytes = sum(len(html.encode('utf-8')) for _, html in pages)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, html in pages:
+            parse(html, BASE_URL)
+    elapsed = time.perf_counter() - start
+    return rounds * len(pages) / elapsed, rounds * total_bytes / elapsed / 1e6
+
+def bench_pool(name, pages, rounds, workers):
+    """模拟抓取线程把页面交给进程池解析，返回每秒页面数"""
+    jobs = [html for _ in range(rounds) for _, html in pages]
+    with LinkExtractor(name, workers) as extractor:
+        extractor.extract(pages[0][1], BASE_URL)  # 预热进程池
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers * 2) as threads:
+            list(threads.map(lambda html: extractor.extract(html, BASE_URL), jobs))
+        elapsed = time.perf_counter() - start
+    return len(jobs) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="比较HTML解析后端提取JS链接的速度")
+    parser.add_argument("-n", "--rounds", type=int, default=20, help="每个后端解析全部页面的轮数")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="进程池解析的进程数，大于 1 时测量")
+    parser.add_argument("-b", "--backends", nargs="+", default=list(PARSERS), choices=list(PARSERS),
+                        help="要测量的后端")
+    parser.add_argument("-d", "--fixtures", default=FIXTURE_DIR, help="HTML 页面目录")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    if not pages:
+        print(f"❌ 没有找到 HTML 页面: {args.fixtures}")
+        return
+    backends = available_backends(args.backends)
+    print(f"📄 页面: {', '.join(name for name, _ in pages)}，每个后端 {args.rounds} 轮")
+
+    # 结果先与 BeautifulSoup 路径对照，避免为了速度改变提取结果
+    if "bs4" in backends:
+        for page_name, html in pages:
+            expected = PARSERS["bs4"](html, BASE_URL)
+            for name in backends:
+                links = PARSERS[name](html, BASE_URL)
+                if links != expected:
+                    diff = set(links) ^ set(expected)
+                    print(f"⚠️ {name} 与 bs4 在 {page_name} 上结果不同: {sorted(diff)[:5]}")
+
+    results = {name: bench_backend(name, pages, args.rounds) for name in backends}
+    baseline = results.get("bs4", (None,))[0]
+    print(f"\n{'后端':<12}{'页面/秒':>12}{'MB/秒':>10}{'加速比':>10}")
+    for name, (pages_per_sec, mb_per_sec) in results.items():
+        speedup = f"{pages_per_sec / baseline:.1f}x" if baseline else "-"
+        print(f"{name:<12}{pages_per_sec:>12.1f}{mb_per_sec:>10.2f}{speedup:>10}")
+
+    if args.workers > 1:
+        print(f"\n进程池解析（{args.workers} 个进程）")
+        for name in backends:
+            pages_per_sec = bench_pool(name, pages, args.rounds, args.workers)
+            print(f"{name:<12}{pages_per_sec:>12.1f}")
+
+if __name__ == "__main__":
+    main()
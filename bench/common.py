@@ -0,0 +1,31 @@
+"""基准测试共用的工具
+
+把仓库根目录加入 sys.path，各基准脚本直接 import jsapi 包。
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+def timed(func, *args, quiet=True, **kwargs):
+    """执行 func 并返回 (结果, 耗时秒数)；quiet 时屏蔽其打印输出"""
+    output = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def directory_size(directory, suffix=".js"):
+    """目录下指定后缀文件的总字节数"""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(suffix):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
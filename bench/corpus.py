@@ -0,0 +1,152 @@
+"""确定性的合成打包产物生成器
+
+生成类似 webpack/Vite 压缩输出的JS文件，用于比较提取器改动前后的速度。
+相同的种子和参数总是生成逐字节相同的内容。可调参数：
+
+- size：每个文件的大致字节数
+- route_density：每 KB 代码中路由/接口片段的数量
+- call_depth：get(/post( 调用参数里 Object(...) 包装的最大嵌套层数
+- escape_ratio：字符串中出现转义引号的比例
+
+用法：python bench/corpus.py 输出目录 [-n 文件数] [-s 每个文件MB] [--seed 种子]
+"""
+import os
+import random
+import argparse
+
+WORDS = ("user", "order", "pay", "bill", "account", "list", "detail", "create", "update", "delete",
+         "query", "config", "notice", "message", "report", "export", "import", "login", "auth", "menu")
+
+# 代码噪声片段，模拟压缩后的普通逻辑
+FILLER = (
+    'function(e,t){var n=e.length;for(var r=0;r<n;r++)t[r]=e[r]<<1;return t}',
+    'var o=Object.prototype.hasOwnProperty,i=Array.isArray||function(e){return"[object Array]"===o.call(e)};',
+    'e.exports=function(e){return null!=e&&"object"==typeof e&&!Array.isArray(e)};',
+    'if(!(t instanceof n))throw new TypeError("Cannot call a class as a function");',
+    'return a.a.createElement("div",{className:"wrapper"},a.a.createElement("span",null,e.title));',
+    'var c=/^(?:[a-z]+:)?\\/\\//i,s="0123456789abcdefghijklmnopqrstuvwxyz";',
+    'Promise.resolve().then(function(){return n.e(12)}).then(n.bind(null,"aB3x"));',
+    'this.$emit("change",{value:e.target.value,label:"选项"});',
+)
+
+class BundleGenerator:
+    """按参数生成一个合成打包文件的内容"""
+
+    def __init__(self, seed=0, route_density=2.0, call_depth=3, escape_ratio=0.1):
+        self.random = random.Random(seed)
+        self.route_density = route_density
+        self.call_depth = call_depth
+        self.escape_ratio = escape_ratio
+        self.module_id = 0
+
+    def path(self, prefix="/"):
+        parts = [self.random.choice(WORDS) for _ in range(self.random.randint(1, 3))]
+        if self.random.random() < 0.2:
+            parts.append(str(self.random.randint(1, 9999)))
+        return prefix + "/".join(parts)
+
+    def string(self, value):
+        """生成字符串字面量，按比例插入转义引号"""
+        quote = self.random.choice('"\'')
+        if self.random.random() < self.escape_ratio:
+            value = f"{value}?tip=\\{quote}x\\{quote}"
+        return f"{quote}{value}{quote}"
+
+    def wrap(self, expression, depth):
+        """用 Object(...) / 函数调用包装表达式，模拟压缩后的嵌套调用"""
+        for _ in range(depth):
+            kind = self.random.random()
+            if kind < 0.5:
+                expression = f"Object({self.random.choice('abcdefgh')}.{self.random.choice('abcde')})({expression})"
+            elif kind < 0.8:
+                expression = f"({expression}).concat({self.string(self.path())})"
+            else:
+                expression = f"{self.random.choice('rstu')}({expression},{{id:Object(u.b)(t)}})"
+        return expression
+
+    def fragment(self):
+        """一个带路由或接口的代码片段"""
+        kind = self.random.random()
+        if kind < 0.25:
+            return (f'{{path:{self.string(self.path())},name:"{self.random.choice(WORDS).title()}",'
+                    f'component:function(){{return n.e({self.random.randint(1, 99)}).then(n.bind(null,"x{self.module_id}"))}}}}')
+        if kind < 0.35:
+            return f'{{pagePath:{self.string("pages/" + self.path("")[0:30])},text:"首页"}}'
+        if kind < 0.6:
+            method = self.random.choice(("get", "post"))
+            argument = self.wrap(self.string(self.path("/api/")), self.random.randint(0, self.call_depth))
+            return f'{self.random.choice("abcr")}.{method}({argument},{{params:e}})'
+        if kind < 0.75:
+            method = self.random.choice(("get", "post"))
+            return f'request({{url:{self.string(self.path("/api/"))},method:"{method}",data:e}})'
+        if kind < 0.85:
+            return f'{{url:{self.string(self.path("/api/"))},name:{self.string(self.random.choice(WORDS))}}}'
+        return f'columns:[{{title:"",dataIndex:"{self.random.choice(WORDS)}"}}]'
+
+    def module(self, size):
+        """生成一个约 size 字节的 webpack 模块"""
+        self.module_id += 1
+        parts = []
+        length = 0
+        fragments = max(1, int(size / 1024 * self.route_density))
+        step = max(1, size // fragments)
+        next_fragment = 0
+        while length < size:
+            if length >= next_fragment:
+                piece = self.fragment()
+                next_fragment += step
+            else:
+                piece = self.random.choice(FILLER)
+            parts.append(piece.rstrip(';'))
+            length += len(piece) + 1
+        body = ";".join(parts)
+        return f'"{self.module_id:x}":function(e,t,n){{"use strict";{body}}}'
+
+    def bundle(self, size, module_size=16 * 1024):
+        """生成约 size 字节的完整打包文件"""
+        modules = []
+        length = 0
+        while length < size:
+            module = self.module(min(module_size, size - length))
+            modules.append(module)
+            length += len(module) + 1
+        chunk = self.random.randint(0, 999)
+        return f'(window.webpackJsonp=window.webpackJsonp||[]).push([[{chunk}],{{{",".join(modules)}}}]);\n'
+
+def write_corpus(directory, files=8, size=1024 * 1024, seed=0, route_density=2.0,
+                 call_depth=3, escape_ratio=0.1):
+    """在目录中生成 files 个合成打包文件，返回文件路径列表"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        generator = BundleGenerator(seed * 1000003 + index, route_density, call_depth, escape_ratio)
+        path = os.path.join(directory, f"chunk-{index:04d}.js")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generator.bundle(size))
+        paths.append(path)
+    return paths
+
+def add_arguments(parser):
+    """语料参数，供各基准脚本共用"""
+    parser.add_argument("-n", "--files", type=int, default=8, help="生成的文件数")
+    parser.add_argument("-s", "--size-mb", type=float, default=1.0, help="每个文件的大小（MB）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--route-density", type=float, default=2.0, help="每 KB 代码中的路由/接口片段数")
+    parser.add_argument("--call-depth", type=int, default=3, help="get(/post( 参数的最大嵌套层数")
+    parser.add_argument("--escape-ratio", type=float, default=0.1, help="字符串中带转义引号的比例")
+
+def corpus_from_args(directory, args):
+    return write_corpus(directory, args.files, int(args.size_mb * 1024 * 1024), args.seed,
+                        args.route_density, args.call_depth, args.escape_ratio)
+
+def main():
+    parser = argparse.ArgumentParser(description="生成确定性的合成JS打包文件")
+    parser.add_argument("directory", help="输出目录")
+    add_arguments(parser)
+    args = parser.parse_args()
+    paths = corpus_from_args(args.directory, args)
+    total = sum(os.path.getsize(path) for path in paths)
+    print(f"✅ 已生成 {len(paths)} 个文件，共 {total / 1024 / 1024:.1f} MB: {args.directory}")
+
+if __name__ == "__main__":
+    main()
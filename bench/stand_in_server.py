@@ -0,0 +1,133 @@
+"""本地 HTTP 替身站点，用于离线测量抓取吞吐
+
+站点内容由路径确定性地生成：
+- /static/js/*.js：合成打包文件（见 corpus.py），带 ETag，支持 If-None-Match 返回 304
+- /api/... 与 *.map：返回 404，模拟接口路径被当作页面请求时的情况
+- 其他路径：HTML 页面，引用 app.js，约四分之一的页面还会引用一个专属 chunk
+
+可用 latency 模拟网络延迟。也可以单独运行后让 url-js.py 指向它：
+python bench/stand_in_server.py --port 8000 然后 python url-js.py http://127.0.0.1:8000/
+"""
+import time
+import zlib
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from corpus import BundleGenerator
+
+class StandInSite:
+    """按路径生成页面和脚本内容，结果会缓存"""
+
+    def __init__(self, js_size=64 * 1024, seed=0):
+        self.js_size = js_size
+        self.seed = seed
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def page_chunk(self, path):
+        """约四分之一的页面引用一个专属 chunk"""
+        checksum = zlib.crc32(path.encode('utf-8'))
+        return f"/static/js/page-{checksum:08x}.js" if checksum % 4 == 0 else None
+
+    def render(self, path):
+        """返回 (状态码, Content-Type, 内容)"""
+        with self.lock:
+            cached = self.cache.get(path)
+        if cached is not None:
+            return cached
+        if path.startswith("/api/") or path.endswith(".map"):
+            result = (404, "text/plain", b"not found")
+        elif path.startswith("/static/js/") and path.endswith(".js"):
+            generator = BundleGenerator(self.seed * 1000003 + zlib.crc32(path.encode('utf-8')))
+            result = (200, "application/javascript", generator.bundle(self.js_size).encode('utf-8'))
+        else:
+            scripts = ['<script src="/static/js/app.js"></script>']
+            chunk = self.page_chunk(path)
+            if chunk:
+                scripts.append(f'<script src="{chunk}"></script>')
+            html = (f'<!DOCTYPE html><html><head><title>{path}</title>{"".join(scripts)}</head>'
+                    f'<body><div id="app"></div></body></html>')
+            result = (200, "text/html; charset=utf-8", html.encode('utf-8'))
+        with self.lock:
+            self.cache[path] = result
+        return result
+
+class StandInServer:
+    """在后台线程中运行替身站点；可作为上下文管理器使用"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, js_size=64 * 1024, seed=0):
+        self.site = StandInSite(js_size, seed)
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self.stats_lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                status, content_type, body = server.site.render(self.path.split('?', 1)[0])
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+                with server.stats_lock:
+                    server.requests += 1
+                    server.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="运行本地替身站点")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求的模拟延迟（毫秒）")
+    parser.add_argument("--js-size-kb", type=int, default=64, help="每个脚本的大小（KB）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server = StandInServer(args.host, args.port, args.latency_ms / 1000, args.js_size_kb * 1024, args.seed)
+    print(f"🌐 替身站点运行于 {server.url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
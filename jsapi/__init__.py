@@ -0,0 +1,19 @@
+"""从前端 JS 文件中提取 API 路径的工具库
+
+- patterns：预编译的正则注册表
+- engine：单遍组合匹配引擎、有界的调用参数提取与流式结果输出
+- scanner：目录扫描器，产出结果迭代器（re-simple.py、re-api-dir.py 的实现）
+- analysis：路径分析、按内容哈希的分析缓存与最终输出
+- crawler：页面抓取、JS 下载与路径发现（url-js.py 的实现），requests 在创建会话时才导入
+- batch：多个目标共用连接、JS存储和分析缓存的批量爬取
+- fingerprint：第三方库指纹，跳过或精简扫描已知的库
+- resultdb：带索引的 SQLite 结果数据库（results-db.py 查询、比较和导出）
+- scheduler：按服务器响应自适应调整并发（AIMD）、按 Retry-After 暂停、带抖动的重试与熔断
+- routes：路由规范化与前缀树聚合，/api/user/1、/api/user/{id} 等归为同一个模板
+- planner、store、link_extract、chunk_discovery、metrics：爬取与统计的组成部分
+
+导入本包只加载标准库，可以直接嵌入其他程序而不会产生副作用。
+"""
+from .engine import CombinedMatcher, ResultSink, decode_span
+from .patterns import get_matcher, pattern_groups, register
+from .scanner import iter_file_results, scan_directory, scan_file
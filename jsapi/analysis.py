@@ -0,0 +1,333 @@
+"""JS 文件分析
+
+从已下载的JS文件中提取路径（循环发现用）和最终输出的分组结果，
+按内容哈希缓存每个文件的提取结果。只依赖标准库，不需要网络相关的依赖。
+"""
+import os
+import time
+import json
+import hashlib
+import threading
+
+from .engine import ResultSink, decode_span
+from .metrics import METRICS
+from .patterns import get_matcher, pattern_groups
+from .fingerprint import FINGERPRINTS, SKIP, report_vendor
+from .resultdb import RunWriter, KIND_FINAL
+from .routes import PathTrie, ABSOLUTE_URL, aggregate_results, is_route
+from .scanner import iter_js_files
+from .chunk_discovery import discover_references
+
+# ================== 第二部分：分析JS文件提取API路径 ==================
+def _collect_paths(matches):
+    paths = set()
+    for _, _, group_idx, match in matches:
+        # 标准化路径：确保以/开头，去掉结尾的/；./、../ 和完整URL保留原样，交给路由规范化按目标解析
+        # MIME 类型、javascript: 等明显不是路由的值在补 / 之前过滤，补上 / 后就无法识别了
+        path = decode_span(match.group(group_idx)).strip()
+        if not is_route(path):
+            continue
+        if not path.startswith(('/', '.')) and not ABSOLUTE_URL.match(path):
+            path = '/' + path
+        if path.endswith('/'):
+            path = path[:-1]
+        paths.add(path)
+    return paths
+
+def _collect_final_matches(matches):
+    results = {group: [] for group in pattern_groups("final")}
+    for group, label, group_idx, match in matches:
+        results[group].append((decode_span(match.group(group_idx)).strip(), label))
+    return results
+
+def extract_paths(content, reduced=False):
+    """从单个文件内容（str 或字节）中提取标准化后的路径集合；reduced 为真时使用精简的正则表"""
+    return _collect_paths(get_matcher("paths", reduced).iter_matches(content))
+
+def extract_final_matches(content, reduced=False):
+    """从单个文件内容（str 或字节）中按分组提取 (路径, 标签)"""
+    return _collect_final_matches(get_matcher("final", reduced).iter_matches(content))
+
+def extract_paths_from_file(file_path, reduced=False):
+    """内存映射并分块扫描文件，提取标准化后的路径集合"""
+    return _collect_paths(get_matcher("paths", reduced).iter_file(file_path))
+
+def extract_final_matches_from_file(file_path, reduced=False):
+    """内存映射并分块扫描文件，按分组提取 (路径, 标签)"""
+    return _collect_final_matches(get_matcher("final", reduced).iter_file(file_path))
+
+def analyze_file(file_path, fingerprint=None):
+    """分析单个文件，返回分析缓存条目；识别为需跳过的第三方库时条目为空"""
+    if fingerprint is not None and fingerprint.action == SKIP:
+        return {"paths": [], "final": {}}
+    reduced = fingerprint is not None
+    return {
+        "paths": sorted(extract_paths_from_file(file_path, reduced)),
+        "final": extract_final_matches_from_file(file_path, reduced),
+    }
+
+def cache_key(digest, fingerprint=None):
+    """分析缓存的键：第三方库的条目按动作另外保存，关闭指纹识别后不会命中精简的结果"""
+    return digest if fingerprint is None else f"{digest}:{fingerprint.action}"
+
+def file_sha256(file_path, block_size=1024 * 1024):
+    """分块计算文件的 SHA-256，不把整个文件读入内存"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def analyze_js_files_for_paths(api_js_directory, files=None, normalize=False, base_url=None):
+    """分析JS文件并提取API路径；normalize 为真时按路由模板聚合（见 routes.PathTrie）"""
+    # 收集所有路径
+    all_paths = set()
+    
+    # 遍历JS文件
+    total_files = 0
+    processed_files = 0
+    for file_path in iter_js_files(api_js_directory, files):
+        total_files += 1
+        try:
+            fingerprint = FINGERPRINTS.identify_file(file_path)
+            if fingerprint is not None:
+                report_vendor(file_path, fingerprint)
+            start = time.perf_counter()
+            paths = set(analyze_file(file_path, fingerprint)["paths"])
+            if METRICS.enabled:
+                METRICS.file_scanned(file_path, time.perf_counter() - start,
+                                     os.path.getsize(file_path), len(paths))
+            all_paths.update(paths)
+            processed_files += 1
+        except Exception as e:
+            print(f"⚠️ 无法读取文件 {file_path}: {e}")
+
+    print(f"\n🔍 路径分析完成! 共处理 {processed_files}/{total_files} 个JS文件")
+    print(f"📊 发现 {len(all_paths)} 个唯一路径")
+    if not normalize:
+        return sorted(all_paths)
+    routes = PathTrie(base_url)
+    for path in all_paths:
+        routes.add(path)
+    print(f"🌲 按路由模板聚合后 {len(routes)} 个路径")
+    return list(routes)
+
+def count_entry_matches(entry):
+    """分析缓存条目中的路径数与最终匹配数之和"""
+    return len(entry["paths"]) + sum(len(matches) for matches in entry["final"].values())
+
+class AnalysisCache:
+    """按内容哈希缓存每个文件的提取结果，实现增量分析
+
+    每次只分析新出现的文件并把结果合并进累计路径集合，
+    缓存持久化在目录中，之后的运行对相同内容直接命中。
+    识别为第三方库的文件按指纹动作跳过或精简扫描（见 fingerprint.py）。
+    给出 shared（另一个 AnalysisCache）时共用它的缓存条目，多个目标中相同的内容只分析一次；
+    已分析文件和累计路径仍按实例分别记录。
+    """
+    CACHE_NAME = ".analysis_cache.json"
+    SAVE_EVERY = 100  # 每新分析多少个文件写入一次缓存，中断后已分析的内容不必重做
+
+    def __init__(self, directory, shared=None):
+        self.file_digests = {}  # 本次运行已分析的文件 -> 缓存键
+        self.paths = set()      # 累计路径集合
+        if shared is not None:
+            self.cache_path = shared.cache_path
+            self.entries = shared.entries
+            self.lock = shared.lock
+            return
+        self.cache_path = os.path.join(directory, self.CACHE_NAME)
+        self.entries = {}       # 缓存键 -> {"paths": [...], "final": {分组: [[路径, 标签], ...]}}，键见 cache_key
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 无法读取分析缓存 {self.cache_path}: {e}")
+
+    def save(self):
+        with self.lock:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+
+    def analyze(self, files):
+        """只分析尚未分析过的文件，返回新增路径集合"""
+        new_paths = set()
+        analyzed = cached = 0
+        for file_path in files:
+            if file_path in self.file_digests:
+                continue
+            try:
+                digest = file_sha256(file_path)
+                fingerprint = FINGERPRINTS.identify_file(file_path, digest)
+                digest = cache_key(digest, fingerprint)
+                entry = self.entries.get(digest)
+                if entry is None:
+                    if fingerprint is not None:
+                        report_vendor(file_path, fingerprint)
+                    start = time.perf_counter()
+                    entry = analyze_file(file_path, fingerprint)
+                    if METRICS.enabled:
+                        METRICS.file_scanned(file_path, time.perf_counter() - start,
+                                             os.path.getsize(file_path), count_entry_matches(entry))
+                    with self.lock:
+                        self.entries[digest] = entry
+                    analyzed += 1
+                    if analyzed % self.SAVE_EVERY == 0:
+                        self.save()
+                else:
+                    cached += 1
+            except Exception as e:
+                print(f"⚠️ 无法读取文件 {file_path}: {e}")
+                continue
+            self.file_digests[file_path] = digest
+            new_paths.update(path for path in entry["paths"] if path not in self.paths)
+        self.paths.update(new_paths)
+        if analyzed:
+            self.save()
+
+        print(f"\n🔍 增量分析完成! 新分析 {analyzed} 个文件，命中缓存 {cached} 个")
+        print(f"📊 新增 {len(new_paths)} 个路径，累计 {len(self.paths)} 个唯一路径")
+        return new_paths
+
+    def add_entry(self, file_path, digest, entry=None):
+        """记录一个已在别处分析过的文件（entry 为 None 时沿用缓存条目），返回新增路径集合"""
+        if entry is not None:
+            with self.lock:
+                self.entries[digest] = entry
+        entry = self.entries[digest]
+        self.file_digests[file_path] = digest
+        new_paths = set(entry["paths"]) - self.paths
+        self.paths |= new_paths
+        return new_paths
+
+    def restore(self, file_digests):
+        """从检查点恢复已分析文件及累计路径，无需重新读取和哈希文件"""
+        for file_path, digest in file_digests.items():
+            entry = self.entries.get(digest)
+            if entry is None or not os.path.exists(file_path):
+                continue
+            self.file_digests[file_path] = digest
+            self.paths.update(entry["paths"])
+
+    def iter_final_results(self, files=None):
+        """逐条产出已分析文件（默认全部）的最终分组结果 (分组, (路径, 标签))"""
+        if files is None:
+            digests = set(self.file_digests.values())
+        else:
+            digests = {self.file_digests[f] for f in files if f in self.file_digests}
+        for digest in digests:
+            for group, matches in self.entries[digest]["final"].items():
+                for match in matches:
+                    yield group, tuple(match)
+
+    def iter_file_final_results(self, files):
+        """逐条产出 (文件路径, 内容摘要, 分组, (路径, 标签))，同一内容的每个文件分别产出"""
+        for file_path in files:
+            key = self.file_digests.get(file_path)
+            if key is None:
+                continue
+            digest = key.split(":")[0]
+            for group, matches in self.entries[key]["final"].items():
+                for match in matches:
+                    yield file_path, digest, group, tuple(match)
+
+# ================== 流水线模式的分析任务 ==================
+def analyze_downloaded_script(content, script_url, base_url, extract=True, discover=True, reduced=False):
+    """分析刚下载的JS内容（在分析进程中执行）；reduced 为真时使用精简的正则表
+
+    返回 (分析缓存条目或 None, chunk URL 集合, source map URL 列表, 内联 source map 列表)。
+    """
+    entry = None
+    if extract:
+        start = time.perf_counter()
+        entry = {"paths": sorted(extract_paths(content, reduced)), "final": extract_final_matches(content, reduced)}
+        METRICS.file_scanned(script_url, time.perf_counter() - start, len(content), count_entry_matches(entry))
+    if not discover:
+        return entry, set(), [], []
+    chunks, map_urls, inline_maps = discover_references(content.decode('utf-8', errors='replace'),
+                                                        script_url, base_url)
+    return entry, chunks, map_urls, inline_maps
+
+# ================== 第四部分：最终路径分析输出 ==================
+def final_path_analysis(api_js_directory, output_file, files=None, cache=None, db=None, target=None,
+                        normalize=False):
+    """对所有JS文件进行最终路径分析；给出分析缓存时只分析尚未缓存的文件
+
+    给出 db（ResultDB）时把带来源文件和内容摘要的结果同时写入数据库，target 为爬取的目标URL。
+    normalize 为真时输出按路由模板聚合（相对路径按 target 解析），数据库中仍保存原始结果。
+    """
+    # 结果到达即去重，超出内存预算时溢出到临时文件
+    sink = ResultSink(pattern_groups("final"))
+    writer = RunWriter(db, KIND_FINAL, "final", api_js_directory, target) if db is not None else None
+    if cache is not None:
+        files = list(iter_js_files(api_js_directory, files))
+        cache.analyze(files)
+        for group, item in cache.iter_final_results(files):
+            sink.add(group, item)
+        if writer is not None:
+            for file_path, digest, group, (path, label) in cache.iter_file_final_results(files):
+                writer.add(group, path, label, file_path, digest)
+        total_files = len(files)
+        processed_files = sum(1 for f in files if f in cache.file_digests)
+    else:
+        total_files = 0
+        processed_files = 0
+
+        # 遍历目录下的所有 .js 文件
+        for file_path in iter_js_files(api_js_directory, files):
+            total_files += 1
+            try:
+                fingerprint = FINGERPRINTS.identify_file(file_path)
+                if fingerprint is not None:
+                    report_vendor(file_path, fingerprint)
+                start = time.perf_counter()
+                results = analyze_file(file_path, fingerprint)["final"]
+                if METRICS.enabled:
+                    METRICS.file_scanned(file_path, time.perf_counter() - start, os.path.getsize(file_path),
+                                         sum(len(matches) for matches in results.values()))
+                for group, matches in results.items():
+                    for item in matches:
+                        sink.add(group, item)
+                        if writer is not None:
+                            writer.add(group, item[0], item[1], file_path)
+                processed_files += 1
+            except Exception as e:
+                print(f"⚠️ 无法读取文件 {file_path}: {e}")
+
+    print(f"\n🔍 最终路径分析完成! 共处理 {processed_files}/{total_files} 个JS文件")
+    if writer is not None:
+        writer.finish(processed_files)
+    if normalize:
+        with sink:
+            sink = aggregate_results(sink, ResultSink(pattern_groups("final")), target)
+    
+    # 将结果写入文件
+    return write_final_results(sink, output_file, processed_files, api_js_directory)
+
+def write_final_results(sink, output_file, processed_files, source_directory, analyzed_at=None):
+    """把最终分析结果和统计信息写入 path.txt 格式的文件，返回写出的路径数"""
+    try:
+        with sink, open(output_file, 'w', encoding='utf-8') as f:
+            # 按路径排序，路径列按最大宽度对齐
+            total_paths = sink.write(f, lambda item, widths: f"{item[0].ljust(widths[0] + 2)}\t[{item[1]}]\n")
+            
+            f.write(f"===== 统计信息 =====\n")
+            f.write(f"总提取路径数: {total_paths}\n")
+            f.write(f"分析文件数: {processed_files}\n")
+            f.write(f"文件来源目录: {source_directory}\n")
+            f.write(f"分析时间: {analyzed_at or time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            
+        print(f"📝 匹配的路径已按分类写入 {output_file}")
+        print(f"📊 共提取 {total_paths} 个API路径")
+        return total_paths
+    except Exception as e:
+        print(f"⚠️ 无法写入文件 {output_file}: {e}")
+        return 0
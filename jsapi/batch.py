@@ -0,0 +1,156 @@
+"""批量模式
+
+从文件读取多个目标并发爬取，每个目标的索引、检查点和 path.txt 写在输出目录下各自的子目录中。
+所有目标共用一个会话（每个主机单独的连接池，全局同时请求数上限）、一个按主机的限速器，
+以及 _shared 目录中的JS内容存储、分析缓存和HTTP缓存：
+多个站点都引用的第三方包（vue、react、element-ui 等）只下载、分析一次。
+子目录的存储索引记录了 _shared 的位置，url-js.py --analyze-only 和扫描器可以直接分析单个子目录。
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from .metrics import METRICS
+from .link_extract import LinkExtractor
+from .store import JsStore, HttpCache, DEFAULT_HTTP_CACHE_SIZE
+from .analysis import AnalysisCache
+from .scheduler import SCHEDULER
+from .crawler import (crawl, create_session, HostRateLimiter,
+                      DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT, DEFAULT_PIPELINE_QUEUE_SIZE)
+
+# 共用数据所在的子目录
+SHARED_DIR_NAME = "_shared"
+SUMMARY_NAME = "batch_summary.json"
+# 同时爬取的目标数与所有目标同时进行的请求数上限
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_MAX_CONNECTIONS = 32
+
+def read_targets(path):
+    """读取目标文件：每行一个URL，忽略空行、# 开头的注释行和重复的目标"""
+    targets = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                targets.append(line)
+    return list(dict.fromkeys(targets))
+
+def target_directory(output_dir, url):
+    """由主机和路径生成目标的输出子目录，如 example.com_8080_admin"""
+    parsed = urlparse(url)
+    slug = re.sub(r'[^A-Za-z0-9.-]+', '_', parsed.netloc + parsed.path).strip('_.') or "target"
+    return os.path.join(output_dir, slug)
+
+def assign_directories(output_dir, targets):
+    """为每个目标分配不重复的子目录（只有查询串或 # 片段不同的目标追加URL摘要区分）"""
+    directories = {}
+    used = {os.path.join(output_dir, SHARED_DIR_NAME)}
+    for url in targets:
+        directory = target_directory(output_dir, url)
+        if directory in used:
+            directory += "_" + hashlib.md5(url.encode('utf-8')).hexdigest()[:8]
+        used.add(directory)
+        directories[url] = directory
+    return directories
+
+def target_hosts(targets):
+    """目标涉及的 "scheme://netloc" 列表，每个主机单独挂载一个连接池"""
+    hosts = (urlparse(url) for url in targets)
+    return sorted({f"{p.scheme}://{p.netloc}".lower() for p in hosts if p.scheme and p.netloc})
+
+def run_batch(targets, output_dir, batch_workers=DEFAULT_BATCH_WORKERS,
+              max_connections=DEFAULT_MAX_CONNECTIONS, concurrency=DEFAULT_CONCURRENCY,
+              rate=DEFAULT_RATE_LIMIT, burst=1, html_parser="auto", parse_workers=0,
+              http_cache_size=DEFAULT_HTTP_CACHE_SIZE, probe=True, api_first=False, resume=False,
+              pipeline=False, analysis_workers=0, queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, db=None,
+              normalize=True, renderer=None):
+    """并发爬取多个目标，返回每个目标的结果摘要列表（顺序与 targets 一致）
+
+    batch_workers 为同时爬取的目标数，每个目标内部仍按 concurrency 并发请求；
+    max_connections 限制所有目标同时进行的请求数，0 表示不限制；
+    给出 db（ResultDB）时所有目标的结果写入同一个数据库，每个目标一次运行。
+    """
+    directories = assign_directories(output_dir, targets)
+    shared_dir = os.path.join(output_dir, SHARED_DIR_NAME)
+    pool = JsStore(shared_dir)
+    shared_cache = AnalysisCache(shared_dir)
+    http_cache = None
+    if http_cache_size > 0:
+        http_cache = HttpCache(shared_dir, int(http_cache_size * 1024 * 1024))
+    gate = threading.Semaphore(max_connections) if max_connections > 0 else None
+    session = create_session(concurrency * batch_workers, http_cache, gate, target_hosts(targets))
+    limiter = HostRateLimiter(rate, burst)
+    extractor = LinkExtractor(html_parser, parse_workers)
+    stores = {}
+    print(f"📦 批量模式: {len(targets)} 个目标，同时爬取 {batch_workers} 个，"
+          f"同时请求数上限 {max_connections or '不限'}")
+
+    def crawl_target(url):
+        store = stores[url] = JsStore(directories[url], pool=pool)
+        return crawl(url, directories[url], concurrency, rate, burst, html_parser, parse_workers,
+                     http_cache_size, probe, api_first, resume, pipeline, analysis_workers, queue_size,
+                     session=session, store=store, cache=AnalysisCache(directories[url], shared=shared_cache),
+                     http_cache=http_cache, limiter=limiter, extractor=extractor, db=db, normalize=normalize,
+                     renderer=renderer)
+
+    summaries = {}
+    try:
+        with METRICS.stage("批量爬取"), ThreadPoolExecutor(max_workers=max(1, batch_workers)) as executor:
+            futures = {executor.submit(crawl_target, url): url for url in targets}
+            for future in as_completed(futures):
+                url = futures[future]
+                summary = {"target_url": url, "directory": directories[url]}
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ 目标 {url} 爬取失败: {e}")
+                    result = None
+                    summary["error"] = str(e)
+                summary["ok"] = result is not None
+                if result is not None:
+                    summary.update(output_file=result["output_file"],
+                                   initial_files=len(result["initial_files"]),
+                                   new_files=len(result["new_files"]),
+                                   iterations=result["iterations"],
+                                   paths=len(result["paths"]))
+                summaries[url] = summary
+                print(f"{'✅' if summary['ok'] else '❌'} [{len(summaries)}/{len(targets)}] {url}")
+    finally:
+        extractor.close()
+        session.close()
+        pool.save()
+        shared_cache.save()
+        if http_cache is not None:
+            http_cache.save()
+
+    summaries = [summaries[url] for url in targets]
+    referenced = sum(len(store.objects) for store in stores.values())
+    report = {
+        "targets": summaries,
+        "unique_files": len(pool.objects),
+        "referenced_files": referenced,
+        "analyzed_contents": len(shared_cache.entries),
+    }
+    summary_path = os.path.join(output_dir, SUMMARY_NAME)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n\n" + "="*60)
+    print("✅ 批量任务完成!")
+    print("="*60)
+    for summary in summaries:
+        if summary["ok"]:
+            print(f"📄 {summary['target_url']}: {summary['paths']} 个路径 -> {summary['output_file']}")
+        else:
+            print(f"❌ {summary['target_url']}: 失败")
+    print(f"♻️ 各目标共引用JS内容 {referenced} 份，实际保存 {len(pool.objects)} 份")
+    if SCHEDULER.enabled:
+        SCHEDULER.report()
+    if http_cache is not None:
+        http_cache.report()
+    print(f"📝 批量摘要: {summary_path}")
+    return summaries
@@ -0,0 +1,230 @@
+"""从已下载的打包产物中直接计算懒加载 chunk 的URL
+
+逐个请求提取到的路径再抓取页面里的 <script>，既要大量请求，也找不到按需加载的 chunk。
+打包器的运行时里其实已经写明了这些文件名：
+
+- webpack：__webpack_require__.u / jsonpScriptSrc 中 chunkId→hash 的对象表与拼接表达式
+- Vite/ESM：import("./x.js")、静态 import/from 以及 __vitePreload/__vite__mapDeps 的依赖列表
+- sourceMappingURL：指向 source map，其中的 sourcesContent 就是原始源码
+
+这里只做解析，不发请求；返回的URL交给下载器。
+"""
+import re
+import json
+import base64
+from urllib.parse import unquote, urlparse
+
+from .planner import join_url
+
+_STRING = r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+_KEY = r'[\w$]+|"[^"\n]*"|\'[^\'\n]*\''
+_PAIR = rf'(?:{_KEY})\s*:\s*(?:"[^"\n]*"|\'[^\'\n]*\')'
+# chunkId→hash 对象表及其下标访问，例如 {34:"a1b2c3d4","chunk-1d2b":"31ecd969"}[e]
+_MAP_LOOKUP = rf'\{{\s*(?:{_PAIR}(?:\s*,\s*{_PAIR})*\s*,?\s*)?\}}\s*\[\s*[\w$]+\s*\]'
+_OPERAND = (rf'(?:{_STRING}|\(\s*{_MAP_LOOKUP}\s*\|\|\s*[\w$]+\s*\)|{_MAP_LOOKUP}'
+            rf'|[\w$]+(?:\.[\w$]+)?)')
+
+MAP_LOOKUP_PATTERN = re.compile(_MAP_LOOKUP)
+OPERAND_PATTERN = re.compile(_OPERAND)
+CHAIN_PATTERN = re.compile(rf'{_OPERAND}(?:\s*\+\s*{_OPERAND})+')
+PAIR_PATTERN = re.compile(rf'({_KEY})\s*:\s*("[^"\n]*"|\'[^\'\n]*\')')
+LOOKUP_VAR_PATTERN = re.compile(r'\[\s*([\w$]+)\s*\]$')
+RUNTIME_VAR_PATTERN = re.compile(r'([\w$]+)\.u\s*=\s*(?:function\s*\(\s*[\w$]+\s*\)\s*\{\s*return\s*|'
+                                 r'\(?\s*[\w$]+\s*\)?\s*=>\s*\{?\s*(?:return\s*)?)$')
+
+# 以下正则都以字面量开头，re 可以先快速定位字面量，单词边界在代码里检查
+# ES 模块的相对导入：import("./a.js")、import "./a.js"、from "../b.js"
+ESM_IMPORT_PATTERNS = (
+    re.compile(r'import\s*\(?\s*(["\'])((?:\.{1,2}/|/)[^"\'\s]*?\.m?js)\1'),
+    re.compile(r'from\s*(["\'])((?:\.{1,2}/|/)[^"\'\s]*?\.m?js)\1'),
+)
+# Vite 预加载依赖列表：__vitePreload(() => import("..."), [...]) 与 __vite__mapDeps 的 m.f=[...]
+VITE_DEPS_PATTERNS = (
+    re.compile(r'import\(\s*["\'][^"\']+["\']\s*\)\s*,\s*\[([^\]]*)\]'),
+    re.compile(r'm\.f\s*=\s*\[([^\]]*)\]'),
+)
+JS_STRING_PATTERN = re.compile(r'["\']([^"\'\s]+?\.m?js)["\']')
+SOURCE_MAP_PATTERN = re.compile(r'(?://|/\*)[#@]\s*sourceMappingURL=([^\s\'"*]+)')
+
+# 在对象表附近多大范围内寻找拼接表达式
+CHAIN_WINDOW = 400
+
+def _unquote(literal):
+    """去掉JS字符串字面量的引号并处理常见转义"""
+    body = literal[1:-1]
+    if '\\' in body:
+        body = re.sub(r'\\(.)', lambda m: {'n': '\n', 't': '\t'}.get(m.group(1), m.group(1)), body)
+    return body
+
+def _parse_map(lookup):
+    """解析 {k:"v",...}[e]，返回 (字典, 下标变量名)"""
+    body = lookup[:lookup.rindex('}')]
+    mapping = {}
+    for key, value in PAIR_PATTERN.findall(body):
+        if key[0] in '"\'':
+            key = _unquote(key)
+        mapping[key] = _unquote(value)
+    return mapping, LOOKUP_VAR_PATTERN.search(lookup).group(1)
+
+def _public_path(content, runtime_var, script_url, base_url):
+    """找到 runtime_var.p 的赋值，返回用于拼接 chunk 路径的基准URL"""
+    if runtime_var:
+        pattern = re.compile(rf'(?<![\w$.]){re.escape(runtime_var)}\.p\s*=\s*({_STRING}|[\w$]+(?:\s*\+\s*(?:{_STRING}))?)')
+        match = pattern.search(content)
+        if match:
+            value = match.group(1)
+            if value[0] in '"\'':
+                return join_url(base_url, _unquote(value)) or base_url
+            # webpack 5 的 publicPath: "auto"，运行时由当前脚本地址推算
+            suffix = re.search(_STRING, value)
+            return join_url(script_url, _unquote(suffix.group(0)) if suffix else "./") or base_url
+    return base_url
+
+def _evaluate_chain(chain, content, script_url, base_url, runtime_var):
+    """对拼接表达式代入每个 chunkId，返回 chunk URL 集合"""
+    operands = [m.group(0) for m in OPERAND_PATTERN.finditer(chain)]
+    parts = []
+    chunk_ids = None
+    chunk_var = None
+    for operand in operands:
+        if operand[0] in '"\'':
+            parts.append(('literal', _unquote(operand)))
+        elif operand[0] == '(':
+            names, var = _parse_map(operand[1:operand.rindex('||')].strip())
+            parts.append(('names', names))
+            chunk_var = chunk_var or var
+        elif operand[0] == '{':
+            hashes, var = _parse_map(operand)
+            parts.append(('hashes', hashes))
+            chunk_ids = set(hashes) if chunk_ids is None else chunk_ids & set(hashes)
+            chunk_var = chunk_var or var
+        elif operand.endswith('.p'):
+            runtime_var = operand[:-2]
+            parts.append(('public', None))
+        else:
+            parts.append(('var', operand))
+    # 只处理以 .js 结尾、带 chunkId→hash 表的拼接
+    if (not chunk_ids or parts[-1][0] != 'literal' or not parts[-1][1].endswith('.js')
+            or any(kind == 'var' and value != chunk_var for kind, value in parts)):
+        return set()
+
+    public = _public_path(content, runtime_var, script_url, base_url)
+    urls = set()
+    for chunk_id in chunk_ids:
+        path = []
+        for kind, value in parts:
+            if kind == 'literal':
+                path.append(value)
+            elif kind == 'names':
+                path.append(value.get(chunk_id, chunk_id))
+            elif kind == 'hashes':
+                path.append(value[chunk_id])
+            elif kind == 'var':
+                path.append(chunk_id)
+        urls.add(join_url(public, ''.join(path)))
+    urls.discard(None)
+    return urls
+
+def find_webpack_chunks(content, script_url, base_url):
+    """从 webpack 运行时的 chunkId→hash 表计算所有异步 chunk 的URL"""
+    urls = set()
+    covered = 0
+    for lookup in MAP_LOOKUP_PATTERN.finditer(content):
+        if lookup.start() < covered:
+            continue  # 已随前一个拼接表达式处理过
+        # 从窗口左端起找最靠左、且能覆盖该对象表的拼接表达式
+        for start in range(max(0, lookup.start() - CHAIN_WINDOW), lookup.start() + 1):
+            if start and (content[start - 1].isalnum() or content[start - 1] in '_$."\''):
+                continue
+            chain = CHAIN_PATTERN.match(content, start, lookup.end() + CHAIN_WINDOW)
+            if chain is None or chain.end() < lookup.end():
+                continue
+            covered = chain.end()
+            runtime = RUNTIME_VAR_PATTERN.search(content, max(0, start - 80), start)
+            runtime_var = runtime.group(1) if runtime else None
+            urls |= _evaluate_chain(chain.group(0), content, script_url, base_url, runtime_var)
+            break
+    return urls
+
+def _iter_words(patterns, content):
+    """依次产出各正则的匹配，跳过前面紧接标识符字符的（相当于 \\b）"""
+    for pattern in patterns:
+        for match in pattern.finditer(content):
+            start = match.start()
+            if start and (content[start - 1].isalnum() or content[start - 1] in '_$.'):
+                continue
+            yield match
+
+def _vite_base(script_url, base_url):
+    """Vite 依赖列表中的路径相对于部署根目录，按 /assets/ 目录推算"""
+    path = urlparse(script_url).path
+    index = path.rfind('/assets/')
+    if index >= 0:
+        return join_url(script_url, path[:index + 1]) or base_url
+    return base_url
+
+def find_esm_imports(content, script_url, base_url):
+    """找出 ES 模块的相对导入和 Vite 预加载依赖"""
+    urls = set()
+    deps_base = None
+    for match in _iter_words(ESM_IMPORT_PATTERNS, content):
+        urls.add(join_url(script_url, match.group(2)))
+    for match in _iter_words(VITE_DEPS_PATTERNS, content):
+        for dep in JS_STRING_PATTERN.findall(match.group(1)):
+            if dep.startswith(('./', '../')):
+                urls.add(join_url(script_url, dep))
+                continue
+            if deps_base is None:
+                deps_base = _vite_base(script_url, base_url)
+            urls.add(join_url(deps_base, dep))
+    urls.discard(None)
+    return urls
+
+def find_source_maps(content, script_url):
+    """返回 (外部 source map URL 列表, 内联 source map 内容列表)"""
+    urls, inline = [], []
+    for match in SOURCE_MAP_PATTERN.finditer(content):
+        reference = match.group(1)
+        if reference.startswith('data:'):
+            header, _, payload = reference.partition(',')
+            try:
+                if header.endswith(';base64'):
+                    inline.append(base64.b64decode(payload))
+                else:
+                    inline.append(unquote(payload).encode('utf-8'))
+            except ValueError:
+                continue
+        else:
+            url = join_url(script_url, reference)
+            if url is not None:
+                urls.append(url)
+    return urls, inline
+
+def discover_references(content, script_url, base_url):
+    """分析一个脚本，返回 (chunk URL 集合, source map URL 列表, 内联 source map 列表)"""
+    chunks = find_webpack_chunks(content, script_url, base_url)
+    chunks |= find_esm_imports(content, script_url, base_url)
+    chunks.discard(script_url)
+    map_urls, inline_maps = find_source_maps(content, script_url)
+    return chunks, map_urls, inline_maps
+
+def sources_from_map(data):
+    """把 source map 中的 sourcesContent 拼接为一个文件；没有源码时返回 None"""
+    try:
+        source_map = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(source_map, dict):
+        return None
+    # 索引型 source map 由多个分段组成
+    maps = [section.get("map", {}) for section in source_map.get("sections", [])] or [source_map]
+    parts = []
+    for section in maps:
+        sources = section.get("sources") or []
+        contents = section.get("sourcesContent") or []
+        for name, text in zip(sources, contents):
+            if text:
+                parts.append(f"// ==== {name} ====\n{text}\n")
+    if not parts:
+        return None
+    return ''.join(parts).encode('utf-8')
@@ -0,0 +1,1298 @@
+"""爬取引擎
+
+页面抓取、JS 下载、运行时清单发现、分轮路径发现循环与流水线模式，crawl 为完整流程的入口。
+requests 在第一次创建会话时才导入，只做分析的调用不需要加载它。
+"""
+import os
+import time
+import shlex
+import queue
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse, urlunparse
+
+from .metrics import METRICS, init_worker, metered, progress
+from .link_extract import LinkExtractor, parse_js_links, resolve_backend
+from .chunk_discovery import discover_references, sources_from_map
+from .planner import FetchPlanner, CrawlFrontier, canonicalize_url, join_url
+from .routes import PathTrie
+from .store import JsStore, HttpCache, CrawlCheckpoint, DEFAULT_HTTP_CACHE_SIZE
+from .analysis import AnalysisCache, analyze_downloaded_script, final_path_analysis, cache_key
+from .fingerprint import FINGERPRINTS, SKIP, PROBE_BYTES, EARLY_ABORT_MIN_SIZE, report_vendor
+from .scheduler import (SCHEDULER, OK, FAILED, THROTTLED, THROTTLE_STATUS, RETRY_STATUS,
+                        backoff_delay, parse_retry_after)
+
+# 默认并发数与每个主机每秒请求数（0 表示不限速）
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_LIMIT = 2.0
+# 流水线模式中等待分析的JS内容最多缓冲多少个
+DEFAULT_PIPELINE_QUEUE_SIZE = 64
+# 渲染一个页面最多等待多少秒
+DEFAULT_RENDER_TIMEOUT = 30.0
+# 轮内进度每完成多少个请求、或最长间隔多少秒写入一次检查点
+JOURNAL_EVERY = 100
+JOURNAL_INTERVAL = 30.0
+
+# ================== 通用工具函数 ==================
+def download_js_content(url, store, session, referer, limiter=None, transform=None):
+    """下载JS文件并存入内容寻址存储，内容为新时返回 (文件路径, 内容)，否则返回 (None, None)
+
+    transform 可在保存前转换响应体（例如从 source map 还原源码），返回 None 时不保存。
+    批量模式中其他目标已下载过的URL直接领用，不再请求；识别为需跳过的第三方库不保存。
+    """
+    try:
+        adopted = store.adopt(url)
+        if adopted is not None:
+            filepath, is_new = adopted
+            if not is_new:
+                progress(f"♻️ 内容已存在: {os.path.basename(filepath)}")
+                return None, None
+            progress(f"♻️ 复用其他目标已下载的内容: {os.path.basename(filepath)}")
+            with open(filepath, 'rb') as f:
+                return filepath, f.read()
+        if limiter:
+            limiter.acquire(url)
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/javascript, application/javascript, */*; q=0.01',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Referer': referer
+        }
+        
+        start = time.perf_counter()
+        # 识别第三方库时流式读取，开头即可判断需跳过的库不再下载剩余部分
+        probe = transform is None and FINGERPRINTS.enabled
+        response = None
+        try:
+            response = session.get(url, headers=headers, timeout=SCHEDULER.timeout, stream=probe)
+            if probe and response.status_code == 200:
+                content, fingerprint = read_script_body(response)
+            else:
+                content, fingerprint = response.content, None
+        except Exception:
+            METRICS.request(url, "error", time.perf_counter() - start)
+            raise
+        finally:
+            if probe and response is not None:
+                response.close()
+        if content is None:
+            report_vendor(url, fingerprint)
+            METRICS.request(url, response.status_code, time.perf_counter() - start, PROBE_BYTES)
+            return None, None
+        record_response(url, response, start)
+        if response.status_code == 200:
+            if transform is not None:
+                content = transform(content)
+                if content is None:
+                    progress(f"⏭️ 没有可保存的内容: {url}")
+                    return None, None
+            filepath, is_new = store.put(url, content)
+            if is_new:
+                progress(f"✅ 保存成功: {os.path.basename(filepath)}")
+                return filepath, content
+            progress(f"♻️ 内容已存在: {os.path.basename(filepath)}")
+        else:
+            progress(f"❌ 响应状态码 {response.status_code}: {url}")
+    except Exception as e:
+        progress(f"❌ 下载失败 {url}: {str(e)}")
+    return None, None
+
+def read_script_body(response):
+    """流式读取响应体并识别第三方库，返回 (内容, 指纹)；需跳过的库内容为 None
+
+    Content-Length 较大时只读取开头 PROBE_BYTES 字节识别横幅，是需跳过的库就此断开；
+    读完的内容放回响应对象，HTTP缓存和指标照常记录。
+    """
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit() and int(length) < EARLY_ABORT_MIN_SIZE:
+        content = response.content
+        fingerprint = FINGERPRINTS.identify_content(content)
+    else:
+        chunks = response.iter_content(PROBE_BYTES)
+        head = b''
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= PROBE_BYTES:
+                break
+        fingerprint = FINGERPRINTS.identify(head)
+        if fingerprint is not None and fingerprint.action == SKIP:
+            return None, fingerprint
+        content = head + b''.join(chunks)
+        response._content = content
+        response._content_consumed = True
+        if fingerprint is None and FINGERPRINTS.digests:
+            fingerprint = FINGERPRINTS.identify_content(content)
+    http_cache = getattr(response, 'http_cache', None)
+    if http_cache is not None:
+        http_cache.store(response.url, response)
+    if fingerprint is not None and fingerprint.action == SKIP:
+        return None, fingerprint
+    return content, fingerprint
+
+def record_response(url, response, start):
+    """记录请求指标；命中HTTP缓存的响应按 304 计，不计入下载字节数"""
+    if not METRICS.enabled:
+        return
+    from_cache = getattr(response, 'from_cache', False)
+    METRICS.request(url, 304 if from_cache else response.status_code, time.perf_counter() - start,
+                    0 if from_cache else len(response.content))
+
+def save_js_file(url, store, session, referer, limiter=None, transform=None):
+    """下载JS文件并存入内容寻址存储，仅在内容为新时返回文件路径"""
+    return download_js_content(url, store, session, referer, limiter, transform)[0]
+
+class CommandRenderer:
+    """用外部命令渲染页面：命令行末尾追加URL，标准输出即渲染后的HTML
+
+    例如 chromium --headless --disable-gpu --dump-dom；配置渲染后端后#路由才会被请求。
+    """
+
+    def __init__(self, command, timeout=DEFAULT_RENDER_TIMEOUT):
+        self.argv = shlex.split(command, posix=os.name != 'nt')
+        self.timeout = timeout
+
+    def __call__(self, url):
+        result = subprocess.run(self.argv + [url], capture_output=True, timeout=self.timeout, check=True)
+        return result.stdout.decode('utf-8', errors='replace')
+
+def fetch_page(url, session, limiter=None, renderer=None):
+    """获取页面HTML（配置了渲染后端时使用渲染后的HTML），失败返回 None"""
+    try:
+        if limiter:
+            limiter.acquire(url)
+        progress(f"🌐 正在解析页面: {url}")
+        if renderer is not None:
+            return renderer(url)
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=SCHEDULER.timeout)
+        except Exception:
+            METRICS.request(url, "error", time.perf_counter() - start)
+            raise
+        record_response(url, response, start)
+        response.raise_for_status()
+        return response.text
+    except Exception as e:
+        progress(f"⚠️ 解析失败 {url}: {str(e)}")
+        return None
+
+def extract_js_links(url, session, limiter=None, renderer=None, extractor=None):
+    """从URL中提取所有JS链接；解析交给 extractor，抓取线程只负责网络请求"""
+    html = fetch_page(url, session, limiter, renderer)
+    if html is None:
+        return []
+    try:
+        if extractor is not None:
+            js_links = extractor.extract(html, url)
+        else:
+            js_links = parse_js_links(html, url, resolve_backend())
+        progress(f"🔍 找到 {len(js_links)} 个JS文件链接")
+        return js_links
+    except Exception as e:
+        progress(f"⚠️ 解析失败 {url}: {str(e)}")
+        return []
+
+def get_path_hash(paths):
+    """计算路径集合的哈希值用于比较"""
+    sorted_paths = sorted(paths)
+    path_str = ''.join(sorted_paths)
+    return hashlib.md5(path_str.encode('utf-8')).hexdigest()
+
+# ================== HTTP 条件请求缓存 ==================
+class CachingAdapter:
+    """为 GET 请求附加条件请求头，服务器返回 304 时用缓存副本构造完整的 200 响应
+
+    包装一个 requests 的 HTTPAdapter（按组合而不是继承，导入本模块时不需要 requests）。
+    流式响应在发送时还没有响应体，由读取方读完后存入（见 read_script_body）。
+    """
+
+    def __init__(self, cache, **kwargs):
+        from requests.adapters import HTTPAdapter
+        self.cache = cache
+        self.adapter = HTTPAdapter(**kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+    def send(self, request, **kwargs):
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+        if request.method != 'GET':
+            return self.adapter.send(request, **kwargs)
+        added = [name for name, value in self.cache.conditional_headers(request.url).items()
+                 if request.headers.setdefault(name, value) == value]
+        response = self.adapter.send(request, **kwargs)
+        if response.status_code == 304 and added:
+            cached = self.cache.lookup(request.url)
+            if cached is None:
+                # 副本在请求期间被淘汰，去掉条件请求头重新获取
+                response.close()
+                for name in added:
+                    del request.headers[name]
+                return self.send(request, **kwargs)
+            headers, body = cached
+            merged = CaseInsensitiveDict(headers)
+            merged.update((k, v) for k, v in response.headers.items()
+                          if k.lower() not in HttpCache.DROPPED_HEADERS)
+            response.close()
+            response.status_code = 200
+            response.reason = 'OK'
+            response.headers = merged
+            response._content = body
+            response._content_consumed = True
+            response.encoding = get_encoding_from_headers(merged)
+            response.from_cache = True
+        elif response.status_code == 200:
+            if kwargs.get('stream'):
+                response.http_cache = self.cache
+            else:
+                self.cache.store(request.url, response)
+        return response
+
+class BoundedAdapter:
+    """限制同时进行的请求数：批量模式中所有目标共用一个上限
+
+    包装另一个适配器，gate 为 threading.Semaphore；非流式响应在持有许可时读完响应体，
+    保证释放许可时连接已经归还连接池。
+    """
+
+    def __init__(self, adapter, gate):
+        self.adapter = adapter
+        self.gate = gate
+
+    def close(self):
+        self.adapter.close()
+
+    def send(self, request, **kwargs):
+        with self.gate:
+            response = self.adapter.send(request, **kwargs)
+            if not kwargs.get('stream'):
+                response.content
+            return response
+
+class ScheduledAdapter:
+    """按服务器响应自适应调度请求（见 scheduler.py）
+
+    包装另一个适配器：发送前等待主机的并发窗口，补上默认超时；连接失败、超时和 502/504
+    按带抖动的指数退避重试，429/503 按 Retry-After 暂停主机后重试，所有重试都在请求的截止时间内。
+    重试次数用完或来不及重试时，限流响应原样返回，异常原样抛出。每次 acquire 恰好对应一次 release。
+    """
+
+    def __init__(self, adapter, scheduler):
+        self.adapter = adapter
+        self.scheduler = scheduler
+
+    def close(self):
+        self.adapter.close()
+
+    def send(self, request, **kwargs):
+        from requests.exceptions import ConnectionError, Timeout
+        scheduler = self.scheduler
+        host = urlparse(request.url).netloc
+        deadline = time.monotonic() + scheduler.deadline
+        timeout = kwargs.get('timeout') or scheduler.timeout
+        attempt = 0
+        while True:
+            scheduler.acquire(host, deadline)
+            remaining = max(0.1, deadline - time.monotonic())
+            # (连接超时, 读取超时) 中的 None 表示不限，同样以剩余时间为上限
+            kwargs['timeout'] = (tuple(remaining if t is None else min(t, remaining) for t in timeout)
+                                 if isinstance(timeout, tuple) else min(timeout, remaining))
+            start = time.monotonic()
+            try:
+                response = self.adapter.send(request, **kwargs)
+            except (ConnectionError, Timeout):
+                scheduler.release(host, FAILED)
+                delay = backoff_delay(attempt)
+                if attempt >= scheduler.retries or time.monotonic() + delay >= deadline:
+                    raise
+            except BaseException:
+                # 其他异常（读取响应体失败、URL 非法、中断等）不重试，但必须归还许可
+                scheduler.release(host, FAILED)
+                raise
+            else:
+                status = response.status_code
+                if status in THROTTLE_STATUS:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    scheduler.release(host, THROTTLED, retry_after=retry_after)
+                    if attempt >= scheduler.retries or scheduler.blocked_until(host) >= deadline:
+                        return response
+                    delay = 0  # 等待由主机的暂停时间控制
+                elif status in RETRY_STATUS:
+                    scheduler.release(host, FAILED)
+                    delay = backoff_delay(attempt)
+                    if attempt >= scheduler.retries or time.monotonic() + delay >= deadline:
+                        return response
+                else:
+                    scheduler.release(host, OK, time.monotonic() - start)
+                    return response
+                response.close()
+            attempt += 1
+            scheduler.retried()
+            progress(f"🔁 第 {attempt} 次重试: {request.url}")
+            if delay:
+                time.sleep(delay)
+
+# ================== 并发抓取引擎 ==================
+class TokenBucket:
+    """令牌桶限速器：平均每秒 rate 个请求，最多允许 burst 个突发请求"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到取得一个令牌"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """按主机分别限速，每个主机拥有独立的令牌桶"""
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        if not self.rate or self.rate <= 0:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+def run_concurrently(func, items, concurrency):
+    """用有界线程池并发执行 func(item)，按完成顺序产出 (item, result)"""
+    items = list(items)
+    if concurrency <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def create_adapter(http_cache=None, gate=None, **pool_size):
+    """创建传输适配器：给出 http_cache 时启用条件请求缓存，给出 gate 时限制同时进行的请求数
+
+    全局调度器启用时（默认）外层再包装 ScheduledAdapter，先等待主机的并发窗口再占用 gate。
+    """
+    from requests.adapters import HTTPAdapter
+    if http_cache is not None:
+        adapter = CachingAdapter(http_cache, **pool_size)
+    else:
+        adapter = HTTPAdapter(**pool_size)
+    if gate is not None:
+        adapter = BoundedAdapter(adapter, gate)
+    if SCHEDULER.enabled:
+        adapter = ScheduledAdapter(adapter, SCHEDULER)
+    return adapter
+
+def create_session(concurrency=DEFAULT_CONCURRENCY, http_cache=None, gate=None, hosts=()):
+    """创建连接池大小与并发数匹配的会话；给出 http_cache 时启用条件请求缓存
+
+    hosts 为 "scheme://netloc" 列表时，为每个主机单独挂载一个连接池，
+    多个目标共用会话时各主机的连接互不挤占；gate 见 BoundedAdapter。
+    会话创建后不再挂载适配器，可以在多个线程中共用。
+    """
+    import requests
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive'
+    })
+    adapter = create_adapter(http_cache, gate, pool_connections=max(10, len(hosts)),
+                             pool_maxsize=max(10, concurrency))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    for host in hosts:
+        session.mount(host + '/', create_adapter(http_cache, gate, pool_connections=1,
+                                                 pool_maxsize=max(10, concurrency)))
+    return session
+
+def download_js_files(js_urls, store, session, referer, limiter=None,
+                      concurrency=DEFAULT_CONCURRENCY, label="正在下载", transform=None, journal=None):
+    """并发下载一批JS文件，跳过存储中已有的URL，返回新内容的文件路径列表
+
+    给出 journal（ProgressJournal）时，中断前本轮已下载的文件直接沿用，新下载的文件记入其中。
+    """
+    js_urls = list(js_urls)
+    saved_files = []
+    pending = []
+    for url in js_urls:
+        recorded = journal.script(url) if journal is not None else None
+        if recorded is not None:
+            saved_files.append(recorded)
+        elif not store.has_url(url):
+            pending.append(url)
+    if saved_files:
+        print(f"⏭️ 沿用中断前已下载的 {len(saved_files)} 个JS文件")
+    if len(pending) + len(saved_files) < len(js_urls):
+        print(f"⏭️ 跳过 {len(js_urls) - len(pending) - len(saved_files)} 个已下载过的JS文件")
+    download = lambda js_url: save_js_file(js_url, store, session, referer, limiter, transform)
+    for i, (js_url, saved_path) in enumerate(run_concurrently(download, pending, concurrency), 1):
+        progress(f"📥 {label} ({i}/{len(pending)}): {js_url}")
+        if saved_path:
+            saved_files.append(saved_path)
+            if journal is not None:
+                journal.script_done(js_url, saved_path)
+    store.save()
+    return saved_files
+
+# ================== 运行时清单发现 ==================
+def is_source_map_url(url):
+    return urlparse(url).path.endswith('.map')
+
+def discover_referenced_scripts(files, store, session, base_url, limiter=None,
+                                concurrency=DEFAULT_CONCURRENCY, planner=None, journal=None):
+    """从已下载脚本的打包器运行时、动态导入和 sourceMappingURL 直接计算要下载的文件
+
+    新下载的 chunk 会继续被分析，直到不再发现新文件；source map 只保存其中的原始源码。
+    journal 同 download_js_files。返回新内容的文件路径列表。
+    """
+    planner = planner or FetchPlanner()
+    saved_files = []
+    pending = list(files)
+    while pending:
+        file_urls = store.file_urls()
+        chunk_urls, map_urls = set(), set()
+        for filepath in pending:
+            # source map 还原出的源码不是打包产物，不再分析
+            script_urls = [url for url in file_urls.get(filepath, []) if not is_source_map_url(url)]
+            if not script_urls:
+                continue
+            try:
+                with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError as e:
+                print(f"⚠️ 无法读取文件 {filepath}: {e}")
+                continue
+            for script_url in script_urls:
+                chunks, maps, inline_maps = discover_references(content, script_url, base_url)
+                chunk_urls |= chunks
+                map_urls.update(maps)
+                for data in inline_maps:
+                    sources = sources_from_map(data)
+                    if sources is not None:
+                        map_url = f"{script_url}.map"
+                        filepath_map, is_new = store.put(map_url, sources)
+                        if is_new:
+                            progress(f"✅ 保存内联 source map 源码: {os.path.basename(filepath_map)}")
+                            saved_files.append(filepath_map)
+                            if journal is not None:
+                                journal.script_done(map_url, filepath_map)
+                        elif journal is not None and journal.script(map_url) is not None:
+                            saved_files.append(filepath_map)
+
+        chunk_urls = planner.plan(url for url in chunk_urls if needs_download(url, store, journal))
+        map_urls = planner.plan(url for url in map_urls if needs_download(url, store, journal))
+        if chunk_urls or map_urls:
+            print(f"\n🧩 从运行时清单发现 {len(chunk_urls)} 个chunk、{len(map_urls)} 个source map")
+        pending = download_js_files(chunk_urls, store, session, base_url, limiter, concurrency,
+                                    label="正在下载chunk", journal=journal)
+        saved_files.extend(pending)
+        saved_files.extend(download_js_files(map_urls, store, session, base_url, limiter, concurrency,
+                                             label="正在下载source map", transform=sources_from_map,
+                                             journal=journal))
+    store.save()
+    return saved_files
+
+# ================== 断点续爬 ==================
+def crawl_state(target_url, iteration, frontier, planner, cache, initial_files, all_new_files):
+    """汇总发现循环的状态用于写入检查点"""
+    return {
+        "target_url": target_url,
+        "iteration": iteration,
+        "frontier": frontier.state(),
+        "planner": planner.state(),
+        "file_digests": dict(cache.file_digests),
+        "initial_files": list(initial_files),
+        "all_new_files": list(all_new_files),
+    }
+
+class ProgressJournal:
+    """一轮发现（分轮模式的一次循环或整个流水线）内的进度：已完成的页面及其JS链接、本轮下载的文件
+
+    每完成 JOURNAL_EVERY 个请求或距上次写入超过 JOURNAL_INTERVAL 秒时调用 save(进度) 写入检查点，
+    检查点中的其余状态保持本轮开始时的样子。恢复时重做这一轮：已完成的页面不再请求，
+    本轮已下载的文件从磁盘读取后交给本轮的分析，新路径因此仍按原来的轮次（深度）进入抓取边界。
+    """
+
+    def __init__(self, save, state=None):
+        self.save = save
+        state = state or {}
+        self.pages = dict(state.get("pages", {}))  # 页面URL -> JS链接列表
+        self.scripts = {url: path for url, path in state.get("scripts", {}).items()
+                        if os.path.exists(path)}   # 规范化URL -> 文件路径
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.completed = 0
+        self.flushed_at = time.monotonic()
+
+    def page(self, url):
+        """已完成页面的JS链接，未完成时返回 None"""
+        with self.lock:
+            return self.pages.get(canonicalize_url(url))
+
+    def script(self, url):
+        """本轮已下载的文件路径，未下载时返回 None"""
+        with self.lock:
+            return self.scripts.get(canonicalize_url(url))
+
+    def files(self):
+        with self.lock:
+            return list(self.scripts.values())
+
+    def page_done(self, url, js_links):
+        with self.lock:
+            self.pages[canonicalize_url(url)] = list(js_links)
+        self._completed()
+
+    def script_done(self, url, filepath):
+        with self.lock:
+            self.scripts[canonicalize_url(url)] = filepath
+        self._completed()
+
+    def _completed(self):
+        with self.lock:
+            self.completed += 1
+            now = time.monotonic()
+            due = self.completed >= JOURNAL_EVERY or now - self.flushed_at >= JOURNAL_INTERVAL
+            if due:
+                self.completed = 0
+                self.flushed_at = now
+        if due:
+            self.flush()
+
+    def flush(self):
+        """立即写入检查点"""
+        with self.lock:
+            state = {"pages": dict(self.pages), "scripts": dict(self.scripts)}
+        with self.flush_lock:
+            self.save(state)
+
+def needs_download(url, store, journal=None):
+    """URL 尚未下载，或者是中断前本轮下载的（需要重新交给本轮的分析）"""
+    return not store.has_url(url) or (journal is not None and journal.script(url) is not None)
+
+def fetch_js_links(url, fetch, journal=None):
+    """返回页面中的JS链接：journal 中已完成的页面直接使用记录，否则调用 fetch(url) 请求并记录"""
+    if journal is not None:
+        links = journal.page(url)
+        if links is not None:
+            return links
+    links = fetch(url)
+    if journal is not None:
+        journal.page_done(url, links)
+    return links
+
+# ================== 第一部分：下载原始JS文件 ==================
+def download_initial_js_files(base_url, store, limiter=None, concurrency=DEFAULT_CONCURRENCY,
+                              planner=None, extractor=None, http_cache=None, session=None):
+    """下载目标页面所有JS文件（未给出 session 时新建会话，失败时关闭新建的会话）"""
+    own_session = session is None
+    session = session or create_session(concurrency, http_cache)
+    planner = planner or FetchPlanner()
+    
+    downloaded_files = []
+    
+    try:
+        # 获取主页面JS链接
+        planner.plan([base_url])
+        js_links = planner.plan(extract_js_links(base_url, session, limiter, extractor=extractor))
+        
+        # 并发下载JS文件
+        downloaded_files = download_js_files(js_links, store, session, base_url,
+                                             limiter, concurrency)
+        
+        print(f"\n🎉 原始JS文件下载完成! 成功保存 {len(downloaded_files)}/{len(js_links)} 个文件")
+        return downloaded_files, session
+
+    except Exception as e:
+        print(f"⚠️ 发生错误: {str(e)}")
+        if own_session:
+            session.close()
+        return downloaded_files, None
+
+# ================== 第三部分：构造并请求新URL ==================
+def construct_path_urls(base_url, path):
+    """为一个路径构造两种URL，返回 (直接连接URL, #连接URL)"""
+    # 解析基础URL
+    parsed_base = urlparse(base_url)
+    base_domain = f"{parsed_base.scheme}://{parsed_base.netloc}"
+    
+    # 直接连接格式: https://domain.com/path（无法拼接的路径原样保留，请求时单独失败）
+    direct_url = join_url(base_domain, path) or path
+    
+    # #连接格式: https://domain.com/#/path
+    hash_path = path[1:] if path.startswith("#") else path
+    if not hash_path.startswith("/"):
+        hash_path = "/" + hash_path
+    hash_url = urlunparse((
+        parsed_base.scheme,
+        parsed_base.netloc,
+        parsed_base.path,
+        parsed_base.params,
+        parsed_base.query,
+        hash_path
+    ))
+    return direct_url, hash_url
+
+def construct_and_request_urls(base_url, paths, session, store,
+                               limiter=None, concurrency=DEFAULT_CONCURRENCY, planner=None,
+                               extractor=None, journal=None):
+    """构造两种URL格式，经请求规划去重后并发请求页面并下载新JS文件
+
+    给出 journal（ProgressJournal）时跳过中断前已完成的页面，并随时记录新完成的页面和下载。
+    """
+    # 构造两种URL
+    direct_urls = []
+    hash_urls = []
+    
+    for path in paths:
+        direct_url, hash_url = construct_path_urls(base_url, path)
+        direct_urls.append(direct_url)
+        hash_urls.append(hash_url)
+    
+    print(f"\n🔗 构造了 {len(direct_urls)} 个直接连接URL")
+    print(f"🔗 构造了 {len(hash_urls)} 个#连接URL")
+    
+    # 规范化并去重：片段不会发往服务器，已请求过的URL本次运行不再请求
+    planner = planner or FetchPlanner()
+    deduplicated_before = planner.deduplicated
+    direct_urls = planner.plan(direct_urls)
+    hash_urls = planner.plan_hash_routes(hash_urls)
+    print(f"🧭 实际需要请求: 直接连接 {len(direct_urls)} 个，#连接 {len(hash_urls)} 个"
+          f"（去重 {planner.deduplicated - deduplicated_before} 个）")
+    
+    # 用于存储所有新发现的JS链接
+    all_new_js_links = set()
+    
+    # 请求速率由每个主机的令牌桶控制，并发数由线程池大小控制
+    # 页面解析由 extractor 在进程池中完成，不占用抓取线程
+    fetch = lambda url: fetch_js_links(
+        url, lambda page: extract_js_links(page, session, limiter, extractor=extractor), journal)
+    render = lambda url: fetch_js_links(
+        url, lambda page: extract_js_links(page, session, limiter, planner.renderer, extractor), journal)
+    
+    # 请求所有直接连接URL
+    print("\n🌐 开始请求直接连接URL...")
+    with METRICS.stage("请求页面"):
+        for i, (url, js_links) in enumerate(run_concurrently(fetch, direct_urls, concurrency), 1):
+            progress(f"🔍 已处理直接连接 ({i}/{len(direct_urls)}): {url}")
+            all_new_js_links.update(js_links)
+    
+    # 请求所有#连接URL
+    print("\n🌐 开始请求#连接URL...")
+    with METRICS.stage("请求页面"):
+        for i, (url, js_links) in enumerate(run_concurrently(render, hash_urls, concurrency), 1):
+            progress(f"🔍 已处理#连接 ({i}/{len(hash_urls)}): {url}")
+            all_new_js_links.update(js_links)
+    
+    all_new_js_links = planner.plan(all_new_js_links)
+    print(f"\n🔍 总共发现 {len(all_new_js_links)} 个新的JS文件链接")
+    
+    # 并发下载新发现的JS文件
+    with METRICS.stage("下载新JS"):
+        new_files = download_js_files(all_new_js_links, store, session, base_url,
+                                      limiter, concurrency, label="正在下载新JS文件", journal=journal)
+    
+    print(f"\n🎉 新JS文件下载完成! 成功保存 {len(new_files)}/{len(all_new_js_links)} 个文件")
+    return new_files
+
+# ================== 流水线模式 ==================
+class CrawlPipeline:
+    """流水线式发现：页面抓取、JS下载与内容分析同时进行
+
+    JS 内容下载后直接放入有界队列交给分析进程池，不再从磁盘读回；分析出的新路径
+    立即进入抓取边界，新发现的 chunk 和 source map 立即进入下载。分析队列满时
+    下载线程阻塞等待，内存中待分析的内容数量因此受 queue_size 限制。
+    路径深度与分轮模式的循环次数对应，超过 max_depth 的路径不再请求。每个页面和脚本记录到达它的最小深度，
+    与请求完成的先后无关：较晚发现的更短路径会把深度改小，并按新深度重新传播已得到的结果。
+    给出 journal（ProgressJournal）时记录完成的页面和下载，恢复后已完成的页面不再请求，
+    已下载的脚本从磁盘读取后重新交给分析。
+    """
+
+    def __init__(self, base_url, session, store, cache, frontier, planner, limiter=None,
+                 extractor=None, concurrency=DEFAULT_CONCURRENCY, analysis_workers=1,
+                 queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, max_depth=5, journal=None):
+        self.base_url = base_url
+        self.session = session
+        self.store = store
+        self.cache = cache
+        self.frontier = frontier
+        self.planner = planner
+        self.limiter = limiter
+        self.extractor = extractor
+        self.max_depth = max_depth
+        self.journal = journal
+        self.network = ThreadPoolExecutor(max_workers=concurrency)
+        self.analysis_queue = queue.Queue(maxsize=queue_size)
+        self.analysis_workers = analysis_workers or os.cpu_count() or 1
+        self.pool = None
+        # 限制已提交到分析进程池但尚未完成的数量
+        self.slots = threading.Semaphore(self.analysis_workers * 2)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition()
+        self.outstanding = 0
+        self.new_files = []
+        # 节点为 ("path", 抓取边界的键) 或 ("script", 规范化URL)
+        self.depths = {}     # 节点 -> 最小深度
+        self.started = set() # 已开始处理的节点
+        self.results = {}    # 已处理完的节点 -> (路径, 脚本, source map, 内联 source map)
+        self.earlier = set() # 流水线开始前已访问的路径键
+        self.error = None    # 分析调度线程中的异常，出现后流水线停止
+        self.depth_reached = 0
+        self.pages = self.downloads = self.analyzed = self.cached = 0
+
+    # ---- 任务计数：所有已提交任务完成时流水线结束 ----
+    def _begin(self):
+        with self.idle:
+            self.outstanding += 1
+
+    def _end(self):
+        with self.idle:
+            self.outstanding -= 1
+            if self.outstanding == 0:
+                self.idle.notify_all()
+
+    def _submit(self, func, *args):
+        if self.error is not None:
+            return
+        self._begin()
+        def task():
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"⚠️ 流水线任务失败: {e}")
+            finally:
+                self._end()
+        self.network.submit(task)
+
+    # ---- 深度：只在首次到达或深度变小时处理节点 ----
+    def _reach(self, nodes, depth):
+        """记录节点的最小深度（调用方持有 self.lock），返回 (需要开始处理的节点, 需要按新深度重新传播的结果)"""
+        start, known = [], []
+        for node in nodes:
+            old = self.depths.get(node)
+            if old is not None and old <= depth:
+                continue
+            self.depths[node] = depth
+            if depth > self.max_depth:
+                continue
+            if node not in self.started:
+                self.started.add(node)
+                start.append(node)
+            elif node in self.results:
+                known.append(self.results[node])
+        return start, known
+
+    def _propagate(self, results, depth):
+        """把一个节点的结果交给下一步：脚本中的路径深度加一，页面中的脚本、chunk 和 source map 深度不变"""
+        paths, scripts, map_urls, inline_maps = results
+        if paths:
+            self.add_paths(paths, depth + 1)
+        if scripts:
+            self.add_scripts(scripts, depth)
+        if map_urls:
+            self.add_scripts(map_urls, depth, transform=sources_from_map)
+        if inline_maps:
+            self._add_inline_maps(inline_maps, depth)
+
+    def _complete(self, node, results):
+        """记录节点的结果并按当前（可能已变小的）深度传播"""
+        with self.lock:
+            self.results[node] = results
+            depth = self.depths[node]
+        self._propagate(results, depth)
+
+    # ---- 抓取阶段 ----
+    def add_paths(self, paths, depth):
+        """把路径加入抓取边界，未超过最大深度时请求"""
+        with self.lock:
+            keys = [self.frontier.key(path) for path in paths]
+            self.frontier.add_keys(keys)
+        self._add_keys(keys, depth)
+
+    def _add_keys(self, keys, depth):
+        with self.lock:
+            nodes = [("path", key) for key in dict.fromkeys(keys)
+                     if key is not None and key not in self.earlier]
+            start, known = self._reach(nodes, depth)
+            for node in start:
+                self.frontier.visit(node[1])
+        for node in start:
+            self._submit(self._fetch_path, node)
+        for results in known:
+            self._propagate(results, depth)
+
+    def _fetch_path(self, node):
+        with self.lock:
+            path = self.frontier.path(node[1])
+        direct_url, hash_url = construct_path_urls(self.base_url, path)
+        scripts = []
+        fetch = lambda url: extract_js_links(url, self.session, self.limiter, extractor=self.extractor)
+        render = lambda url: extract_js_links(url, self.session, self.limiter, self.planner.renderer,
+                                              self.extractor)
+        try:
+            for url in self.planner.plan([direct_url]):
+                scripts.extend(fetch_js_links(url, fetch, self.journal))
+            for url in self.planner.plan_hash_routes([hash_url]):
+                scripts.extend(fetch_js_links(url, render, self.journal))
+        finally:
+            with self.lock:
+                self.pages += 1
+            self._complete(node, ((), scripts, (), ()))
+
+    def add_scripts(self, urls, depth, transform=None):
+        """下载尚未请求过的脚本；已分析过的脚本深度变小时重新传播其结果"""
+        with self.lock:
+            start, known = self._reach([("script", canonicalize_url(url)) for url in urls], depth)
+        for url in self.planner.plan(node[1] for node in start
+                                     if needs_download(node[1], self.store, self.journal)):
+            self._submit(self._download, url, transform)
+        for results in known:
+            self._propagate(results, depth)
+
+    def _download(self, url, transform):
+        filepath = self.journal.script(url) if self.journal is not None else None
+        if filepath is not None:
+            # 中断前已下载，从磁盘读回后重新分析
+            with open(filepath, 'rb') as f:
+                content = f.read()
+        else:
+            filepath, content = download_js_content(url, self.store, self.session, self.base_url,
+                                                    self.limiter, transform)
+            if filepath is None:
+                return
+            if self.journal is not None:
+                self.journal.script_done(url, filepath)
+        with self.lock:
+            self.downloads += 1
+            self.new_files.append(filepath)
+        # source map 还原出的源码只提取路径，不再做 chunk 发现
+        self._enqueue(filepath, url, content, ("script", url), transform is None)
+
+    def _add_inline_maps(self, inline_maps, depth):
+        """inline_maps 为 [(URL, 源码)]；重新传播时源码为 None，只更新深度"""
+        sources = {("script", canonicalize_url(url)): data for url, data in inline_maps}
+        with self.lock:
+            start, known = self._reach(list(sources), depth)
+        for node in start:
+            if sources[node] is not None:
+                self._submit(self._save_inline_map, node, sources[node])
+        for results in known:
+            self._propagate(results, depth)
+
+    def _enqueue(self, filepath, url, content, node, discover):
+        """放入分析队列；队列满时阻塞，形成反压"""
+        if self.error is not None:
+            return
+        self._begin()
+        self.analysis_queue.put((filepath, url, content, node, discover))
+
+    # ---- 分析阶段 ----
+    def _dispatch(self):
+        """从分析队列取出内容交给 _analyze；调度出错时记录异常并唤醒 run()，之后只清空队列"""
+        while True:
+            item = self.analysis_queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                self._end()
+                continue
+            try:
+                analyzed = self._analyze(item)
+            except Exception as e:
+                # 例如分析进程崩溃后 pool.submit 抛出 BrokenProcessPool
+                print(f"❌ 分析调度失败，停止流水线: {e}")
+                with self.idle:
+                    self.error = e
+                    self.idle.notify_all()
+                self._end()
+                continue
+            if analyzed is not None:
+                self._finish(item, *analyzed)
+
+    def _analyze(self, item):
+        """把一项内容交给分析进程池，返回 None；不需要进程池时直接返回 (摘要, 分析结果)"""
+        filepath, url, content, _, discover = item
+        digest = hashlib.sha256(content).hexdigest()
+        fingerprint = FINGERPRINTS.identify_content(content, digest)
+        digest = cache_key(digest, fingerprint)
+        extract = digest not in self.cache.entries
+        if extract and fingerprint is not None:
+            report_vendor(filepath, fingerprint)
+        if fingerprint is not None and fingerprint.action == SKIP:
+            return digest, ({"paths": [], "final": {}} if extract else None, set(), [], [])
+        if not extract and not discover:
+            return digest, (None, set(), [], [])
+        reduced = fingerprint is not None
+        if self.pool is None:
+            try:
+                result = analyze_downloaded_script(content, url, self.base_url, extract, discover, reduced)
+            except Exception as e:
+                print(f"⚠️ 分析失败 {filepath}: {e}")
+                result = None
+            return digest, result
+        self.slots.acquire()
+        try:
+            if METRICS.enabled:
+                # 分析进程把指标连同结果一起交回
+                future = self.pool.submit(metered, analyze_downloaded_script, content, url,
+                                          self.base_url, extract, discover, reduced)
+            else:
+                future = self.pool.submit(analyze_downloaded_script, content, url, self.base_url,
+                                          extract, discover, reduced)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f, item=item, digest=digest: self._on_analyzed(f, item, digest))
+        return None
+
+    def _on_analyzed(self, future, item, digest):
+        self.slots.release()
+        try:
+            result = future.result()
+            if METRICS.enabled:
+                result, snapshot = result
+                METRICS.merge(snapshot)
+        except Exception as e:
+            print(f"⚠️ 分析失败 {item[0]}: {e}")
+            result = None
+        self._finish(item, digest, result)
+
+    def _finish(self, item, digest, result):
+        """合并分析结果，把路径和新脚本反馈给抓取阶段"""
+        filepath, url, _, node, _ = item
+        try:
+            if result is None:
+                return
+            entry, chunks, map_urls, inline_maps = result
+            with self.lock:
+                if entry is not None:
+                    self.analyzed += 1
+                else:
+                    self.cached += 1
+                self.cache.add_entry(filepath, digest, entry)
+                paths = self.cache.entries[digest]["paths"]
+            sources = (sources_from_map(data) for data in inline_maps)
+            inline = [(f"{url}.map", data) for data in sources if data is not None]
+            # 只保留内联 source map 的URL，重新传播时不需要源码
+            with self.lock:
+                self.results[node] = (paths, chunks, map_urls, [(map_url, None) for map_url, _ in inline])
+                depth = self.depths[node]
+            self._propagate((paths, chunks, map_urls, inline), depth)
+        finally:
+            self._end()
+
+    def _save_inline_map(self, node, sources):
+        url = node[1]
+        filepath, is_new = self.store.put(url, sources)
+        if is_new:
+            progress(f"✅ 保存内联 source map 源码: {os.path.basename(filepath)}")
+            if self.journal is not None:
+                self.journal.script_done(url, filepath)
+        elif self.journal is None or self.journal.script(url) is None:
+            return
+        with self.lock:
+            self.new_files.append(filepath)
+        self._enqueue(filepath, url, sources, node, False)
+
+    def run(self):
+        """从抓取边界中的路径开始运行，直到没有待处理的任务，返回新内容的文件路径列表
+
+        分析调度失败（如分析进程崩溃）时停止流水线，保存已下载的内容后重新抛出该异常。
+        """
+        if self.analysis_workers > 1:
+            if METRICS.enabled:
+                self.pool = ProcessPoolExecutor(self.analysis_workers, initializer=init_worker,
+                                                initargs=(METRICS.quiet,))
+            else:
+                self.pool = ProcessPoolExecutor(self.analysis_workers)
+        dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        dispatcher.start()
+        try:
+            with self.lock:
+                self.earlier = set(self.frontier.visited)
+                keys = self.frontier.next_keys()
+            self._add_keys(keys, 1)
+            with self.idle:
+                while self.outstanding and self.error is None:
+                    self.idle.wait()
+        finally:
+            # 先停止网络任务（调度线程仍在消费队列，放入队列的任务不会阻塞），再停止调度线程
+            self.network.shutdown(cancel_futures=True)
+            self.analysis_queue.put(None)
+            dispatcher.join()
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+            self.store.save()
+            self.cache.save()
+        if self.error is not None:
+            raise self.error
+        self.depth_reached = max((depth for node, depth in self.depths.items()
+                                  if node[0] == "path" and node in self.started), default=0)
+        print(f"\n🚰 流水线完成! 请求页面 {self.pages} 个，下载新JS {self.downloads} 个，"
+              f"分析 {self.analyzed} 个（命中缓存 {self.cached} 个），最大深度 {self.depth_reached}")
+        print(f"📊 累计 {len(self.cache.paths)} 个唯一路径")
+        return self.new_files
+
+# ================== 完整流程 ==================
+def crawl(target_url, api_js_directory, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE_LIMIT, burst=1,
+          html_parser="auto", parse_workers=0, http_cache_size=DEFAULT_HTTP_CACHE_SIZE, probe=True,
+          api_first=False, resume=False, pipeline=False, analysis_workers=0,
+          queue_size=DEFAULT_PIPELINE_QUEUE_SIZE, max_iterations=5, session=None, store=None, cache=None,
+          http_cache=None, limiter=None, extractor=None, db=None, normalize=True, renderer=None):
+    """下载目标站点的JS文件，循环发现路径并请求新页面，最后把分析结果写入目录下的 path.txt
+
+    resume 为真时从目录中的检查点继续，此时 target_url 可以为 None（沿用检查点中的目标）。
+    session、store、cache、http_cache、limiter、extractor 可以由调用方传入（批量模式中多个目标共用），
+    未给出时按目录和参数创建；调用方传入的对象由调用方负责关闭和保存。
+    给出 db（ResultDB）时最终分析结果同时写入数据库。
+    normalize 为真时路径按路由模板去重后请求（每个模板只请求一个代表路径），path.txt 也按模板聚合输出。
+    renderer 为JS渲染后端（如 CommandRenderer），给出时#路由用它渲染后提取JS链接，否则跳过#路由。
+    返回 {"target_url", "output_file", "initial_files", "new_files", "iterations", "paths"}，
+    初始下载失败或目标与检查点不一致时返回 None。
+    """
+    output_file = os.path.join(api_js_directory, "path.txt")
+    limiter = limiter or HostRateLimiter(rate, burst)
+    planner = FetchPlanner(renderer)
+    store = store or JsStore(api_js_directory)
+    own_extractor = extractor is None
+    extractor = extractor or LinkExtractor(html_parser, parse_workers)
+    own_session = session is None
+    own_http_cache = http_cache is None and own_session
+    if own_http_cache and http_cache_size > 0:
+        http_cache = HttpCache(api_js_directory, int(http_cache_size * 1024 * 1024))
+    close_extractor = extractor.close if own_extractor else (lambda: None)
+    
+    checkpoint = CrawlCheckpoint(api_js_directory)
+    
+    def save_checkpoint(iteration, initial_files, all_new_files):
+        """写入检查点，同时写回HTTP缓存索引（否则中断后缓存的响应体会被当作残留文件清理）"""
+        checkpoint.save(crawl_state(target_url, iteration, frontier, planner, cache,
+                                    initial_files, all_new_files))
+        if http_cache is not None:
+            http_cache.save()
+    
+    journal = None      # 当前这一轮的进度
+    round_state = None  # 检查点中被中断那一轮的进度，交给恢复后的第一轮
+    
+    def start_journal(iteration, initial_files, all_new_files, save_cache=False):
+        """记下本轮开始时的状态，之后本轮进度连同它一起写入检查点（save_cache 时同时写回分析缓存）"""
+        nonlocal round_state
+        base = crawl_state(target_url, iteration, frontier, planner, cache, initial_files, all_new_files)
+        def save(round_progress):
+            # 先写回存储和缓存的索引，检查点中记录的文件才能在恢复时找到
+            store.save()
+            if save_cache:
+                cache.save()
+            if http_cache is not None:
+                http_cache.save()
+            checkpoint.save(dict(base, round=round_progress))
+        started = ProgressJournal(save, round_state)
+        round_state = None
+        return started
+    
+    try:
+        state = checkpoint.load() if resume else None
+        if resume and state is None:
+            print("⚠️ 没有可恢复的检查点，从头开始")
+        elif not resume and checkpoint.exists():
+            print("💾 发现上次运行的检查点，可使用 --resume 从中断处继续；本次从头开始")
+        
+        # 恢复时可以沿用检查点中的目标
+        target_url = target_url or (state and state["target_url"])
+        if not target_url:
+            print("❌ 没有指定目标URL")
+            return None
+        if state and state["target_url"] != target_url:
+            print(f"❌ 检查点的目标为 {state['target_url']}，与 {target_url} 不一致")
+            return None
+        
+        cache = cache or AnalysisCache(api_js_directory)
+        frontier = CrawlFrontier(api_first, PathTrie(target_url) if normalize else None)
+        
+        if state is None:
+            # 第一步：下载原始JS文件
+            print("\n" + "="*60)
+            print("第一步：下载原始JS文件")
+            print("="*60)
+            with METRICS.stage("初始下载"):
+                initial_files, session = download_initial_js_files(target_url, store,
+                                                                         limiter, concurrency, planner, extractor,
+                                                                         http_cache, session)
+        
+            if session is None:
+                print("\n❌ 初始下载失败，程序终止")
+                return None
+        
+            # 从打包器运行时、动态导入和 source map 直接计算要下载的文件，无需逐个请求页面
+            print("\n" + "-"*50)
+            print("从运行时清单发现chunk")
+            print("-"*50)
+            with METRICS.stage("运行时清单发现"):
+                initial_files += discover_referenced_scripts(store.files(), store, session, target_url,
+                                                             limiter, concurrency, planner)
+        
+            # 第二步：初始路径分析
+            print("\n\n" + "="*60)
+            print("第二步：初始路径分析")
+            print("="*60)
+            with METRICS.stage("初始分析", profile=True):
+                cache.analyze(store.files())
+            frontier.add(cache.paths)
+        
+            # 循环控制变量
+            iteration = 1
+            all_new_files = []
+            save_checkpoint(iteration, initial_files, all_new_files)
+        else:
+            # 从检查点恢复：已请求的URL、已分析的文件和抓取边界都不再重复处理
+            session = session or create_session(concurrency, http_cache)
+            planner.restore(state["planner"])
+            frontier.restore(state["frontier"])
+            cache.restore(state["file_digests"])
+            iteration = state["iteration"]
+            initial_files = state["initial_files"]
+            all_new_files = state["all_new_files"]
+            round_state = state.get("round")
+            print(f"\n🔁 从检查点恢复: 第 {iteration} 轮，待请求路径 {len(frontier)} 个，"
+                  f"已访问路径 {len(frontier.visited)} 个，已请求URL {len(planner.seen)} 个")
+            if round_state:
+                print(f"🔁 本轮中断前已完成页面 {len(round_state['pages'])} 个，"
+                      f"已下载文件 {len(round_state['scripts'])} 个，不再重复请求")
+            # 中断前已下载但尚未分析的文件；本轮记录中的文件留给重做的这一轮分析
+            redo = {os.path.abspath(path) for path in (round_state or {}).get("scripts", {}).values()}
+            with METRICS.stage("初始分析", profile=True):
+                frontier.add(cache.analyze(path for path in store.files()
+                                           if os.path.abspath(path) not in redo))
+        
+        # 路径发现循环：每轮只请求新发现的路径，没有新路径时结束
+        if not probe:
+            print("\n⏭️ 已禁用路径探测（--no-probe），跳过路径发现循环")
+        elif not frontier:
+            print("\n⚠️ 没有待请求的路径，跳过路径发现循环")
+        elif pipeline and iteration <= max_iterations:
+            print("\n\n" + "="*60)
+            print("流水线发现")
+            print("="*60)
+            journal = start_journal(iteration, initial_files, all_new_files, save_cache=True)
+            runner = CrawlPipeline(target_url, session, store, cache, frontier, planner, limiter,
+                                   extractor, concurrency, analysis_workers, queue_size,
+                                   max_depth=max_iterations - iteration + 1, journal=journal)
+            with METRICS.stage("流水线"):
+                all_new_files.extend(runner.run())
+            iteration += runner.depth_reached
+            save_checkpoint(iteration, initial_files, all_new_files)
+            journal = None
+        # 流水线模式不再进入分轮循环
+        while (probe and not pipeline
+               and iteration <= max_iterations and frontier):
+            print(f"\n\n" + "="*60)
+            print(f"路径发现循环 #{iteration}/{max_iterations}")
+            print("="*60)
+        
+            journal = start_journal(iteration, initial_files, all_new_files)
+            paths = frontier.next_batch()
+            print(f"\n🧭 本轮待请求路径: {len(paths)} 个（已访问 {len(frontier.visited) - len(paths)} 个）")
+        
+            # 显示前5个路径作为示例
+            progress("\n📋 部分提取路径示例:")
+            for i, path in enumerate(paths[:5], 1):
+                progress(f"{i}. {path}")
+            if len(paths) > 5:
+                progress(f"... 以及另外 {len(paths)-5} 个路径")
+        
+            # 第三步：构造URL并请求新JS文件
+            print("\n" + "-"*50)
+            print("构造URL并请求新JS文件")
+            print("-"*50)
+            new_files = construct_and_request_urls(target_url, paths, session, store,
+                                                   limiter, concurrency, planner, extractor, journal)
+            with METRICS.stage("运行时清单发现"):
+                new_files += discover_referenced_scripts(new_files, store, session, target_url,
+                                                         limiter, concurrency, planner, journal)
+            all_new_files.extend(new_files)
+        
+            # 第四步：再次分析路径
+            print("\n" + "-"*50)
+            print("再次分析JS文件提取路径")
+            print("-"*50)
+            with METRICS.stage("增量分析", profile=True):
+                new_paths = cache.analyze(new_files)
+            frontier.add(new_paths)
+            print(f"📈 新增路径数: {len(new_paths)}")
+        
+            # 准备下一次迭代，并记录检查点
+            iteration += 1
+            save_checkpoint(iteration, initial_files, all_new_files)
+            journal = None
+            print(f"💾 已保存检查点: {checkpoint.path}")
+    finally:
+        if journal is not None:
+            # 中断或出错时保存本轮已完成的进度
+            journal.flush()
+        if own_session and session is not None:
+            session.close()
+        close_extractor()
+        if own_http_cache and http_cache is not None:
+            http_cache.save()
+    current_paths = set(cache.paths)
+    if normalize:
+        routes = PathTrie(target_url)
+        for path in current_paths:
+            routes.add(path)
+        current_paths = set(routes)
+    
+    # 最终路径分析
+    print("\n\n" + "="*60)
+    print("最终路径分析输出")
+    print("="*60)
+    with METRICS.stage("最终分析", profile=True):
+        final_path_analysis(api_js_directory, output_file, store.files(), cache, db, target_url, normalize)
+    
+    # 最终报告
+    print("\n\n" + "="*60)
+    print("✅ 任务完成!")
+    print("="*60)
+    print(f"📁 保存目录: {api_js_directory}")
+    print(f"📄 初始下载JS文件: {len(initial_files)} 个")
+    print(f"📄 新发现JS文件: {len(all_new_files)} 个")
+    print(f"🔄 循环次数: {iteration-1}/{max_iterations}")
+    print(f"📊 最终路径数: {len(current_paths)}")
+    planner.report()
+    if own_session and SCHEDULER.enabled:
+        SCHEDULER.report()
+    if own_http_cache and http_cache is not None:
+        http_cache.report()
+    print(f"📝 最终分析结果: {output_file}")
+    return {
+        "target_url": target_url,
+        "output_file": output_file,
+        "initial_files": initial_files,
+        "new_files": all_new_files,
+        "iterations": iteration - 1,
+        "paths": current_paths,
+    }
@@ -0,0 +1,460 @@
+"""正则提取引擎
+
+把 patterns.py 中的正则表编译成单遍扫描的组合匹配器（CombinedMatcher），大文件按块内存映射扫描；
+get( / post( 这类调用的参数由 extract_call_argument 有界地向后提取；扫描结果由 ResultSink 流式去重、
+排序并写出，结果过多时溢出到临时文件。
+"""
+import os
+import re
+import sys
+import mmap
+import heapq
+import pickle
+import tempfile
+from time import perf_counter
+
+# ================== 单遍组合匹配引擎 ==================
+# 注册表（patterns.py）的各个正则表中，绝大多数正则都以 path:/url:/get( 这类字面量开头。
+# 这里对内容做一次大小写折叠，用字面量查找建立锚点索引，再只在锚点处尝试对应的详细正则，
+# 避免每个正则各自全文扫描（尤其是没有字面量前缀、需要逐字符尝试的 Object 模式），
+# 并保持与逐个 finditer 完全相同的结果。
+
+_REGEX_META = set('.^$*+?{}[]|()')
+_QUANTIFIERS = set('*+?{')
+
+# 形如 (?i)path: 或 (?i)(get)\( 的开头
+_LEADING_WORD = re.compile(r'^(?:\(\?i\))?\(?([A-Za-z]+)\)?(:|\\\()')
+# 形如 \b[a-zA-Z][a-zA-Z0-9]*\b:\[\{ 的开头（Object 模式），需要从锚点向前回溯标识符
+_IDENT_KEY_PREFIX = r'\b[a-zA-Z][a-zA-Z0-9]*\b'
+_IDENT_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+_IDENT_BYTES = frozenset(ord(char) for char in _IDENT_CHARS)
+# 在 (?i) 下会匹配 ASCII 字母、但 str.lower() 不会折叠成 ASCII 的字符；出现时改用正则查找锚点
+_UNICODE_FOLDS = re.compile('[\u0130\u0131\u017f\u212a]')
+
+# 大文件按块扫描：每块的匹配可以延伸到下一块的重叠区内
+CHUNK_SIZE = 8 * 1024 * 1024
+CHUNK_OVERLAP = 64 * 1024
+
+
+def _leading_literal(source):
+    """返回正则源码开头的纯字面量部分"""
+    literal = []
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            if i + 1 >= len(source) or source[i + 1].isalnum():
+                break
+            char = source[i + 1]
+            step = 2
+        elif char in _REGEX_META:
+            break
+        else:
+            step = 1
+        # 后面跟着量词时，这个字符不是必需的
+        if i + step < len(source) and source[i + step] in _QUANTIFIERS:
+            break
+        literal.append(char)
+        i += step
+    return ''.join(literal)
+
+
+def pattern_anchor(pattern):
+    """返回 (锚点字面量, 是否需要回溯标识符)；无法确定锚点时返回 (None, False)
+
+    忽略大小写的正则返回小写锚点，区分大小写的正则保留原样。
+    """
+    source = pattern.pattern
+    ignorecase = bool(pattern.flags & re.IGNORECASE)
+    if source.startswith(_IDENT_KEY_PREFIX):
+        literal = _leading_literal(source[len(_IDENT_KEY_PREFIX):])
+        literal = literal.lower() if ignorecase else literal
+        return (literal or None), True
+    match = _LEADING_WORD.match(source)
+    if match:
+        literal = match.group(1) + (':' if match.group(2) == ':' else '(')
+        return (literal.lower() if ignorecase else literal), False
+    return None, False
+
+
+def _compile_bytes(pattern):
+    """把 str 正则编译为等价的字节正则（re 与 regex 模块均可）"""
+    module = sys.modules['regex'] if type(pattern).__module__ == '_regex' else re
+    return module.compile(pattern.pattern.encode('utf-8'), pattern.flags & ~re.UNICODE)
+
+
+def decode_span(value):
+    """解码匹配到的字节片段，无效字节替换为 U+FFFD 而不是中断整个文件"""
+    if isinstance(value, str):
+        return value
+    return value.decode('utf-8', errors='replace')
+
+
+class CombinedMatcher:
+    """把一个 pattern_groups 表编译为单遍扫描的提取引擎
+
+    表项可以是 (pattern, label, group_idx) 或 (pattern, label)；
+    后者按 findall 的语义取第 1 个捕获组（没有捕获组时取整个匹配）。
+    iter_matches 产出 (分组, 标签, 捕获组序号, match)，与对每个正则分别
+    finditer 得到的匹配集合相同（同一正则的匹配按位置排列）。
+    内容可以是 str，也可以是 bytes/mmap 等字节缓冲区（此时使用字节版本的正则，
+    匹配结果为字节，可用 decode_span 解码）。
+    enable_stats 开启后统计每个正则的尝试次数、命中数和匹配耗时。
+    """
+
+    def __init__(self, pattern_groups):
+        self.entries = []        # (分组, pattern, 字节pattern, 标签, 捕获组序号, 是否回溯标识符)
+        self.fallback = []       # 无法确定锚点的表项下标，单独扫描
+        self.by_anchor = {}      # (锚点, 是否忽略大小写) -> 表项下标列表
+        for group, patterns in pattern_groups.items():
+            for item in patterns:
+                pattern, label = item[0], item[1]
+                group_idx = item[2] if len(item) > 2 else (1 if pattern.groups else 0)
+                literal, backtrack = pattern_anchor(pattern)
+                index = len(self.entries)
+                self.entries.append((group, pattern, _compile_bytes(pattern), label, group_idx, backtrack))
+                if literal is None:
+                    self.fallback.append(index)
+                else:
+                    anchor = (literal, bool(pattern.flags & re.IGNORECASE))
+                    self.by_anchor.setdefault(anchor, []).append(index)
+        self.anchor_bytes = {anchor: anchor[0].encode('utf-8') for anchor in self.by_anchor}
+        self.max_anchor_len = max((len(literal) for literal in self.anchor_bytes.values()), default=0)
+        self.anchor_patterns = {
+            anchor: re.compile(f'(?i)(?={re.escape(anchor[0])})')
+            for anchor in self.by_anchor if anchor[1]
+        }
+        self.stats = None        # 表项下标 -> [命中, 尝试, 秒]；最后一项为建立锚点索引的耗时
+
+    def enable_stats(self, enabled=True):
+        """开启或关闭逐个正则的计时统计（关闭时不产生额外开销）"""
+        if not enabled:
+            self.stats = None
+        elif self.stats is None:
+            self.stats = [[0, 0, 0.0] for _ in range(len(self.entries) + 1)]
+
+    def take_stats(self):
+        """返回并清零统计 {"分组/标签": [命中, 尝试, 秒]}，标签为空时用正则源码代替"""
+        stats = self.stats
+        if stats is None:
+            return {}
+        self.stats = [[0, 0, 0.0] for _ in stats]
+        result = {}
+        for (group, pattern, _, label, _, _), values in zip(self.entries, stats):
+            key = f"{group}/{label or pattern.pattern}"
+            total = result.setdefault(key, [0, 0, 0.0])
+            for i, value in enumerate(values):
+                total[i] += value
+        if stats[-1][1]:
+            result["(锚点索引)"] = stats[-1]
+        return result
+
+    def anchor_index(self, content, pos=0, endpos=None):
+        """返回 {锚点: [位置, ...]}，位置为 content 中的绝对偏移"""
+        if endpos is None:
+            endpos = len(content)
+        is_text = isinstance(content, str)
+        index = {anchor: [] for anchor in self.by_anchor}
+        folded = None
+        if self.anchor_patterns:
+            # 字节内容的 lower() 只折叠 ASCII，长度不变
+            folded = content[pos:endpos].lower()
+            if is_text and (len(folded) != endpos - pos or _UNICODE_FOLDS.search(content, pos, endpos)):
+                # 极少见的 Unicode 大小写折叠情况，退回与 (?i) 语义一致的正则查找
+                for anchor, pattern in self.anchor_patterns.items():
+                    index[anchor].extend(hit.start() for hit in pattern.finditer(content, pos, endpos))
+                folded = None
+        for anchor, positions in index.items():
+            literal = anchor[0] if is_text else self.anchor_bytes[anchor]
+            if anchor[1]:
+                if folded is None:
+                    continue
+                at = folded.find(literal)
+                while at != -1:
+                    positions.append(pos + at)
+                    at = folded.find(literal, at + 1)
+            else:
+                at = content.find(literal, pos, endpos)
+                while at != -1:
+                    positions.append(at)
+                    at = content.find(literal, at + 1, endpos)
+        return index
+
+    def _backtrack_start(self, content, pos, limit):
+        """从锚点向前找到紧邻的 ASCII 标识符的起点"""
+        ident = _IDENT_CHARS if isinstance(content, str) else _IDENT_BYTES
+        start = pos
+        while start > limit and content[start - 1] in ident:
+            start -= 1
+        return start
+
+    def iter_matches(self, content, pos=0, endpos=None, stop=None, state=None):
+        """扫描 content，产出 (分组, 标签, 捕获组序号, match)
+
+        只产出起点锚点位于 [pos, stop) 内的匹配（stop 默认为 endpos），
+        匹配本身可以延伸到 endpos。分块扫描时通过同一个 state 在块之间
+        保持每个正则的不重叠约束。
+        """
+        if endpos is None:
+            endpos = len(content)
+        if stop is None:
+            stop = endpos
+        if state is None:
+            state = [0] * len(self.entries)
+        is_text = isinstance(content, str)
+        stats = self.stats
+        if stats is not None:
+            began = perf_counter()
+        # 锚点可能跨越 stop，查找范围多留出锚点长度
+        index = self.anchor_index(content, pos, min(endpos, stop + self.max_anchor_len))
+        if stats is not None:
+            stats[-1][1] += 1
+            stats[-1][2] += perf_counter() - began
+        for anchor, positions in index.items():
+            for entry_index in self.by_anchor[anchor]:
+                group, pattern, bytes_pattern, label, group_idx, backtrack = self.entries[entry_index]
+                if not is_text:
+                    pattern = bytes_pattern
+                for at in positions:
+                    if at >= stop:
+                        break
+                    start = self._backtrack_start(content, at, 0) if backtrack else at
+                    if start < state[entry_index]:
+                        continue
+                    if stats is None:
+                        match = pattern.match(content, start, endpos)
+                    else:
+                        began = perf_counter()
+                        match = pattern.match(content, start, endpos)
+                        stat = stats[entry_index]
+                        stat[1] += 1
+                        stat[2] += perf_counter() - began
+                        if match:
+                            stat[0] += 1
+                    if match:
+                        state[entry_index] = max(match.end(), start + 1)
+                        yield group, label, group_idx, match
+
+        for entry_index in self.fallback:
+            group, pattern, bytes_pattern, label, group_idx, _ = self.entries[entry_index]
+            if not is_text:
+                pattern = bytes_pattern
+            matches = pattern.finditer(content, max(pos, state[entry_index]), endpos)
+            while True:
+                if stats is None:
+                    match = next(matches, None)
+                else:
+                    began = perf_counter()
+                    match = next(matches, None)
+                    stat = stats[entry_index]
+                    stat[1] += 1
+                    stat[2] += perf_counter() - began
+                if match is None or match.start() >= stop:
+                    break
+                if stats is not None:
+                    stat[0] += 1
+                state[entry_index] = max(match.end(), match.start() + 1)
+                yield group, label, group_idx, match
+
+    def iter_file(self, file_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+        """内存映射文件并按块扫描，产出字节匹配 (分组, 标签, 捕获组序号, match)
+
+        match 引用映射内存，应在迭代过程中及时取出所需内容，不要长期保存。
+
+        每块只产出起点在块内的匹配，匹配可以延伸到后面 overlap 字节的重叠区，
+        因此跨块边界的匹配不会丢失；超过重叠区长度的匹配会被截断而匹配失败。
+        已扫描过的块会通知内核释放，峰值内存与文件大小无关。
+        """
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                state = [0] * len(self.entries)
+                for start in range(0, size, chunk_size):
+                    stop = min(start + chunk_size, size)
+                    yield from self.iter_matches(mapped, start, min(stop + overlap, size), stop, state)
+                    _release(mapped, start, stop)
+            finally:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # 调用方仍持有引用映射的 match 对象，交给垃圾回收关闭
+
+
+def _release(mapped, start, stop):
+    """通知内核丢弃已扫描块的页面（不支持 madvise 的平台上忽略）"""
+    if not hasattr(mapped, 'madvise') or not hasattr(mmap, 'MADV_DONTNEED'):
+        return
+    aligned = start - start % mmap.PAGESIZE
+    try:
+        mapped.madvise(mmap.MADV_DONTNEED, aligned, stop - aligned)
+    except (OSError, ValueError):
+        pass
+
+
+# ================== 有界的调用参数提取 ==================
+# 表项的捕获组序号为 CALL_ARGUMENT 时，正则只匹配 get( / post( 这样的调用开头，
+# 参数由 extract_call_argument 向后扫描得到：遇到第一个字符串字面量即停止，
+# 同时限制括号嵌套深度和扫描长度，避免在压缩后的超长行上无限制地回溯。
+# 原来的递归正则要求嵌套的括号本身也是 get( 调用；这里对任意括号计数，
+# 所以 a.get(Object(c.d)("/api/x")) 这类参数中包含其他调用的写法也会提取出字符串。
+CALL_ARGUMENT = -1
+CALL_MAX_DEPTH = 32
+CALL_MAX_SPAN = 4096
+
+_CALL_TOKENS = re.compile(r'[\'"()]')
+_CALL_TOKENS_BYTES = re.compile(rb'[\'"()]')
+_STRING_BODIES = {
+    '"': re.compile(r'((?:[^"\\]|\\.)*)"', re.DOTALL),
+    "'": re.compile(r"((?:[^'\\]|\\.)*)'", re.DOTALL),
+    ord('"'): re.compile(rb'((?:[^"\\]|\\.)*)"', re.DOTALL),
+    ord("'"): re.compile(rb"((?:[^'\\]|\\.)*)'", re.DOTALL),
+}
+_OPEN_PAREN = ('(', ord('('))
+_CLOSE_PAREN = (')', ord(')'))
+
+
+def extract_call_argument(content, pos, endpos=None, max_depth=CALL_MAX_DEPTH, max_span=CALL_MAX_SPAN):
+    """从调用的左括号之后（pos）提取第一个字符串参数
+
+    返回 (字符串内容或 None, 状态)，状态为 "ok"、"none"（调用结束前没有字符串）
+    或 "limit"（超出嵌套深度或扫描长度限制）。
+    """
+    if endpos is None:
+        endpos = len(content)
+    limit = min(endpos, pos + max_span)
+    tokens = _CALL_TOKENS if isinstance(content, str) else _CALL_TOKENS_BYTES
+    depth = 1
+    while True:
+        token = tokens.search(content, pos, limit)
+        if token is None:
+            return None, ("limit" if limit < endpos else "none")
+        char = content[token.start()]
+        if char in _OPEN_PAREN:
+            depth += 1
+            if depth > max_depth:
+                return None, "limit"
+        elif char in _CLOSE_PAREN:
+            depth -= 1
+            if depth == 0:
+                return None, "none"
+        else:
+            body = _STRING_BODIES[char].match(content, token.end(), limit)
+            if body is None:
+                return None, ("limit" if limit < endpos else "none")
+            return body.group(1), "ok"
+        pos = token.end()
+
+
+# ================== 流式结果输出 ==================
+MAX_RESULTS_IN_MEMORY = 500000
+
+
+class ResultSink:
+    """按分组流式收集结果元组
+
+    结果到达时即去重，并同时统计每一列的最大宽度；内存中的结果数超过
+    max_items 时，把每个分组排好序的结果段溢出到临时文件，输出时再多路归并，
+    因此不需要把所有原始命中同时放在内存里。
+    """
+
+    def __init__(self, groups, sort_key=None, max_items=MAX_RESULTS_IN_MEMORY, tmp_dir=None):
+        self.groups = list(groups)
+        self.sort_key = sort_key or (lambda item: item)
+        self.max_items = max_items
+        self.tmp_dir = tmp_dir
+        self.pending = {group: set() for group in self.groups}
+        self.runs = {group: [] for group in self.groups}
+        self.widths = {group: None for group in self.groups}
+        self.in_memory = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, group, item):
+        """加入一条结果，重复的结果直接丢弃"""
+        bucket = self.pending[group]
+        if item in bucket:
+            return
+        bucket.add(item)
+        widths = self.widths[group]
+        if widths is None:
+            self.widths[group] = [len(value) for value in item]
+        else:
+            for column, value in enumerate(item):
+                if len(value) > widths[column]:
+                    widths[column] = len(value)
+        self.in_memory += 1
+        if self.in_memory >= self.max_items:
+            self.spill()
+
+    def spill(self):
+        """把内存中的结果按分组排序后写入临时文件"""
+        for group, bucket in self.pending.items():
+            if not bucket:
+                continue
+            fd, run_path = tempfile.mkstemp(prefix="path-run-", suffix=".pickle", dir=self.tmp_dir)
+            with os.fdopen(fd, 'wb') as f:
+                for item in sorted(bucket, key=self.sort_key):
+                    pickle.dump(item, f, pickle.HIGHEST_PROTOCOL)
+            self.runs[group].append(run_path)
+            bucket.clear()
+        self.in_memory = 0
+
+    def has_results(self, group):
+        return bool(self.pending[group] or self.runs[group])
+
+    def iter_group(self, group):
+        """按排序键产出某个分组去重后的结果"""
+        streams = [sorted(self.pending[group], key=self.sort_key)]
+        streams.extend(_read_run(run_path) for run_path in self.runs[group])
+        current_key = None
+        seen = set()
+        for item in heapq.merge(*streams, key=self.sort_key):
+            key = self.sort_key(item)
+            if key != current_key:
+                current_key = key
+                seen.clear()
+            if item not in seen:
+                seen.add(item)
+                yield item
+
+    def write(self, f, format_line):
+        """按 ===== 分组 ===== 格式写出所有结果，返回写出的条数
+
+        format_line(item, widths) 返回一行文本，widths 为该分组各列的最大宽度。
+        """
+        total = 0
+        for group in self.groups:
+            if self.has_results(group):
+                f.write(f"===== {group} =====\n")
+                widths = self.widths[group]
+                for item in self.iter_group(group):
+                    f.write(format_line(item, widths))
+                    total += 1
+                f.write("\n")  # 分块之间加空行
+        return total
+
+    def close(self):
+        """删除临时文件"""
+        for runs in self.runs.values():
+            for run_path in runs:
+                try:
+                    os.remove(run_path)
+                except OSError:
+                    pass
+            runs.clear()
+
+
+def _read_run(run_path):
+    with open(run_path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
@@ -0,0 +1,135 @@
+"""第三方库指纹
+
+按文件开头的版权横幅（banner）或整个内容的 SHA-256 识别常见第三方库（jquery、vue、element-ui、
+echarts 等）。这些文件中的 path:/name:/url: 几乎全是无用命中：动作为 skip 的库不下载、不扫描，
+动作为 reduced 的库只用精简的正则集合扫描（见 patterns.REDUCED_GROUPS）。
+
+指纹库可以用 JSON 文件扩展（--fingerprint-db，可以给出多次）：
+
+    {"libraries": [{"name": "my-sdk", "banners": ["MySDK v\\\\d"], "sha256": ["..."], "action": "reduced"}]}
+
+banners 为在文件开头 PROBE_BYTES 字节内搜索的正则，action 为 skip（默认）或 reduced。
+"""
+import os
+import re
+import json
+import hashlib
+from collections import namedtuple
+
+from .metrics import METRICS, progress
+
+SKIP = "skip"
+REDUCED = "reduced"
+ACTIONS = (SKIP, REDUCED)
+# 识别时读取的开头字节数
+PROBE_BYTES = 4096
+# 响应体（按 Content-Length）小于该值时完整下载后再识别，不为提前断开而放弃连接复用
+EARLY_ABORT_MIN_SIZE = 64 * 1024
+
+Fingerprint = namedtuple("Fingerprint", ["name", "action"])
+
+# 内置指纹：(名称, 横幅正则列表, 动作)
+BUILTIN_LIBRARIES = [
+    ("jquery", [r"/\*!\s*jQuery v\d", r"jQuery JavaScript Library v\d"], SKIP),
+    ("vue", [r"\*\s*Vue\.js v\d"], SKIP),
+    ("vue-router", [r"\*\s*vue-router v\d"], SKIP),
+    ("vuex", [r"\*\s*vuex v\d"], SKIP),
+    ("react", [r"@license React\b"], SKIP),
+    ("element-ui", [r"define\(\s*[\"']ELEMENT[\"']", r"\bexports\.ELEMENT\s*="], SKIP),
+    ("element-plus", [r"\*!?\s*Element Plus v\d"], SKIP),
+    ("ant-design-vue", [r"\*\s*ant-design-vue v\d"], SKIP),
+    ("antd", [r"\*\s*antd v\d"], SKIP),
+    ("echarts", [r"\.echarts\s*=\s*\{\}"], SKIP),
+    ("lodash", [r"Lodash <https://lodash\.com/>"], SKIP),
+    ("moment", [r"//! moment\.js"], SKIP),
+    ("axios", [r"\bAxios v\d"], SKIP),
+    ("bootstrap", [r"\*\s*Bootstrap v\d"], SKIP),
+    # webpack 打包出的第三方依赖合集，可能混有项目自己的内部包，只做精简扫描
+    ("chunk-vendors", [r"\[\s*\[\s*[\"']chunk-vendors[\"']\s*\]"], REDUCED),
+]
+
+
+class FingerprintDB:
+    """指纹库：按横幅正则或内容摘要识别第三方库，enabled 为假时不识别任何文件"""
+
+    def __init__(self):
+        self.enabled = True
+        self.banners = []  # (字节正则, Fingerprint)
+        self.digests = {}  # SHA-256 -> Fingerprint
+        for name, banners, action in BUILTIN_LIBRARIES:
+            self.add(name, banners, action=action)
+
+    def add(self, name, banners=(), sha256=(), action=SKIP):
+        """添加一个库的指纹"""
+        if action not in ACTIONS:
+            raise ValueError(f"未知的指纹动作: {action}（可选: {', '.join(ACTIONS)}）")
+        fingerprint = Fingerprint(name, action)
+        for banner in banners:
+            self.banners.append((re.compile(banner.encode('utf-8')), fingerprint))
+        for digest in sha256:
+            self.digests[digest.lower()] = fingerprint
+
+    def load(self, path):
+        """从 JSON 文件加载用户指纹（格式见模块说明）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for library in data.get("libraries", []):
+            self.add(library["name"], library.get("banners", ()), library.get("sha256", ()),
+                     library.get("action", SKIP))
+
+    def identify(self, head, digest=None):
+        """按开头的字节和（可选的）内容摘要识别，返回 Fingerprint，不是已知的库时返回 None"""
+        if not self.enabled:
+            return None
+        if digest is not None and digest in self.digests:
+            return self.digests[digest]
+        head = head[:PROBE_BYTES]
+        for pattern, fingerprint in self.banners:
+            if pattern.search(head):
+                return fingerprint
+        return None
+
+    def identify_content(self, content, digest=None):
+        """识别完整内容；指纹库中有摘要时才计算摘要"""
+        if self.enabled and digest is None and self.digests:
+            digest = hashlib.sha256(content).hexdigest()
+        return self.identify(content[:PROBE_BYTES], digest)
+
+    def identify_file(self, file_path, digest=None):
+        """识别文件，只读取开头 PROBE_BYTES 字节；指纹库中有摘要时才计算摘要"""
+        if not self.enabled:
+            return None
+        with open(file_path, 'rb') as f:
+            head = f.read(PROBE_BYTES)
+        if digest is None and self.digests:
+            from .analysis import file_sha256
+            digest = file_sha256(file_path)
+        return self.identify(head, digest)
+
+
+def report_vendor(source, fingerprint):
+    """记录一个识别出的第三方库（source 为文件路径或URL）"""
+    if fingerprint.action == SKIP:
+        METRICS.count("跳过的第三方库")
+        progress(f"🧩 识别为 {fingerprint.name}，已跳过: {os.path.basename(source)}")
+    else:
+        METRICS.count("精简扫描的第三方库")
+        progress(f"🧩 识别为 {fingerprint.name}，只做精简扫描: {os.path.basename(source)}")
+
+
+# 全局指纹库，各入口通过 configure_from_args 配置
+FINGERPRINTS = FingerprintDB()
+
+
+def add_arguments(parser):
+    """指纹相关的命令行参数，供各脚本共用"""
+    parser.add_argument("--no-fingerprint", action="store_true",
+                        help="不识别第三方库，所有JS文件都完整下载并用全部正则扫描")
+    parser.add_argument("--fingerprint-db", metavar="PATH", action="append", default=[],
+                        help="追加JSON格式的第三方库指纹文件，可以给出多次")
+
+
+def configure_from_args(args):
+    FINGERPRINTS.enabled = not args.no_fingerprint
+    for path in args.fingerprint_db:
+        FINGERPRINTS.load(path)
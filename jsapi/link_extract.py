@@ -0,0 +1,144 @@
+"""从 HTML 页面中提取 JS 链接
+
+页面里只需要 script[src] 和 link[href] 两类标签，没必要为每个页面都构建完整的
+BeautifulSoup 文档树。这里提供可替换的解析后端：
+
+- htmlparser：标准库 html.parser 的事件回调，只在开始标签处读取属性，不建树
+- lxml：安装了 lxml 时使用其 C 实现的 HTML 解析器（重复属性取第一个，与浏览器一致）
+- bs4：原先的 BeautifulSoup 完整解析，保留用于对照
+
+LinkExtractor 可以把解析放到进程池里执行，抓取线程只负责网络 I/O。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+from .planner import join_url
+
+BACKENDS = ("auto", "htmlparser", "lxml", "bs4")
+
+def js_link_from_tag(tag, attrs, base_url):
+    """按原有规则从 script/link 标签属性中取出JS链接，不是JS链接时返回 None"""
+    if tag == 'script':
+        src = attrs.get('src')
+    elif tag == 'link' and (attrs.get('rel') or '').split() == ['stylesheet'] and attrs.get('href'):
+        src = attrs['href'] if attrs['href'].endswith('.js') else None
+    else:
+        return None
+
+    if not src:
+        return None
+    full_url = join_url(base_url, src)
+    if full_url is None:
+        return None
+    if full_url.endswith('.js') or 'javascript' in (attrs.get('type') or '').lower():
+        return full_url
+    return None
+
+# ================== 解析后端 ==================
+class _ScriptLinkParser(HTMLParser):
+    """只响应 script/link 开始标签的事件解析器"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'script' and tag != 'link':
+            return
+        # 重复属性以最后一个为准，与 BeautifulSoup 一致
+        link = js_link_from_tag(tag, dict(attrs), self.base_url)
+        if link:
+            self.links.append(link)
+
+def parse_with_htmlparser(html, base_url):
+    """用标准库事件解析器提取JS链接"""
+    parser = _ScriptLinkParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.links
+
+def parse_with_lxml(html, base_url):
+    """用 lxml 解析并只遍历 script/link 元素"""
+    from lxml import etree
+
+    try:
+        root = etree.HTML(html)
+    except ValueError:
+        # 带编码声明的字符串 lxml 拒绝解析，改为按 UTF-8 字节解析
+        root = etree.HTML(html.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+    if root is None:
+        return []
+    links = []
+    for element in root.iter('script', 'link'):
+        link = js_link_from_tag(element.tag, element.attrib, base_url)
+        if link:
+            links.append(link)
+    return links
+
+def parse_with_bs4(html, base_url):
+    """用 BeautifulSoup 构建完整文档树后提取JS链接"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for tag in soup.find_all(['script', 'link']):
+        attrs = dict(tag.attrs)
+        # BeautifulSoup 把 rel 解析为列表，还原为空白分隔的字符串
+        if isinstance(attrs.get('rel'), list):
+            attrs['rel'] = ' '.join(attrs['rel'])
+        link = js_link_from_tag(tag.name, attrs, base_url)
+        if link:
+            links.append(link)
+    return links
+
+PARSERS = {
+    "htmlparser": parse_with_htmlparser,
+    "lxml": parse_with_lxml,
+    "bs4": parse_with_bs4,
+}
+
+def resolve_backend(backend="auto"):
+    """auto 时优先使用 lxml，未安装则退回标准库事件解析器"""
+    if backend != "auto":
+        if backend not in PARSERS:
+            raise ValueError(f"未知的HTML解析后端: {backend}")
+        return backend
+    try:
+        import lxml.etree  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "htmlparser"
+
+def parse_js_links(html, base_url, backend="htmlparser"):
+    """用指定后端从HTML中提取JS链接"""
+    return PARSERS[backend](html, base_url)
+
+# ================== 解析进程池 ==================
+class LinkExtractor:
+    """页面解析器：workers 大于 1 时在进程池中解析，抓取线程只等待结果
+
+    workers 为 0 表示使用全部CPU核心。
+    """
+
+    def __init__(self, backend="auto", workers=1):
+        self.backend = resolve_backend(backend)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def extract(self, html, base_url):
+        if self.executor is None:
+            return parse_js_links(html, base_url, self.backend)
+        return self.executor.submit(parse_js_links, html, base_url, self.backend).result()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,309 @@
+"""运行指标与进度输出
+
+全局的 METRICS 收集各脚本共用的运行指标，并控制逐项进度是否打印（progress）。分析进程池中的子进程
+由 init_worker 初始化、用 metered 执行任务，把本进程产生的指标连同结果交回主进程合并。
+命令行参数由 add_arguments 和 configure_from_args 统一添加和解析。
+"""
+import json
+import time
+import cProfile
+import threading
+import contextlib
+
+# ================== 运行指标 ==================
+# 记录各阶段耗时、每个正则的命中数与匹配耗时、每个文件的扫描耗时、
+# 请求延迟分布、下载字节数和状态码计数。默认关闭，关闭时各记录函数直接返回，
+# 组合匹配器也不做逐次计时。可以输出汇总表，也可以把事件逐行写成 JSON。
+
+# 请求延迟分布的桶上界（毫秒），最后一个桶收集更慢的请求
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# 汇总表中列出的最慢文件数和正则数
+SLOWEST_FILES = 5
+TOP_PATTERNS = 15
+
+
+def _empty_snapshot():
+    return {
+        "stages": {},        # 阶段 -> [次数, 秒]
+        "counters": {},      # 计数器 -> 值
+        "patterns": {},      # 匹配器: 分组/标签 -> [命中, 尝试, 秒]
+        "files": [0, 0.0, 0, 0],  # [文件数, 秒, 字节数, 匹配数]
+        "slowest": [],       # [(秒, 文件路径), ...]
+        "latency": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        "requests": [0, 0.0],  # [请求数, 秒]
+        "bytes": 0,
+        "statuses": {},
+        "events": [],
+    }
+
+
+class Metrics:
+    """线程安全的指标收集器
+
+    子进程中的收集器（见 init_worker）把事件暂存在内存里，由 drain 连同统计一起
+    交回主进程，再用 merge 合并，因此多进程扫描的指标与单进程一致。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.quiet = False
+        self.collect_events = False
+        self.jsonl = None
+        self.jsonl_path = None
+        self.profiler = None
+        self.profiling = False
+        self.profile_path = None
+        self.matchers = {}
+        self.lock = threading.Lock()
+        self.data = _empty_snapshot()
+
+    def configure(self, enabled=False, quiet=False, jsonl_path=None, profile_path=None):
+        """开启指标收集；给出 jsonl_path 时逐行写出事件，给出 profile_path 时剖析分析阶段"""
+        self.enabled = enabled or jsonl_path is not None
+        self.quiet = quiet
+        if jsonl_path is not None:
+            self.jsonl = open(jsonl_path, 'w', encoding='utf-8')
+            self.jsonl_path = jsonl_path
+        if profile_path is not None:
+            self.profiler = cProfile.Profile()
+            self.profile_path = profile_path
+        for matcher in self.matchers.values():
+            matcher.enable_stats(self.enabled)
+
+    def watch(self, name, matcher):
+        """登记一个组合匹配器，开启指标时统计它每个正则的命中数和耗时"""
+        self.matchers[name] = matcher
+        matcher.enable_stats(self.enabled)
+
+    # ---- 记录 ----
+    def _emit(self, event):
+        event["time"] = round(time.time(), 3)
+        if self.collect_events:
+            self.data["events"].append(event)
+        elif self.jsonl is not None:
+            self.jsonl.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    @contextlib.contextmanager
+    def stage(self, name, profile=False):
+        """统计一个阶段的耗时；profile 为真且开启了剖析时，阶段内的调用计入剖析结果
+
+        cProfile 只剖析当前线程，流水线模式中分析线程和进程里的调用不在其中；
+        批量模式中多个线程同时进入剖析阶段时只剖析先进入的一个。
+        """
+        profiler = self.profiler if profile else None
+        if profiler is not None:
+            with self.lock:
+                if self.profiling:
+                    profiler = None
+                else:
+                    self.profiling = True
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self.profiling = False
+            if self.enabled:
+                with self.lock:
+                    stat = self.data["stages"].setdefault(name, [0, 0.0])
+                    stat[0] += 1
+                    stat[1] += elapsed
+                    self._emit({"event": "stage", "name": name, "ms": round(elapsed * 1000, 3)})
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            counters = self.data["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    def request(self, url, status, seconds, size=0):
+        """记录一次请求：状态码（异常时为 "error"）、耗时和实际传输的响应体字节数"""
+        if not self.enabled:
+            return
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound),
+                      len(LATENCY_BUCKETS_MS))
+        with self.lock:
+            data = self.data
+            data["latency"][bucket] += 1
+            data["requests"][0] += 1
+            data["requests"][1] += seconds
+            data["bytes"] += size
+            key = str(status)
+            data["statuses"][key] = data["statuses"].get(key, 0) + 1
+            self._emit({"event": "request", "url": url, "status": status,
+                        "ms": round(milliseconds, 3), "bytes": size})
+
+    def file_scanned(self, path, seconds, size, matches):
+        """记录一个文件的扫描耗时、大小和匹配数"""
+        if not self.enabled:
+            return
+        with self.lock:
+            files = self.data["files"]
+            files[0] += 1
+            files[1] += seconds
+            files[2] += size
+            files[3] += matches
+            slowest = self.data["slowest"]
+            slowest.append((seconds, path))
+            if len(slowest) > SLOWEST_FILES:
+                slowest.sort(reverse=True)
+                del slowest[SLOWEST_FILES:]
+            self._emit({"event": "file", "path": path, "ms": round(seconds * 1000, 3),
+                        "bytes": size, "matches": matches})
+
+    # ---- 汇总与跨进程合并 ----
+    def _collect_patterns(self):
+        for name, matcher in self.matchers.items():
+            for key, (hits, attempts, seconds) in matcher.take_stats().items():
+                stat = self.data["patterns"].setdefault(f"{name}: {key}", [0, 0, 0.0])
+                stat[0] += hits
+                stat[1] += attempts
+                stat[2] += seconds
+
+    def drain(self):
+        """取出并清空当前统计（子进程把它连同结果一起交回主进程）"""
+        with self.lock:
+            self._collect_patterns()
+            data, self.data = self.data, _empty_snapshot()
+        return data
+
+    def merge(self, snapshot):
+        """合并子进程交回的统计，并写出其中暂存的事件"""
+        if not self.enabled or not snapshot:
+            return
+        with self.lock:
+            data = self.data
+            for section in ("stages", "patterns"):
+                for key, values in snapshot[section].items():
+                    stat = data[section].setdefault(key, [0] * len(values))
+                    for i, value in enumerate(values):
+                        stat[i] += value
+            for section in ("counters", "statuses"):
+                for key, value in snapshot[section].items():
+                    data[section][key] = data[section].get(key, 0) + value
+            for i, value in enumerate(snapshot["files"]):
+                data["files"][i] += value
+            data["slowest"] = sorted(data["slowest"] + snapshot["slowest"], reverse=True)[:SLOWEST_FILES]
+            for i, value in enumerate(snapshot["latency"]):
+                data["latency"][i] += value
+            data["requests"][0] += snapshot["requests"][0]
+            data["requests"][1] += snapshot["requests"][1]
+            data["bytes"] += snapshot["bytes"]
+            for event in snapshot["events"]:
+                if self.jsonl is not None:
+                    self.jsonl.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def snapshot(self):
+        """当前统计的副本（不含暂存事件）"""
+        with self.lock:
+            self._collect_patterns()
+            data = {key: value for key, value in self.data.items() if key != "events"}
+            return json.loads(json.dumps(data))
+
+    def percentile(self, fraction):
+        """按延迟分布估计分位数，返回所在桶的上界（毫秒），落在最后一个桶时返回 None"""
+        latency = self.data["latency"]
+        total = sum(latency)
+        if not total:
+            return 0
+        running = 0
+        for i, value in enumerate(latency):
+            running += value
+            if running >= fraction * total:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def summary(self):
+        """返回汇总表文本"""
+        data = self.snapshot()
+        lines = ["===== 运行指标 ====="]
+        if data["stages"]:
+            lines.append(f"{'阶段':<28}{'次数':>6}{'耗时(秒)':>12}")
+            for name, (count, seconds) in data["stages"].items():
+                lines.append(f"{name:<28}{count:>6}{seconds:>12.3f}")
+        requests, seconds = data["requests"]
+        if requests:
+            bound = lambda value: f"≤{value} ms" if value is not None else f">{LATENCY_BUCKETS_MS[-1]} ms"
+            lines.append(f"\n请求: {requests} 次，平均 {seconds / requests * 1000:.1f} ms，"
+                         f"p50 {bound(self.percentile(0.5))}，p90 {bound(self.percentile(0.9))}，"
+                         f"p99 {bound(self.percentile(0.99))}，下载 {data['bytes'] / 1024 / 1024:.2f} MB")
+            lines.append("状态码: " + "  ".join(f"{status}×{count}"
+                                               for status, count in sorted(data["statuses"].items())))
+            labels = [f"≤{bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            lines.append("延迟分布: " + " | ".join(f"{label} {count}"
+                                                for label, count in zip(labels, data["latency"]) if count))
+        files, seconds, size, matches = data["files"]
+        if files:
+            rate = size / 1024 / 1024 / seconds if seconds else 0
+            lines.append(f"\n文件扫描: {files} 个，{size / 1024 / 1024:.2f} MB，{seconds:.3f} 秒"
+                         f"（{rate:.1f} MB/秒），匹配 {matches} 个")
+            for seconds, path in data["slowest"]:
+                lines.append(f"  {seconds * 1000:>10.1f} ms  {path}")
+        if data["patterns"]:
+            lines.append(f"\n{'正则':<60}{'命中':>10}{'尝试':>10}{'耗时(秒)':>12}")
+            ranked = sorted((item for item in data["patterns"].items() if item[1][1]),
+                            key=lambda item: item[1][2], reverse=True)
+            for key, (hits, attempts, seconds) in ranked[:TOP_PATTERNS]:
+                name = key if len(key) <= 58 else key[:55] + "..."
+                lines.append(f"{name:<60}{hits:>10}{attempts:>10}{seconds:>12.3f}")
+        if data["counters"]:
+            lines.append("\n计数: " + "  ".join(f"{name}={value}" for name, value in sorted(data["counters"].items())))
+        return "\n".join(lines)
+
+    def close(self, report=False):
+        """写出汇总事件与剖析结果；report 为真时打印汇总表"""
+        if self.enabled and report:
+            print("\n" + self.summary())
+        if self.jsonl is not None:
+            self.jsonl.write(json.dumps({"event": "summary", **self.snapshot()}, ensure_ascii=False) + "\n")
+            self.jsonl.close()
+            self.jsonl = None
+            print(f"📈 运行指标已写入 {self.jsonl_path}")
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.profile_path)
+            print(f"📈 分析阶段的性能剖析已写入 {self.profile_path}（可用 python -m pstats 查看）")
+            self.profiler = None
+
+
+METRICS = Metrics()
+
+
+def progress(message):
+    """打印逐项进度；安静模式下不打印"""
+    if not METRICS.quiet:
+        print(message)
+
+
+def init_worker(quiet=False):
+    """进程池初始化：子进程收集指标并暂存事件，由 metered 交回主进程
+
+    以 fork 方式启动的子进程继承了主进程的统计和文件句柄，这里丢弃继承的统计，
+    事件只暂存不写文件。
+    """
+    METRICS.collect_events = True
+    METRICS.configure(enabled=True, quiet=quiet)
+    METRICS.drain()
+
+
+def metered(func, *args, **kwargs):
+    """在子进程中执行 func，返回 (结果, 本次调用产生的指标)"""
+    result = func(*args, **kwargs)
+    return result, METRICS.drain()
+
+
+def add_arguments(parser):
+    """指标相关的命令行参数，供各脚本共用"""
+    parser.add_argument("-q", "--quiet", action="store_true", help="不打印逐项进度，只输出阶段汇总")
+    parser.add_argument("--metrics", action="store_true", help="结束时打印运行指标汇总表")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", help="把运行指标事件逐行写入 JSON lines 文件")
+    parser.add_argument("--profile", metavar="PATH", help="用 cProfile 剖析分析阶段并写入文件")
+
+
+def configure_from_args(args):
+    METRICS.configure(args.metrics, args.quiet, args.metrics_jsonl, args.profile)
@@ -0,0 +1,164 @@
+"""正则注册表
+
+各提取入口的 pattern_groups 集中在这里，按名称取用：
+
+- simple：re-simple.py 的简单模式
+- api-dir：re-api-dir.py，字符串支持转义引号，get/post 参数有界提取（需要 regex 模块）
+- paths：url-js.py 循环发现时提取路径
+- final：url-js.py 最终输出
+
+表在第一次取用时才编译，编译好的组合匹配器按名称缓存，导入本模块没有额外开销。
+reduced=True 取表的精简版本，只保留 REDUCED_GROUPS 中的分组，用于扫描识别出的第三方库。
+"""
+import re
+
+from .engine import CombinedMatcher, CALL_ARGUMENT
+from .metrics import METRICS
+
+
+def _simple_groups():
+    return {
+        "PagePath Matches": [
+            (re.compile(r"(?i)pagePath:\s*[\"'](.*?)[\"']"), "pagePath")
+        ],
+        "Path Matches": [
+            (re.compile(r"(?i)path:\s*[\"'](.*?)[\"']"), "path"),
+            (re.compile(r"(?i)url:\s*[\"']([^\"']+)[\"']"), "url"),
+            (re.compile(r"(?i)name:\s*[\"']([^\"']+)[\"']"), "name"),
+        ],
+        "GET Matches": [
+            (re.compile(r"(?i)get\([^()]*?['\"]([^'\"]*?)['\"][^()]*?\)"), ""),
+            (re.compile(r"(?i)url:['\"]([^'\"]+)['\"],\s*method:\s*['\"]get['\"]"), ""),
+        ],
+        "POST Matches": [
+            (re.compile(r"(?i)post\([^()]*?['\"]([^'\"]*?)['\"][^()]*?\)"), ""),
+            (re.compile(r"(?i)url:['\"]([^'\"]+)['\"],\s*method:\s*['\"]post['\"]"), ""),
+        ],
+        "Object": [
+            (re.compile(r'\b[a-zA-Z][a-zA-Z0-9]*\b:\[\{\s*\b[a-zA-Z][a-zA-Z0-9]*\b:""'), "")
+        ]
+    }
+
+
+def _api_dir_groups():
+    import regex
+    return {
+        "PagePath Matches": [
+            # 匹配 pagePath: 后面的字符串，支持转义引号
+            (regex.compile(r"(?i)pagePath:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "pagePath", 1)
+        ],
+        "Path Matches": [
+            # 匹配 path: 后面的字符串，支持转义引号
+            (regex.compile(r"(?i)path:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "path", 1),
+            # 匹配 url: 后面的字符串，支持转义引号
+            (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "url", 1),
+            # 匹配 name: 后面的字符串，支持转义引号
+            (regex.compile(r"(?i)name:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "name", 1),
+        ],
+        "GET Matches": [
+            # 匹配 get( 调用，由 extract_call_argument 有界地提取第一个字符串参数
+            (regex.compile(r'(?i)get\('), "", CALL_ARGUMENT),
+            # 匹配 url: "...", method: "get" 模式
+            (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]\s*,\s*method:\s*['\"]get['\"]", regex.DOTALL), "", 1),
+        ],
+        "POST Matches": [
+            # 匹配 post( 调用，由 extract_call_argument 有界地提取第一个字符串参数
+            (regex.compile(r'(?i)post\('), "", CALL_ARGUMENT),
+            # 匹配 url: "...", method: "post" 模式
+            (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]\s*,\s*method:\s*['\"]post['\"]", regex.DOTALL), "", 1),
+        ],
+        "Object": [
+            # 匹配对象模式如 key: [{ key: ""
+            (regex.compile(r'\b[a-zA-Z][a-zA-Z0-9]*\b:\[\{\s*\b[a-zA-Z][a-zA-Z0-9]*\b:""', regex.DOTALL), "", 0)
+        ]
+    }
+
+
+def _path_groups():
+    # 路径分析使用的正则表达式
+    return {
+        "PagePath Matches": [
+            (re.compile(r'pagePath:\s*"(.*?)"'), "pagePath_double_quotes"),
+            (re.compile(r"pagePath:\s*'(.*?)'"), "pagePath_single_quotes"),
+        ],
+        "Path Matches": [
+            (re.compile(r'path:\s*"(.*?)"'), "path_double_quotes"),
+            (re.compile(r"path:\s*'(.*?)'"), "path_single_quotes"),
+            (re.compile(r'url:\s*"([^"]+)"'), "url_double_quotes"),
+            (re.compile(r"url:\s*'([^']+)'"), "url_single_quotes"),
+        ]
+    }
+
+
+def _final_groups():
+    # 最终输出使用的正则表达式和分类标签
+    return {
+        "PagePath Matches": [
+            (re.compile(r'pagePath:\s*"(.*?)"'), "pagePath_double_quotes"),
+            (re.compile(r"pagePath:\s*'(.*?)'"), "pagePath_single_quotes"),
+        ],
+        "Path Matches": [
+            (re.compile(r'path:\s*"(.*?)"'), "path_double_quotes"),
+            (re.compile(r"path:\s*'(.*?)'"), "path_single_quotes"),
+            (re.compile(r'url:\s*"([^"]+)"'), "url_double_quotes"),
+            (re.compile(r'url: "([^"]+)'), "url_double_quotes"),
+        ],
+        "GET Matches": [
+            (re.compile(r'get\([^()]*?"([^"]*?)"[^()]*?\)'), "get_double_quotes"),
+            (re.compile(r"get\([^()]*?['\"]([^'\"]*?)['\"][^()]*?\)"), "get_single_quotes"),
+        ],
+        "POST Matches": [
+            (re.compile(r'post\([^()]*?"([^"]*?)"[^()]*?\)'), "post_double_quotes"),
+            (re.compile(r"POST\([^()]*?['\"]([^'\"]*?)['\"][^()]*?\)"), "post_single_quotes"),
+        ]
+    }
+
+
+# 精简版本保留的分组：第三方库中的 path:/name:/url: 几乎全是无用命中，只保留请求调用
+REDUCED_GROUPS = ("GET Matches", "POST Matches")
+
+REGISTRY = {
+    "simple": _simple_groups,
+    "api-dir": _api_dir_groups,
+    "paths": _path_groups,
+    "final": _final_groups,
+}
+
+_groups = {}
+_matchers = {}
+
+
+def names():
+    return list(REGISTRY)
+
+
+def pattern_groups(name, reduced=False):
+    """返回名为 name 的 {分组: [(pattern, 标签[, 捕获组序号]), ...]}（编译一次后缓存）"""
+    groups = _groups.get(name)
+    if groups is None:
+        try:
+            builder = REGISTRY[name]
+        except KeyError:
+            raise ValueError(f"未知的正则表: {name}（可选: {', '.join(REGISTRY)}）") from None
+        groups = _groups[name] = builder()
+    if reduced:
+        return {group: patterns for group, patterns in groups.items() if group in REDUCED_GROUPS}
+    return groups
+
+
+def get_matcher(name, reduced=False):
+    """返回名为 name 的正则表编译成的组合匹配器（编译一次后缓存）"""
+    key = f"{name}（精简）" if reduced else name
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = _matchers[key] = CombinedMatcher(pattern_groups(name, reduced))
+        METRICS.watch(key, matcher)
+    return matcher
+
+
+def register(name, builder):
+    """注册新的正则表；builder 无参数，返回 pattern_groups 格式的字典"""
+    REGISTRY[name] = builder
+    _groups.pop(name, None)
+    _matchers.pop(name, None)
+    _matchers.pop(f"{name}（精简）", None)
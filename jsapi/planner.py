@@ -0,0 +1,181 @@
+"""请求规划
+
+URL 规范化、每次运行内的请求去重，以及循环发现使用的路径抓取边界。
+"""
+import re
+import threading
+from urllib.parse import urljoin, urlparse, urlunparse
+
+# ================== 请求规划 ==================
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url):
+    """规范化URL：去掉片段、统一协议与主机大小写、去掉默认端口，得到实际发往服务器的形式
+
+    无法解析的URL（端口非法、IPv6 地址不完整等）原样返回，由请求时单独失败，不影响其他URL。
+    """
+    try:
+        parsed = urlparse(url)
+        port = parsed.port
+    except ValueError:
+        return url
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc += f":{port}"
+    if '@' in parsed.netloc:
+        netloc = parsed.netloc.rsplit('@', 1)[0] + '@' + netloc
+    return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, parsed.query, ''))
+
+def join_url(base_url, reference):
+    """urljoin 的容错版本：引用无法解析（如 http://[::1/x.js）时返回 None，只丢弃这一个链接"""
+    try:
+        return urljoin(base_url, reference)
+    except ValueError:
+        return None
+
+class FetchPlanner:
+    """请求规划器：保证每个实际的服务器请求在一次运行中只发出一次
+
+    renderer 为可选的JS渲染后端（接收URL、返回渲染后HTML的可调用对象），
+    只有配置了渲染后端时#路由才有意义，否则片段不会发往服务器，直接跳过。
+    """
+
+    def __init__(self, renderer=None):
+        self.renderer = renderer
+        self.seen = set()
+        self.deduplicated = 0
+        self.skipped_hash_routes = 0
+        self.lock = threading.Lock()
+
+    def _plan(self, urls, key_func):
+        planned = []
+        with self.lock:
+            for url in urls:
+                key = key_func(url)
+                if key in self.seen:
+                    self.deduplicated += 1
+                    continue
+                self.seen.add(key)
+                planned.append(key)
+        return planned
+
+    def plan(self, urls):
+        """返回尚未请求过的规范化URL"""
+        return self._plan(urls, canonicalize_url)
+
+    def plan_hash_routes(self, urls):
+        """返回需要渲染的#路由URL；未配置渲染后端时全部跳过"""
+        urls = list(urls)
+        if self.renderer is None:
+            with self.lock:
+                self.skipped_hash_routes += len(urls)
+            return []
+        def key_func(url):
+            fragment = url.partition('#')[2]
+            return canonicalize_url(url) + (f"#{fragment}" if fragment else '')
+        return self._plan(urls, key_func)
+
+    def state(self):
+        """导出可写入检查点的状态"""
+        with self.lock:
+            return {"seen": sorted(self.seen), "deduplicated": self.deduplicated,
+                    "skipped_hash_routes": self.skipped_hash_routes}
+
+    def restore(self, state):
+        """从检查点恢复已请求过的URL"""
+        with self.lock:
+            self.seen = set(state.get("seen", []))
+            self.deduplicated = state.get("deduplicated", 0)
+            self.skipped_hash_routes = state.get("skipped_hash_routes", 0)
+
+    def report(self):
+        """打印去重统计"""
+        print(f"♻️ 请求规划: 去重 {self.deduplicated} 个重复请求，跳过 {self.skipped_hash_routes} 个#路由请求")
+
+API_PATH_PATTERN = re.compile(
+    r'(?i)(?:^|/)(?:api|apis|v\d+|rest|service|services|gateway|graphql|ajax)(?:/|$)'
+    r'|\.(?:do|action|json|php|aspx?|ashx|jsp)$')
+
+def is_api_path(path):
+    """路径看起来像后端接口（/api/、/v1/、.do 等）"""
+    return API_PATH_PATTERN.search(path.split('?', 1)[0]) is not None
+
+class CrawlFrontier:
+    """路径抓取边界：已访问的路径在整个运行中保留，每轮只交出新发现的路径
+
+    api_first 为 True 时看起来像接口的路径排在前面。
+    给出 routes（routes.PathTrie）时按路由模板去重：/api/user/1 与 /api/user/2 只请求一个代表路径，
+    不是路由的值和其他来源的完整URL不请求。
+    """
+
+    def __init__(self, api_first=False, routes=None):
+        self.api_first = api_first
+        self.routes = routes
+        self.visited = set()
+        self.pending = set()
+
+    def key(self, path):
+        """路径在抓取边界中的键：原始路径，或按模板去重时的模板键；不请求的路径返回 None"""
+        if self.routes is None:
+            return path
+        key = self.routes.add(path)
+        # 模板键的第一项为来源，同源时为 None
+        return key if key is not None and key[0] is None else None
+
+    def path(self, key):
+        """键对应的请求路径（按模板去重时为代表路径）"""
+        return key if self.routes is None else self.routes.sample(key)
+
+    def add(self, paths):
+        """加入路径，返回其中新发现的数量"""
+        return self.add_keys(self.key(path) for path in paths)
+
+    def add_keys(self, keys):
+        """加入已经由 key() 计算好的键，返回其中新发现的数量"""
+        keys = set(keys)
+        keys.discard(None)
+        new_keys = keys - self.visited - self.pending
+        self.pending |= new_keys
+        return len(new_keys)
+
+    def visit(self, key):
+        """把单个键标记为已访问（流水线模式逐个请求路径）"""
+        self.pending.discard(key)
+        self.visited.add(key)
+
+    def next_keys(self):
+        """取出全部待请求的键并标记为已访问；api_first 时接口路径在前"""
+        if self.api_first:
+            order = lambda key: (not is_api_path(self.path(key)), self.path(key))
+        else:
+            order = self.path
+        keys = sorted(self.pending, key=order)
+        self.visited |= self.pending
+        self.pending = set()
+        return keys
+
+    def next_batch(self):
+        """取出全部待请求路径并标记为已访问"""
+        return [self.path(key) for key in self.next_keys()]
+
+    def state(self):
+        """导出可写入检查点的状态（按模板去重时保存代表路径）"""
+        return {"pending": sorted(map(self.path, self.pending)),
+                "visited": sorted(map(self.path, self.visited))}
+
+    def restore(self, state):
+        self.pending = set()
+        self.visited = set()
+        self.add(state.get("visited", []))
+        self.visited, self.pending = self.pending, set()
+        self.add(state.get("pending", []))
+
+    def __bool__(self):
+        return bool(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
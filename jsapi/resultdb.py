@@ -0,0 +1,169 @@
+"""结果数据库
+
+把提取结果按运行保存到 SQLite，路径、分类、文件名和内容摘要上都有索引，
+查询某个路径前缀被哪些文件引用、比较两次运行的差异都不需要重新扫描。
+结果先缓冲在内存中，每 BATCH_SIZE 条在一个事务中批量写入。
+path.txt 可以随时从数据库重新导出（见 results-db.py）。
+"""
+import os
+import time
+import sqlite3
+import threading
+
+# 运行的种类：scanner 为 re-simple.py / re-api-dir.py 的扫描结果，final 为 url-js.py 的最终分析结果
+KIND_SCANNER = "scanner"
+KIND_FINAL = "final"
+# 每个事务写入的结果条数
+BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    source TEXT,
+    target TEXT,
+    started TEXT NOT NULL,
+    files INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    category TEXT NOT NULL,
+    path TEXT NOT NULL,
+    label TEXT NOT NULL,
+    file TEXT NOT NULL,
+    sha256 TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS results_unique ON results(run_id, path, category, label, file);
+CREATE INDEX IF NOT EXISTS results_path ON results(path);
+CREATE INDEX IF NOT EXISTS results_category ON results(category, path);
+CREATE INDEX IF NOT EXISTS results_file ON results(file);
+CREATE INDEX IF NOT EXISTS results_sha256 ON results(sha256);
+"""
+
+GLOB_CHARS = "*?["
+
+
+def to_glob(pattern):
+    """查询模式转换为 GLOB：含 * ? [ 时按通配符匹配，否则按前缀匹配"""
+    if any(c in pattern for c in GLOB_CHARS):
+        return pattern
+    return pattern + "*"
+
+
+class ResultDB:
+    """SQLite 结果数据库；可以在多个线程中共用（批量模式中各目标写入同一个数据库）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ---- 写入 ----
+    def begin_run(self, kind, table, source=None, target=None):
+        """登记一次运行，返回运行编号"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (kind, table_name, source, target, started) VALUES (?, ?, ?, ?, ?)",
+                (kind, table, source, target, time.strftime('%Y-%m-%d %H:%M:%S')))
+            return cursor.lastrowid
+
+    def add(self, run_id, category, path, label, file, sha256=None):
+        """缓冲一条结果，攒够 BATCH_SIZE 条时写入；同一运行中重复的结果只保留一条"""
+        with self.lock:
+            self.pending.append((run_id, category, path, label, file, sha256))
+            if len(self.pending) < BATCH_SIZE:
+                return
+        self.flush()
+
+    def flush(self):
+        """在一个事务中写入所有缓冲的结果"""
+        with self.lock:
+            if not self.pending:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO results (run_id, category, path, label, file, sha256) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+            self.pending = []
+
+    def finish_run(self, run_id, files):
+        """写入剩余结果并记录分析文件数"""
+        self.flush()
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE runs SET files = ? WHERE id = ?", (files, run_id))
+
+    # ---- 查询 ----
+    def runs(self):
+        return self.conn.execute("SELECT runs.*, (SELECT COUNT(*) FROM results WHERE run_id = runs.id) "
+                                 "AS results FROM runs ORDER BY id").fetchall()
+
+    def run(self, run_id=None):
+        """返回编号为 run_id 的运行（默认最近一次），不存在时返回 None"""
+        if run_id is None:
+            return self.conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+    def query(self, pattern, run_id=None, category=None, file=None):
+        """按路径前缀或通配符查询，run_id 为 None 时查询所有运行"""
+        sql = "SELECT * FROM results WHERE path GLOB ?"
+        args = [to_glob(pattern)]
+        if run_id is not None:
+            sql += " AND run_id = ?"
+            args.append(run_id)
+        if category is not None:
+            sql += " AND category = ?"
+            args.append(category)
+        if file is not None:
+            sql += " AND file GLOB ?"
+            args.append(to_glob(file))
+        return self.conn.execute(sql + " ORDER BY path, file, label, run_id", args).fetchall()
+
+    def iter_results(self, run_id):
+        """逐条产出一次运行的全部结果"""
+        yield from self.conn.execute("SELECT * FROM results WHERE run_id = ?", (run_id,))
+
+    def diff(self, old_run, new_run):
+        """比较两次运行的 (分类, 路径)，返回 (新增列表, 消失列表)"""
+        sql = ("SELECT DISTINCT category, path FROM results WHERE run_id = ? EXCEPT "
+               "SELECT category, path FROM results WHERE run_id = ? ORDER BY category, path")
+        added = self.conn.execute(sql, (new_run, old_run)).fetchall()
+        removed = self.conn.execute(sql, (old_run, new_run)).fetchall()
+        return [tuple(row) for row in added], [tuple(row) for row in removed]
+
+
+class RunWriter:
+    """向数据库写入一次运行的结果，按文件名缓存内容摘要"""
+
+    def __init__(self, db, kind, table, source=None, target=None):
+        self.db = db
+        self.run_id = db.begin_run(kind, table, source, target)
+        self.digests = {}
+
+    def add(self, category, path, label, file_path, sha256=None):
+        """记录一条结果；未给出摘要时计算文件的 SHA-256（每个文件只计算一次）"""
+        if sha256 is None:
+            sha256 = self.digests.get(file_path)
+            if sha256 is None and os.path.exists(file_path):
+                from .analysis import file_sha256
+                sha256 = self.digests[file_path] = file_sha256(file_path)
+        self.db.add(self.run_id, category, path, label, os.path.basename(file_path), sha256)
+
+    def finish(self, files):
+        self.db.finish_run(self.run_id, files)
+        print(f"🗃️ 结果已写入数据库 {self.db.path}（运行 #{self.run_id}）")
@@ -0,0 +1,241 @@
+"""路由规范化与前缀树聚合
+
+从JS中提取到的路径形式各异：/api/user/1、/api/user/2、api/user/{id}、/api/user/${userId}、
+./user/list ……逐条请求和输出会带来大量重复。这里把每个路径规范化后插入前缀树：
+
+- 数字、UUID、长十六进制标识和模板片段（:id、{id}、${id}、<int:id>）归为同一个参数节点，
+  参数名优先取模板中显式写出的名字
+- ./、../ 等相对形式按目标页面所在目录解析，其余不以 / 开头的路径视为根路径，去掉查询串和片段
+- MIME 类型、name: 组件名、非 http 协议等明显不是路由的值直接过滤
+
+同一个模板下的路径只保留一个代表路径（优先为具体值而不是模板，其次取字典序最小的，
+与插入顺序无关），抓取时只请求代表路径。
+"""
+import re
+import posixpath
+from urllib.parse import urlparse
+
+# 参数节点在模板键中的占位
+PARAM = None
+
+NUMERIC = re.compile(r'^\d+$')
+UUID = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+HEX_ID = re.compile(r'^(?=[a-fA-F]*\d)[0-9a-fA-F]{16,}$')
+# 整段为模板参数：:id、:id(\\d+)?、{id}、{{id}}、${row.id}、<int:id>
+WHOLE_PARAM = re.compile(
+    r'^(?::([A-Za-z_$][\w$]*)(?:\([^)]*\))?[?*+]?'
+    r'|\{\{?\s*([A-Za-z_$][\w$]*)\s*\}?\}'
+    r'|\$\{([^}]*)\}'
+    r'|<(?:\w+:)?([A-Za-z_]\w*)>)$')
+INLINE_PARAM = re.compile(r'\$\{([^}]*)\}|\{\{?\s*([A-Za-z_$][\w$]*)\s*\}?\}')
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+MIME_TYPE = re.compile(r'^(?:application|text|image|audio|video|multipart|font|model|message)/'
+                       r'[\w.+-]+(?:\s*;.*)?$', re.IGNORECASE)
+ABSOLUTE_URL = re.compile(r'^(?:[A-Za-z][\w+.-]*:)?//')
+OTHER_SCHEME = re.compile(r'^[A-Za-z][\w+.-]*:')
+
+
+def _expression_name(expression):
+    """模板表达式中最后一个标识符作为参数名，如 ${row.id} -> id"""
+    names = IDENTIFIER.findall(expression)
+    return names[-1] if names else "param"
+
+
+def classify_segment(segment):
+    """返回 (参数名或 None, 显式命名与否, 字面文本)；字面段中的内联模板替换为 {名字}"""
+    match = WHOLE_PARAM.match(segment)
+    if match:
+        name = next(group for group in match.groups() if group is not None)
+        if match.group(3) is not None:
+            name = _expression_name(name)
+        return name, True, None
+    if NUMERIC.match(segment):
+        return "id", False, None
+    if UUID.match(segment):
+        return "uuid", False, None
+    if HEX_ID.match(segment):
+        return "hash", False, None
+    literal = INLINE_PARAM.sub(
+        lambda m: "{" + (_expression_name(m.group(1)) if m.group(1) is not None else m.group(2)) + "}",
+        segment)
+    return None, False, literal
+
+
+def is_route(raw, label=None):
+    """过滤明显不是路由的值：空值、含空白、MIME 类型、name: 组件名、非 http 协议"""
+    value = raw.strip()
+    if not value or any(c.isspace() for c in value):
+        return False
+    if label == "name" and '/' not in value:
+        return False
+    if value.startswith('#') and not value.startswith('#/'):
+        return False
+    if not value.startswith(('/', '.', '#')):
+        if MIME_TYPE.match(value):
+            return False
+        if OTHER_SCHEME.match(value) and not ABSOLUTE_URL.match(value):
+            return False
+    return True
+
+
+class _Node:
+    __slots__ = ("children", "names", "terminal", "sample", "templated")
+
+    def __init__(self):
+        self.children = {}  # 字面段或 PARAM -> _Node
+        self.names = {}     # 参数名 -> [显式命名次数, 推断次数]（只用于参数节点）
+        self.terminal = False
+        self.sample = None  # 代表路径：具体路径优先于模板路径，同类中取字典序最小的
+        self.templated = False
+
+
+class PathTrie:
+    """路径前缀树：按来源（同源为 None）分根，参数段合并为同一个子节点
+
+    base_url 为目标页面的URL，./、../ 形式按其所在目录解析，同源的完整URL只取路径部分。
+    """
+
+    def __init__(self, base_url=None):
+        parsed = urlparse(base_url or "/")
+        self.origin = f"{parsed.scheme}://{parsed.netloc}".lower() if parsed.netloc else None
+        path = parsed.path or "/"
+        self.base_dir = path if path.endswith('/') else posixpath.dirname(path) + '/'
+        self.roots = {}
+        self.count = 0
+
+    def split(self, raw, label=None):
+        """规范化路径，返回 (来源, 段列表)；不是路由时返回 None"""
+        if not is_route(raw, label):
+            return None
+        value = raw.strip()
+        if value.startswith('#'):
+            value = value[1:]  # hash 路由 #/xxx
+        origin = None
+        if ABSOLUTE_URL.match(value):
+            parsed = urlparse(value if '://' in value else "http:" + value)
+            origin = f"{parsed.scheme}://{parsed.netloc}".lower()
+            if value.startswith('//'):
+                origin = "//" + parsed.netloc.lower()
+            value = parsed.path or "/"
+            if origin == self.origin or (self.origin and origin == "//" + self.origin.split("://", 1)[1]):
+                origin = None
+        value = re.split(r'[?#]', value, 1)[0]
+        if value.startswith('.'):
+            value = self.base_dir + value
+        elif not value.startswith('/'):
+            value = '/' + value
+        value = posixpath.normpath(re.sub(r'/+', '/', value))
+        return origin, [segment for segment in value.split('/') if segment and segment != '.']
+
+    def key(self, raw, label=None):
+        """路径的模板键 (来源, 段...)，参数段为 PARAM；不是路由时返回 None"""
+        parts = self.split(raw, label)
+        if parts is None:
+            return None
+        origin, segments = parts
+        key = [origin]
+        for segment in segments:
+            name, _, literal = classify_segment(segment)
+            key.append(PARAM if name is not None else literal)
+        return tuple(key)
+
+    def add(self, raw, label=None):
+        """插入一个路径，返回其模板键；不是路由时返回 None"""
+        parts = self.split(raw, label)
+        if parts is None:
+            return None
+        origin, segments = parts
+        node = self.roots.setdefault(origin, _Node())
+        key = [origin]
+        templated = False
+        for segment in segments:
+            name, explicit, literal = classify_segment(segment)
+            child_key = PARAM if name is not None else literal
+            node = node.children.setdefault(child_key, _Node())
+            if name is not None:
+                counts = node.names.setdefault(name, [0, 0])
+                counts[0 if explicit else 1] += 1
+            templated = templated or explicit or (name is None and literal != segment)
+            key.append(child_key)
+        sample = (origin or "") + "/" + "/".join(segments)
+        if not node.terminal:
+            self.count += 1
+        # 代表路径与插入顺序无关：具体路径优先于模板路径，其次取字典序最小的
+        if not node.terminal or (templated, sample) < (node.templated, node.sample):
+            node.terminal = True
+            node.sample = sample
+            node.templated = templated
+        return tuple(key)
+
+    def _node(self, key):
+        node = self.roots.get(key[0])
+        for child_key in key[1:]:
+            if node is None:
+                return None
+            node = node.children.get(child_key)
+        return node
+
+    def sample(self, key):
+        """模板键对应的代表路径（优先为不含模板片段的具体路径）"""
+        node = self._node(key)
+        return node.sample if node is not None else None
+
+    def display(self, key):
+        """模板键的显示形式，如 /api/user/{id}；参数名优先取显式命名中出现最多的"""
+        node = self.roots.get(key[0])
+        segments = []
+        for child_key in key[1:]:
+            node = node.children[child_key]
+            if child_key is PARAM:
+                explicit = {name: counts[0] for name, counts in node.names.items() if counts[0]}
+                candidates = explicit or {name: counts[1] for name, counts in node.names.items()}
+                name = min(candidates, key=lambda n: (-candidates[n], n))
+                segments.append("{" + name + "}")
+            else:
+                segments.append(child_key)
+        return (key[0] or "") + "/" + "/".join(segments)
+
+    def template(self, raw, label=None):
+        """已插入路径的模板显示形式；不是路由或尚未插入时返回 None"""
+        key = self.key(raw, label)
+        if key is None or self._node(key) is None:
+            return None
+        return self.display(key)
+
+    def keys(self):
+        """按深度优先产出所有模板键"""
+        stack = [((origin,), node) for origin, node in self.roots.items()]
+        while stack:
+            key, node = stack.pop()
+            if node.terminal:
+                yield key
+            for child_key, child in node.children.items():
+                stack.append((key + (child_key,), child))
+
+    def __iter__(self):
+        """按字母顺序产出所有模板的显示形式"""
+        return iter(sorted(self.display(key) for key in self.keys()))
+
+    def __len__(self):
+        return self.count
+
+
+def aggregate_results(sink, target, base_url=None, skip_groups=("Object",)):
+    """把 sink 中的结果按路由模板聚合写入 target（另一个 ResultSink），返回 target
+
+    结果元组的第一列为路径，第二列为标签，其余列原样保留；skip_groups 中的分组不是路径，原样复制。
+    """
+    trie = PathTrie(base_url)
+    for group in sink.groups:
+        if group not in skip_groups:
+            for item in sink.iter_group(group):
+                trie.add(item[0], item[1])
+    for group in sink.groups:
+        for item in sink.iter_group(group):
+            if group in skip_groups:
+                target.add(group, item)
+                continue
+            template = trie.template(item[0], item[1])
+            if template is not None:
+                target.add(group, (template,) + tuple(item[1:]))
+    return target
@@ -0,0 +1,195 @@
+"""目录扫描器
+
+按注册表中的正则表（见 patterns.py）扫描目录下的 .js 文件，逐个产出
+(分组, 匹配, 标签, 文件名)。扫描函数都返回迭代器，可以直接嵌入其他程序；
+结果的去重、排序和写出由 ResultSink 完成。识别为第三方库的文件跳过或只用精简的正则表扫描
+（见 fingerprint.py）。
+"""
+import os
+import time
+import functools
+import multiprocessing
+
+from .engine import (ResultSink, decode_span, extract_call_argument,
+                     CALL_ARGUMENT, CALL_MAX_DEPTH, CALL_MAX_SPAN, MAX_RESULTS_IN_MEMORY)
+from .metrics import METRICS, init_worker, metered, progress
+from .fingerprint import FINGERPRINTS, SKIP, report_vendor
+from .patterns import get_matcher, pattern_groups
+from .resultdb import RunWriter, KIND_SCANNER
+from .store import pooled_files
+from .routes import aggregate_results
+
+# 默认遍历的目录和输出文件
+DEFAULT_DIRECTORY = "js"
+DEFAULT_OUTPUT = "path.txt"
+
+
+def iter_js_files(directory, files=None):
+    """遍历目录下的所有 .js 文件；给出 files 时只遍历这些文件
+
+    批量模式的目标子目录中只有存储索引，索引指向的共用目录中属于该目标的内容文件一并遍历。
+    """
+    if files is not None:
+        yield from files
+        return
+    seen = set()
+    pooled = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith(".js"):
+                path = os.path.join(root, name)
+                seen.add(os.path.realpath(path))
+                yield path
+        pooled.extend(pooled_files(root))
+    for path in pooled:
+        if os.path.realpath(path) not in seen:
+            seen.add(os.path.realpath(path))
+            yield path
+
+
+def identify_vendor(file_path):
+    """按指纹识别并记录第三方库，返回 Fingerprint 或 None（读取失败时留给扫描报告）"""
+    try:
+        fingerprint = FINGERPRINTS.identify_file(file_path)
+    except OSError:
+        return None
+    if fingerprint is not None:
+        report_vendor(file_path, fingerprint)
+    return fingerprint
+
+
+def iter_file_results(file_path, table="api-dir", max_depth=CALL_MAX_DEPTH, max_span=CALL_MAX_SPAN,
+                      reduced=None):
+    """用正则表 table 扫描单个文件，逐个产出 (分组, 匹配, 标签, 文件名)
+
+    reduced 为 None 时先识别第三方库：需跳过的库不扫描，其他识别出的库用精简的正则表。
+    """
+    if reduced is None:
+        fingerprint = identify_vendor(file_path)
+        if fingerprint is not None and fingerprint.action == SKIP:
+            return
+        reduced = fingerprint is not None
+    matcher = get_matcher(table, reduced)
+    file = os.path.basename(file_path)
+    limited_calls = 0
+    start = time.perf_counter()
+    matches = 0
+    try:
+        # 内存映射文件并分块单遍扫描，只解码匹配到的片段
+        for group, label, group_idx, match in matcher.iter_file(file_path):
+            matches += 1
+            try:
+                # GET/POST 调用：有界地提取第一个字符串参数
+                if group_idx == CALL_ARGUMENT:
+                    extracted, status = extract_call_argument(match.string, match.end(), match.endpos,
+                                                              max_depth, max_span)
+                    if status == "limit":
+                        limited_calls += 1
+                    elif extracted:
+                        yield (group, decode_span(extracted), label, file)
+                elif group_idx > 0:  # 需要提取捕获组
+                    yield (group, decode_span(match.group(group_idx)), label, file)
+                else:  # 不需要提取捕获组（Object模式）
+                    yield (group, decode_span(match.group(0)), label, file)
+
+            except IndexError:
+                continue  # 忽略无效的组索引
+    except Exception as e:
+        print(f"无法读取文件 {file_path}: {e}")
+        return
+    if limited_calls:
+        METRICS.count("超出限制的调用", limited_calls)
+        progress(f"⚠️ {file_path}: {limited_calls} 处 get/post 调用超出嵌套深度或长度限制，已跳过")
+    if METRICS.enabled:
+        METRICS.file_scanned(file_path, time.perf_counter() - start, os.path.getsize(file_path), matches)
+
+
+def scan_file(file_path, table="api-dir", max_depth=CALL_MAX_DEPTH, max_span=CALL_MAX_SPAN, reduced=None):
+    """扫描单个文件，返回去重后的 [(分组, 匹配, 标签, 文件名), ...]（供进程池使用）"""
+    return list(dict.fromkeys(iter_file_results(file_path, table, max_depth, max_span, reduced)))
+
+
+def _scan_task(task, table, max_depth, max_span):
+    file_path, reduced = task
+    return scan_file(file_path, table, max_depth, max_span, reduced)
+
+
+def scan_directory(directory, table="api-dir", workers=1, max_depth=CALL_MAX_DEPTH, max_span=CALL_MAX_SPAN):
+    """扫描目录，逐个产出 (分组, 匹配, 标签, 文件名)
+
+    workers 大于 1 时把文件分片到多个进程中扫描，每个文件的结果扫描完即流式返回；
+    第三方库在主进程中识别，子进程不需要指纹库的配置。
+    """
+    files = list(iter_js_files(directory))
+    if workers <= 1 or len(files) <= 1:
+        for file_path in files:
+            yield from iter_file_results(file_path, table, max_depth, max_span)
+        return
+    tasks = []
+    for file_path in files:
+        fingerprint = identify_vendor(file_path)
+        if fingerprint is None or fingerprint.action != SKIP:
+            tasks.append((file_path, fingerprint is not None))
+    scan = functools.partial(_scan_task, table=table, max_depth=max_depth, max_span=max_span)
+    chunksize = max(1, min(32, len(tasks) // (workers * 4)))
+    if not METRICS.enabled:
+        with multiprocessing.Pool(workers) as pool:
+            for results in pool.imap_unordered(scan, tasks, chunksize):
+                yield from results
+        return
+    # 开启指标时，子进程把每个文件的指标连同结果一起交回
+    scan = functools.partial(metered, scan)
+    with multiprocessing.Pool(workers, init_worker, (METRICS.quiet,)) as pool:
+        for results, snapshot in pool.imap_unordered(scan, tasks, chunksize):
+            METRICS.merge(snapshot)
+            yield from results
+
+
+def open_sink(table="api-dir", max_items=MAX_RESULTS_IN_MEMORY):
+    """创建接收扫描结果的 ResultSink：结果到达即去重，按路径、文件名、标签排序"""
+    return ResultSink(pattern_groups(table), sort_key=lambda x: (x[0], x[2], x[1]), max_items=max_items)
+
+
+def format_result(item, widths):
+    """路径、标签按列宽对齐，最后是文件名"""
+    path, label, filename = item
+    return f"{path.ljust(widths[0])}\t{label.ljust(widths[1])}\t{filename}\n"
+
+
+def write_results(sink, output_file):
+    """将去重后的结果按分组排序、对齐后写入文件"""
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            sink.write(f, format_result)
+        print(f"匹配的路径已按分类写入 {output_file}")
+    except Exception as e:
+        print(f"无法写入文件 {output_file}: {e}")
+
+
+def run(directory, output_file, table="api-dir", workers=1, max_depth=CALL_MAX_DEPTH,
+        max_span=CALL_MAX_SPAN, max_items=MAX_RESULTS_IN_MEMORY, db=None, normalize=False):
+    """扫描目录并把结果写入 output_file（命令行入口共用）；给出 db（ResultDB）时同时写入数据库
+
+    normalize 为真时路径按路由模板聚合后输出（Object 分组原样保留），数据库中仍保存原始结果。
+    """
+    writer = RunWriter(db, KIND_SCANNER, table, directory) if db is not None else None
+    # 结果中只有文件名，写入数据库时按文件名找回完整路径计算内容摘要
+    file_paths = {os.path.basename(path): path for path in iter_js_files(directory)} if writer else {}
+    with open_sink(table, max_items) as sink:
+        with METRICS.stage("扫描", profile=True):
+            for group, match, label, file in scan_directory(directory, table, workers, max_depth, max_span):
+                sink.add(group, (match, label, file))
+                if writer is not None:
+                    writer.add(group, match, label, file_paths.get(file, file))
+        if writer is not None:
+            writer.finish(len(file_paths))
+
+        # 将结果写入 path.txt 文件（按路由模板聚合时写出聚合后的结果）
+        if normalize:
+            with METRICS.stage("路由聚合"):
+                routes_sink = aggregate_results(sink, open_sink(table, max_items))
+            with routes_sink, METRICS.stage("写出结果"):
+                write_results(routes_sink, output_file)
+        else:
+            with METRICS.stage("写出结果"):
+                write_results(sink, output_file)
@@ -0,0 +1,241 @@
+"""自适应请求调度
+
+按服务器的响应调整每个主机同时进行的请求数（AIMD）：
+
+- 每个成功的响应使窗口增大（慢启动阶段每次加 1，之后每个窗口加 1）
+- 429/503 或响应时间明显变慢（超过基线的 LATENCY_FACTOR 倍）时窗口减半，每个往返时间最多减一次
+- 429/503 带 Retry-After 时整个主机暂停到指定时间，否则按带抖动的指数退避暂停
+- 连接失败、超时和 502/504 按带抖动的指数退避重试，每个请求有总的截止时间
+- 连续失败 BREAKER_THRESHOLD 次的主机熔断一段时间，期间的请求直接失败，到期后放行一个试探请求
+
+只依赖标准库；包装 requests 适配器的 ScheduledAdapter 见 crawler.py。
+"""
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+from .metrics import METRICS, progress
+
+# 单次请求的超时（秒）、失败后的重试次数、每个请求（含重试）的总时限（秒）
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_DEADLINE = 60.0
+# 每个主机的初始窗口与窗口上限（实际并发还受线程池大小限制）
+INITIAL_WINDOW = 4
+MAX_WINDOW = 64
+# 响应时间的平滑系数，超过基线多少倍视为拥塞
+LATENCY_ALPHA = 0.2
+LATENCY_FACTOR = 3.0
+# 基线低于该值（秒）时按该值计算，避免本地或极快的主机因微小抖动被判为拥塞
+LATENCY_FLOOR = 0.05
+# 退避的基数与上限（秒），Retry-After 的上限
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+MAX_RETRY_AFTER = 300.0
+# 连续失败多少次熔断，熔断时长的初值与上限（秒）
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 300.0
+
+# 请求结果的分类
+OK = "ok"
+THROTTLED = "throttled"
+FAILED = "failed"
+THROTTLE_STATUS = (429, 503)
+RETRY_STATUS = (502, 504)
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态，请求未发出"""
+
+
+class DeadlineExceeded(Exception):
+    """等待发送许可时超过了请求的截止时间"""
+
+
+def parse_retry_after(value, now=None):
+    """解析 Retry-After（秒数或 HTTP 日期），返回需要等待的秒数，无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - (now or time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """第 attempt 次重试前的等待时间：指数退避加完全抖动"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class HostState:
+    """单个主机的拥塞窗口、暂停时间和熔断状态"""
+
+    def __init__(self, window, max_window):
+        self.cond = threading.Condition()
+        self.window = float(window)
+        self.threshold = float(max_window)  # 慢启动阈值
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttles = 0          # 连续限流次数（无 Retry-After 时决定暂停时长）
+        self.failures = 0           # 连续失败次数
+        self.open_until = 0.0       # 熔断到期时间，0 表示未熔断
+        self.cooldown = BREAKER_COOLDOWN
+        self.probing = False        # 熔断到期后的试探请求是否在进行中
+        self.latency = None         # 平滑后的响应时间
+        self.baseline = None        # 观察到的最短响应时间
+        self.last_decrease = 0.0
+
+
+class AdaptiveScheduler:
+    """按主机的自适应调度器，可以在多个线程和多个目标之间共用
+
+    enabled 为假时 create_adapter 不包装调度适配器，请求只使用固定的 timeout。
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, deadline=DEFAULT_DEADLINE,
+                 initial_window=INITIAL_WINDOW, max_window=MAX_WINDOW):
+        self.enabled = True
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = deadline
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.stats = {"retries": 0, "throttled": 0, "slowdowns": 0, "breaks": 0, "rejected": 0}
+
+    def host(self, host):
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = HostState(self.initial_window, self.max_window)
+            return state
+
+    def _count(self, name, metric):
+        with self.lock:
+            self.stats[name] += 1
+        METRICS.count(metric)
+
+    def acquire(self, host, deadline=None):
+        """等待主机的发送许可；熔断中抛出 CircuitOpenError，超过 deadline（monotonic 时间）抛出 DeadlineExceeded"""
+        state = self.host(host)
+        with state.cond:
+            while True:
+                now = time.monotonic()
+                wait = None
+                if state.open_until:
+                    if now < state.open_until or state.probing:
+                        self._count("rejected", "熔断拒绝的请求")
+                        raise CircuitOpenError(f"主机 {host} 连续失败，已熔断")
+                    state.probing = True
+                    state.in_flight += 1
+                    return
+                if now < state.blocked_until:
+                    wait = state.blocked_until - now
+                elif state.in_flight < int(state.window):
+                    state.in_flight += 1
+                    return
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise DeadlineExceeded(f"等待主机 {host} 超过截止时间")
+                    wait = remaining if wait is None else min(wait, remaining)
+                state.cond.wait(wait)
+
+    def release(self, host, outcome, latency=None, retry_after=None):
+        """归还许可并按结果调整窗口：OK 增大，THROTTLED 减半并暂停主机，FAILED 计入熔断"""
+        state = self.host(host)
+        with state.cond:
+            now = time.monotonic()
+            state.in_flight -= 1
+            probing, state.probing = state.probing, False
+            if outcome == OK:
+                state.failures = 0
+                state.throttles = 0
+                if state.open_until:
+                    state.open_until = 0.0
+                    state.cooldown = BREAKER_COOLDOWN
+                    progress(f"🟢 主机 {host} 恢复，解除熔断")
+                if latency is not None and self._observe_latency(state, latency, now):
+                    self._decrease(state, now)
+                    self._count("slowdowns", "响应变慢降低并发")
+                elif state.window < state.threshold:
+                    state.window = min(state.window + 1, self.max_window)
+                else:
+                    state.window = min(state.window + 1 / state.window, self.max_window)
+            elif outcome == THROTTLED:
+                state.throttles += 1
+                self._decrease(state, now)
+                pause = retry_after if retry_after is not None else backoff_delay(state.throttles)
+                state.blocked_until = max(state.blocked_until, now + pause)
+                self._count("throttled", "限流响应")
+                progress(f"🐢 主机 {host} 限流，并发降至 {int(state.window)}，暂停 {pause:.1f} 秒")
+            else:
+                state.failures += 1
+                if probing or (not state.open_until and state.failures >= BREAKER_THRESHOLD):
+                    if probing:
+                        state.cooldown = min(state.cooldown * 2, BREAKER_MAX_COOLDOWN)
+                    state.open_until = now + state.cooldown
+                    self._count("breaks", "熔断次数")
+                    progress(f"🔴 主机 {host} 连续失败 {state.failures} 次，熔断 {state.cooldown:.0f} 秒")
+            state.cond.notify_all()
+
+    def _observe_latency(self, state, latency, now):
+        """更新平滑响应时间与基线，返回是否判为拥塞（每个往返时间最多一次）"""
+        state.baseline = latency if state.baseline is None else min(state.baseline, latency)
+        state.latency = latency if state.latency is None else (
+            (1 - LATENCY_ALPHA) * state.latency + LATENCY_ALPHA * latency)
+        congested = state.latency > LATENCY_FACTOR * max(state.baseline, LATENCY_FLOOR)
+        return congested and now - state.last_decrease > state.latency
+
+    def _decrease(self, state, now):
+        """乘性减小窗口，同一个往返时间内的多次拥塞信号只减一次"""
+        if now - state.last_decrease <= (state.latency or 0):
+            return
+        state.window = max(1.0, state.window / 2)
+        state.threshold = state.window
+        state.last_decrease = now
+
+    def blocked_until(self, host):
+        """主机暂停到的 monotonic 时间"""
+        return self.host(host).blocked_until
+
+    def retried(self):
+        self._count("retries", "重试次数")
+
+    def report(self):
+        """打印调度统计"""
+        stats = self.stats
+        windows = ", ".join(f"{host} {int(state.window)}" for host, state in sorted(self.hosts.items()))
+        print(f"🚦 自适应调度: 重试 {stats['retries']} 次，限流响应 {stats['throttled']} 次，"
+              f"响应变慢降速 {stats['slowdowns']} 次，熔断 {stats['breaks']} 次"
+              f"（拒绝 {stats['rejected']} 个请求）" + (f"；当前并发窗口: {windows}" if windows else ""))
+
+
+# 全局调度器，各入口通过 configure_from_args 配置
+SCHEDULER = AdaptiveScheduler()
+
+
+def add_arguments(parser):
+    """调度相关的命令行参数"""
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单次请求的超时（秒）")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="连接失败、超时、429/502/503/504 时的最大重试次数")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help="每个请求（含重试和等待）的总时限（秒）")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="不按服务器响应调整并发、不重试，只使用固定的超时")
+
+
+def configure_from_args(args):
+    SCHEDULER.enabled = not args.no_adaptive
+    SCHEDULER.timeout = args.timeout
+    SCHEDULER.retries = max(0, args.retries)
+    SCHEDULER.deadline = args.deadline
@@ -0,0 +1,329 @@
+"""持久化存储
+
+爬取输出目录中的几类持久化数据：按内容寻址的JS文件存储、HTTP 条件请求缓存和断点续爬检查点。
+"""
+import os
+import json
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from .planner import canonicalize_url
+
+# HTTP条件请求缓存的默认大小上限（MB）
+DEFAULT_HTTP_CACHE_SIZE = 256
+
+def get_valid_filename(url):
+    """从URL生成有效的文件名"""
+    parsed = urlparse(url)
+    name = parsed.path.split("/")[-1] or "index"
+    if not name.endswith('.js'):
+        name += '.js'
+    name = ''.join(c for c in name if c.isalnum() or c in ['-', '_', '.'])
+    return name
+
+# ================== 内容寻址存储 ==================
+class JsStore:
+    """按内容 SHA-256 寻址的JS文件存储
+
+    相同内容只保存一份；URL→摘要 索引持久化在目录中，
+    已下载过的URL（包括之前的运行）在发出请求前即可跳过。
+    给出 pool（另一个 JsStore）时内容文件统一保存在 pool 的目录中，多个目标共用同一份内容，
+    本实例只记录自己用到的URL和内容；其他目标下载过的URL可以直接领用（见 adopt）。
+    """
+    INDEX_NAME = ".jsstore.json"
+
+    def __init__(self, directory, pool=None):
+        self.directory = directory
+        self.index_path = os.path.join(directory, self.INDEX_NAME)
+        self.pool = pool
+        self.object_dir = pool.directory if pool is not None else directory
+        self.urls = {}     # 规范化URL -> 摘要
+        self.objects = {}  # 摘要 -> 文件名
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    def load(self):
+        """加载索引，忽略已被删除的文件"""
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 无法读取存储索引 {self.index_path}: {e}")
+            return
+        self.objects = {digest: name for digest, name in data.get("objects", {}).items()
+                        if os.path.exists(os.path.join(self.object_dir, name))}
+        self.urls = {url: digest for url, digest in data.get("urls", {}).items()
+                     if digest in self.objects}
+
+    def save(self):
+        """原子地写回索引"""
+        if self.pool is not None:
+            self.pool.save()
+        with self.lock:
+            data = {"urls": self.urls, "objects": self.objects}
+            if self.pool is not None:
+                # 内容文件所在的共用目录（相对于本目录），只读取索引的工具据此找到内容
+                data["pool"] = os.path.relpath(self.pool.directory, self.directory)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    def has_url(self, url):
+        return canonicalize_url(url) in self.urls
+
+    def put(self, url, content, digest=None):
+        """保存内容，返回 (文件路径, 对本存储是否为新内容)"""
+        digest = digest or hashlib.sha256(content).hexdigest()
+        if self.pool is not None:
+            filepath, _ = self.pool.put(url, content, digest)
+            return self._record(url, digest, os.path.basename(filepath))
+        with self.lock:
+            self.urls[canonicalize_url(url)] = digest
+            name = self.objects.get(digest)
+            if name is not None:
+                return os.path.join(self.directory, name), False
+            stem = os.path.splitext(get_valid_filename(url))[0]
+            name = f"{stem}.{digest[:16]}.js"
+            filepath = os.path.join(self.directory, name)
+            with open(filepath, 'wb') as f:
+                f.write(content)
+            self.objects[digest] = name
+            return filepath, True
+
+    def adopt(self, url):
+        """URL 已由共用 pool 的其他目标下载过时直接领用，返回 (文件路径, 对本存储是否为新内容)，否则返回 None"""
+        if self.pool is None or self.has_url(url):
+            return None
+        key = canonicalize_url(url)
+        with self.pool.lock:
+            digest = self.pool.urls.get(key)
+            name = self.pool.objects.get(digest)
+        if name is None:
+            return None
+        return self._record(url, digest, name)
+
+    def _record(self, url, digest, name):
+        with self.lock:
+            self.urls[canonicalize_url(url)] = digest
+            is_new = digest not in self.objects
+            self.objects[digest] = name
+        return os.path.join(self.object_dir, name), is_new
+
+    def file_urls(self):
+        """返回 文件路径 -> 下载过该内容的URL列表"""
+        with self.lock:
+            result = {}
+            for url, digest in self.urls.items():
+                filepath = os.path.join(self.object_dir, self.objects[digest])
+                result.setdefault(filepath, []).append(url)
+            return result
+
+    def files(self):
+        """返回所有唯一内容的文件路径"""
+        with self.lock:
+            return [os.path.join(self.object_dir, name) for name in sorted(self.objects.values())]
+
+def pooled_files(directory):
+    """目录中的存储索引指向共用目录时，返回其中属于本目录的内容文件路径，否则返回空列表
+
+    批量模式的目标子目录只保存索引，内容文件都在共用目录中。
+    """
+    index_path = os.path.join(directory, JsStore.INDEX_NAME)
+    if not os.path.exists(index_path):
+        return []
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 无法读取存储索引 {index_path}: {e}")
+        return []
+    if not data.get("pool"):
+        return []
+    object_dir = os.path.normpath(os.path.join(directory, data["pool"]))
+    paths = (os.path.join(object_dir, name) for name in sorted(set(data.get("objects", {}).values())))
+    return [path for path in paths if os.path.exists(path)]
+
+# ================== HTTP 条件请求缓存 ==================
+class HttpCache:
+    """持久化的HTTP条件请求缓存
+
+    按URL保存响应体及其 ETag/Last-Modified，之后的运行发送条件请求，
+    服务器返回 304 时直接使用本地副本；总大小超过上限时按最近最少使用淘汰。
+    """
+    DIR_NAME = ".httpcache"
+    INDEX_NAME = "index.json"
+    # 响应体已解码保存，这些头不能随缓存副本返回
+    DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+    def __init__(self, directory, max_bytes=DEFAULT_HTTP_CACHE_SIZE * 1024 * 1024):
+        self.directory = os.path.join(directory, self.DIR_NAME)
+        self.index_path = os.path.join(self.directory, self.INDEX_NAME)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 规范化URL -> 条目，按最近使用顺序排列
+        self.total_bytes = 0
+        self.revalidated = 0  # 304 命中次数，即省下的完整下载次数
+        self.bytes_saved = 0
+        self.stored = 0
+        self.evicted = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.load()
+
+    def load(self):
+        """加载索引，忽略缺失的响应体并清理索引之外的残留文件"""
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 无法读取HTTP缓存索引 {self.index_path}: {e}")
+                data = {}
+            for url, entry in data.get("entries", []):
+                if os.path.exists(os.path.join(self.directory, entry["file"])):
+                    self.entries[url] = entry
+                    self.total_bytes += entry["size"]
+        referenced = {entry["file"] for entry in self.entries.values()}
+        for name in os.listdir(self.directory):
+            if name.endswith(".body") and name not in referenced:
+                os.remove(os.path.join(self.directory, name))
+        self._evict()
+
+    def save(self):
+        """原子地写回索引（列表保存以保留最近使用顺序）"""
+        with self.lock:
+            data = {"entries": list(self.entries.items())}
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    def conditional_headers(self, url):
+        """返回发送条件请求所需的请求头，未缓存时为空"""
+        with self.lock:
+            entry = self.entries.get(canonicalize_url(url))
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def lookup(self, url):
+        """读取缓存副本，返回 (响应头, 响应体)；已被淘汰时返回 None"""
+        key = canonicalize_url(url)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self.lock:
+            self.revalidated += 1
+            self.bytes_saved += len(body)
+        return entry["headers"], body
+
+    def store(self, url, response):
+        """保存带校验器的 200 响应；没有校验器或禁止存储时丢弃旧副本"""
+        key = canonicalize_url(url)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        body = response.content
+        if ((not etag and not last_modified) or len(body) > self.max_bytes
+                or 'no-store' in response.headers.get('Cache-Control', '').lower()):
+            with self.lock:
+                self._remove(key)
+            return
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest() + ".body"
+        filepath = os.path.join(self.directory, name)
+        tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        with self.lock:
+            self._remove(key, delete_file=False)
+            os.replace(tmp_path, filepath)
+            self.entries[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "headers": {k: v for k, v in response.headers.items()
+                            if k.lower() not in self.DROPPED_HEADERS},
+                "file": name,
+                "size": len(body),
+            }
+            self.total_bytes += len(body)
+            self.stored += 1
+            self._evict()
+
+    def _remove(self, key, delete_file=True):
+        """移除条目（调用方需持有锁）"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry["size"]
+        if delete_file:
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """超过大小上限时淘汰最近最少使用的条目"""
+        while self.total_bytes > self.max_bytes and self.entries:
+            self._remove(next(iter(self.entries)))
+            self.evicted += 1
+
+    def report(self):
+        print(f"🗄️ HTTP缓存: 304 命中 {self.revalidated} 次（省下 {self.revalidated} 次完整下载，"
+              f"{self.bytes_saved / 1024:.1f} KB），新缓存 {self.stored} 个响应，淘汰 {self.evicted} 个，"
+              f"当前 {len(self.entries)} 个/{self.total_bytes / 1024 / 1024:.1f} MB")
+
+# ================== 断点续爬 ==================
+class CrawlCheckpoint:
+    """爬取进度检查点：gzip 压缩的 JSON，原子写入
+
+    记录目标URL、所处阶段、循环计数、抓取边界、已请求的URL和已分析的文件；
+    URL→文件映射和每个文件的分析结果分别由 JsStore、AnalysisCache 持久化。
+    """
+    FILE_NAME = ".crawl_checkpoint.json.gz"
+    VERSION = 1
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, self.FILE_NAME)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """读取检查点，不存在或无法读取时返回 None"""
+        if not self.exists():
+            return None
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"⚠️ 无法读取检查点 {self.path}: {e}")
+            return None
+        if state.get("version") != self.VERSION:
+            print(f"⚠️ 检查点版本不兼容，忽略: {self.path}")
+            return None
+        return state
+
+    def save(self, state):
+        """原子地写入检查点"""
+        state = dict(state, version=self.VERSION)
+        tmp_path = self.path + ".tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
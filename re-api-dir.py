@@ -1,104 +1,44 @@
 import os
-import regex
+import argparse
+from jsapi.engine import CALL_MAX_DEPTH, CALL_MAX_SPAN, MAX_RESULTS_IN_MEMORY
+from jsapi.metrics import METRICS, add_arguments, configure_from_args
+from jsapi import fingerprint
+from jsapi.resultdb import ResultDB
+from jsapi.scanner import DEFAULT_DIRECTORY, DEFAULT_OUTPUT, run
 
-# 定义匹配的正则表达式和分类标签
-pattern_groups = {
-    "PagePath Matches": [
-        # 匹配 pagePath: 后面的字符串，支持转义引号
-        (regex.compile(r"(?i)pagePath:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "pagePath", 1)
-    ],
-    "Path Matches": [
-        # 匹配 path: 后面的字符串，支持转义引号
-        (regex.compile(r"(?i)path:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "path", 1),
-        # 匹配 url: 后面的字符串，支持转义引号
-        (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "url", 1),
-        # 匹配 name: 后面的字符串，支持转义引号
-        (regex.compile(r"(?i)name:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]", regex.DOTALL), "name", 1),
-    ],
-    "GET Matches": [
-        # 递归匹配 get(...) 中的第一个字符串参数，支持嵌套括号
-        (regex.compile(r'(?i)(get)\(((?:[^()]|(?R))++)\)', regex.DOTALL), "", 2),
-        # 匹配 url: "...", method: "get" 模式
-        (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]\s*,\s*method:\s*['\"]get['\"]", regex.DOTALL), "", 1),
-    ],
-    "POST Matches": [
-        # 递归匹配 post(...) 中的第一个字符串参数，支持嵌套括号
-        (regex.compile(r'(?i)(post)\(((?:[^()]|(?R))++)\)', regex.DOTALL), "", 2),
-        # 匹配 url: "...", method: "post" 模式
-        (regex.compile(r"(?i)url:\s*['\"]((?:[^'\"\\]|\\.)*)['\"]\s*,\s*method:\s*['\"]post['\"]", regex.DOTALL), "", 1),
-    ],
-    "Object": [
-        # 匹配对象模式如 key: [{ key: "" 
-        (regex.compile(r'\b[a-zA-Z][a-zA-Z0-9]*\b:\[\{\s*\b[a-zA-Z][a-zA-Z0-9]*\b:""', regex.DOTALL), "", 0)
-    ]
-}
+# 使用的正则表（定义见 jsapi/patterns.py）
+TABLE = "api-dir"
 
-# 定义要遍历的目录
-api_js_directory = "js"
-output_file = "path.txt"
+def main():
+    parser = argparse.ArgumentParser(description="从JS文件中提取API路径")
+    parser.add_argument("-d", "--directory", default=DEFAULT_DIRECTORY, help="要遍历的JS目录")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="输出文件")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="扫描进程数，0 表示使用全部CPU核心")
+    parser.add_argument("--call-max-depth", type=int, default=CALL_MAX_DEPTH,
+                        help="提取 get/post 参数时允许的最大括号嵌套深度")
+    parser.add_argument("--call-max-span", type=int, default=CALL_MAX_SPAN,
+                        help="提取 get/post 参数时最多向后扫描的字节数")
+    parser.add_argument("--max-memory-items", type=int, default=MAX_RESULTS_IN_MEMORY,
+                        help="内存中最多保留的去重结果数，超出后溢出到临时文件")
+    parser.add_argument("--normalize", action="store_true",
+                        help="按路由模板聚合输出：/api/user/1 与 /api/user/2 合并为 /api/user/{id}")
+    parser.add_argument("--db", metavar="PATH",
+                        help="把结果同时写入 SQLite 数据库（可用 results-db.py 查询、比较和导出）")
+    add_arguments(parser)
+    fingerprint.add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    fingerprint.configure_from_args(args)
+    workers = args.workers or os.cpu_count() or 1
 
-# 初始化结果存储
-matched_results = {group: [] for group in pattern_groups}
+    db = ResultDB(args.db) if args.db else None
+    try:
+        run(args.directory, args.output, TABLE, workers, args.call_max_depth, args.call_max_span,
+            args.max_memory_items, db, args.normalize)
+    finally:
+        if db is not None:
+            db.close()
+    METRICS.close(report=args.metrics)
 
-# 处理GET/POST参数的辅助函数
-def extract_first_string(input_str):
-    """从字符串中提取第一个引号包围的字符串（支持转义引号）"""
-    # 匹配单引号或双引号包围的字符串
-    str_match = regex.search(r'''['"]([^'"]*?(?:\\.[^'"]*?)*?)['"]''', input_str)
-    if str_match:
-        return str_match.group(1)
-    return None
-
-# 遍历目录下的所有 .js 文件
-for root, _, files in os.walk(api_js_directory):
-    for file in files:
-        if file.endswith(".js"):
-            file_path = os.path.join(root, file)
-            try:
-                # 打开文件并读取内容
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # 对每个分组和正则表达式进行匹配
-                    for group, patterns in pattern_groups.items():
-                        for pattern, label, group_idx in patterns:
-                            # 使用finditer处理所有匹配项
-                            for match in pattern.finditer(content):
-                                try:
-                                    if group_idx > 0:  # 需要提取捕获组
-                                        raw_value = match.group(group_idx)
-                                    else:  # 不需要提取捕获组（Object模式）
-                                        raw_value = match.group(0)
-                                    
-                                    # 特殊处理GET/POST的递归匹配
-                                    if group in ["GET Matches", "POST Matches"] and group_idx == 2:
-                                        extracted = extract_first_string(raw_value)
-                                        if extracted:
-                                            matched_results[group].append((extracted, label, file))
-                                    else:
-                                        matched_results[group].append((raw_value, label, file))
-                                
-                                except IndexError:
-                                    continue  # 忽略无效的组索引
-            except Exception as e:
-                print(f"无法读取文件 {file_path}: {e}")
-
-# 将结果写入 path.txt 文件
-try:
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for group, results in matched_results.items():
-            if results:
-                f.write(f"===== {group} =====\n")
-                # 去重、排序并对齐
-                unique_results = sorted(set(results), key=lambda x: (x[0], x[2]))  # 按路径和文件名排序
-                
-                # 计算各列最大宽度
-                max_path_len = max(len(item[0]) for item in unique_results) if unique_results else 0
-                max_label_len = max(len(item[1]) for item in unique_results) if unique_results else 0
-                
-                # 写入格式化结果
-                for path, label, filename in unique_results:
-                    f.write(f"{path.ljust(max_path_len)}\t{label.ljust(max_label_len)}\t{filename}\n")
-                f.write("\n")  # 分块之间加空行
-    print(f"匹配的路径已按分类写入 {output_file}")
-except Exception as e:
-    print(f"无法写入文件 {output_file}: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import argparse
+from jsapi.engine import ResultSink
+from jsapi.patterns import pattern_groups
+from jsapi.resultdb import ResultDB, KIND_SCANNER
+from jsapi.scanner import open_sink, write_results
+from jsapi.analysis import write_final_results
+
+# ================== 子命令 ==================
+def show_runs(db, args):
+    """列出数据库中的所有运行"""
+    runs = db.runs()
+    if not runs:
+        print("数据库中还没有运行记录")
+        return 0
+    for run in runs:
+        origin = run["target"] or run["source"] or ""
+        print(f"#{run['id']:<4} {run['started']}  {run['kind']:<7} {run['table_name']:<8} "
+              f"文件 {run['files'] if run['files'] is not None else '?':>5}  结果 {run['results']:>7}  {origin}")
+    return 0
+
+def show_query(db, args):
+    """按路径前缀或通配符查询，列出引用这些路径的文件"""
+    run_id = None
+    if not args.all_runs:
+        run = db.run(args.run)
+        if run is None:
+            print("❌ 没有找到运行记录")
+            return 1
+        run_id = run["id"]
+    rows = db.query(args.pattern, run_id, args.category, args.file)
+    widths = [max((len(row[column]) for row in rows), default=0) for column in ("path", "label", "file")]
+    for row in rows:
+        line = (f"{row['path'].ljust(widths[0])}\t{row['label'].ljust(widths[1])}\t"
+                f"{row['file'].ljust(widths[2])}\t{row['category']}")
+        if args.all_runs:
+            line += f"\t#{row['run_id']}"
+        print(line)
+    scope = "所有运行" if args.all_runs else f"运行 #{run_id}"
+    print(f"\n🔎 {scope}中匹配 {args.pattern} 的结果 {len(rows)} 条，"
+          f"涉及 {len({row['file'] for row in rows})} 个文件")
+    return 0
+
+def show_diff(db, args):
+    """比较两次运行的路径（默认为最近两次）"""
+    old_run, new_run = args.old, args.new
+    if old_run is None or new_run is None:
+        runs = db.runs()
+        if len(runs) < 2:
+            print("❌ 至少需要两次运行才能比较")
+            return 1
+        old_run, new_run = runs[-2]["id"], runs[-1]["id"]
+    added, removed = db.diff(old_run, new_run)
+    for category, path in added:
+        print(f"+ [{category}] {path}")
+    for category, path in removed:
+        print(f"- [{category}] {path}")
+    print(f"\n📊 运行 #{old_run} → #{new_run}: 新增 {len(added)} 个路径，消失 {len(removed)} 个路径")
+    return 0
+
+def export(db, args):
+    """把一次运行重新导出为 path.txt 格式"""
+    run = db.run(args.run)
+    if run is None:
+        print("❌ 没有找到运行记录")
+        return 1
+    if run["kind"] == KIND_SCANNER:
+        with open_sink(run["table_name"]) as sink:
+            for row in db.iter_results(run["id"]):
+                sink.add(row["category"], (row["path"], row["label"], row["file"]))
+            write_results(sink, args.output)
+    else:
+        sink = ResultSink(pattern_groups("final"))
+        for row in db.iter_results(run["id"]):
+            sink.add(row["category"], (row["path"], row["label"]))
+        write_final_results(sink, args.output, run["files"], run["source"], run["started"])
+    return 0
+
+# ================== 主程序 ==================
+def main():
+    parser = argparse.ArgumentParser(description="查询、比较和导出 --db 写入的结果数据库")
+    parser.add_argument("db", help="结果数据库路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("runs", help="列出所有运行").set_defaults(func=show_runs)
+
+    query = commands.add_parser("query", help="按路径前缀或通配符（* ? [...]）查询")
+    query.add_argument("pattern", help="路径前缀，如 /api/pay/；含通配符时按通配符匹配，如 /api/*/list")
+    query.add_argument("--run", type=int, help="运行编号，默认为最近一次")
+    query.add_argument("--all-runs", action="store_true", help="查询所有运行")
+    query.add_argument("--category", help="只查询该分类，如 \"GET Matches\"")
+    query.add_argument("--file", help="只查询文件名以此开头（或匹配此通配符）的结果")
+    query.set_defaults(func=show_query)
+
+    diff = commands.add_parser("diff", help="比较两次运行的路径，默认为最近两次")
+    diff.add_argument("old", type=int, nargs="?", help="旧运行编号")
+    diff.add_argument("new", type=int, nargs="?", help="新运行编号")
+    diff.set_defaults(func=show_diff)
+
+    export_parser = commands.add_parser("export", help="导出为 path.txt 格式")
+    export_parser.add_argument("--run", type=int, help="运行编号，默认为最近一次")
+    export_parser.add_argument("-o", "--output", default="path.txt", help="输出文件")
+    export_parser.set_defaults(func=export)
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ 数据库不存在: {args.db}")
+        exit(1)
+    with ResultDB(args.db) as db:
+        status = args.func(db, args)
+    if status:
+        exit(status)
+
+if __name__ == "__main__":
+    main()
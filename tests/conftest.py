@@ -0,0 +1,7 @@
+"""测试共用配置：把仓库根目录加入 sys.path，直接 import jsapi 包"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,21 @@
+"""增量分析缓存"""
+from jsapi import analysis
+from jsapi.analysis import AnalysisCache
+
+
+def test_analyze_skips_files_that_fail(tmp_path, monkeypatch):
+    good = tmp_path / "good.js"
+    good.write_text('var r = {path: "/api/good"};')
+    bad = tmp_path / "bad.js"
+    bad.write_text('var r = {path: "/api/bad"};')
+    analyze_file = analysis.analyze_file
+
+    def failing(file_path, fingerprint=None):
+        if file_path.endswith("bad.js"):
+            raise ValueError("broken content")
+        return analyze_file(file_path, fingerprint)
+
+    monkeypatch.setattr(analysis, "analyze_file", failing)
+    cache = AnalysisCache(str(tmp_path))
+    assert cache.analyze([str(bad), str(good)]) == {"/api/good"}
+    assert list(cache.file_digests) == [str(good)]
@@ -0,0 +1,132 @@
+"""engine.py：流式结果收集、组合匹配器的分块扫描，以及 get( / post( 调用参数的有界提取"""
+import io
+import os
+
+import regex
+import pytest
+
+from jsapi.engine import ResultSink, extract_call_argument
+from jsapi.patterns import get_matcher
+
+
+# ================== 流式结果收集 ==================
+def sink_output(items, max_items, tmp_dir):
+    """把 (分组, 结果) 依次加入 ResultSink 后写出，返回 (输出文本, 条数, 关闭前的临时文件)"""
+    out = io.StringIO()
+    with ResultSink(["A", "B"], max_items=max_items, tmp_dir=tmp_dir) as sink:
+        for group, item in items:
+            sink.add(group, item)
+        total = sink.write(out, lambda item, widths: "  ".join(
+            value.ljust(width) for value, width in zip(item, widths)) + "\n")
+        runs = [run_path for group in sink.groups for run_path in sink.runs[group]]
+    return out.getvalue(), total, runs
+
+
+def test_sink_spilling_matches_in_memory(tmp_path):
+    # 同一结果每隔 50 条重复出现，溢出后会落在不同的临时文件里
+    items = [("A", (f"/api/{i % 50:03d}", f"f{i % 7}.js")) for i in range(350)]
+    items += [("B", (f"/v{i % 3}/x" + "y" * (i % 5), "main.js")) for i in range(40)]
+    expected, expected_total, runs = sink_output(items, 10 ** 6, tmp_path)
+    assert runs == []
+
+    output, total, runs = sink_output(items, 8, tmp_path)
+    assert len(runs) > 2
+    assert output == expected
+    assert total == expected_total == len(set(items))
+    # 每条结果只写出一次，列宽按所有溢出段的最大值对齐
+    lines = [line for line in output.splitlines() if line and not line.startswith("=====")]
+    assert len(lines) == len(set(lines)) == total
+    assert "===== B =====\n/v0/x     " in output
+    # 关闭后临时文件全部删除
+    assert not any(os.path.exists(run_path) for run_path in runs)
+    assert list(tmp_path.iterdir()) == []
+
+
+# ================== 分块扫描 ==================
+SNIPPETS = [
+    'routes:[{path:"/user/list",component:a}]',
+    'e.get("/api/order/detail",{params:t})',
+    'n.post(Object(r.a)("/api/order/submit"),e)',
+    'url:"/v1/report/export?type=csv"',
+    'baseURL:"https://api.example.com/gateway"',
+    'fetch("/api/ping")',
+    'var s="/static/img/logo.png";',
+]
+
+
+@pytest.mark.parametrize("table", ["paths", "final"])
+def test_iter_file_tiny_chunks_match_whole_content(tmp_path, table):
+    # 片段之间的填充长度各不相同，锚点和匹配会落在各种块边界位置上
+    content = "".join(snippet + ";" * (i % 11) for i, snippet in enumerate(SNIPPETS * 9)).encode()
+    file_path = tmp_path / "app.js"
+    file_path.write_bytes(content)
+    matcher = get_matcher(table)
+    summary = lambda matches: sorted((group, label, group_idx, match.span(), match.group())
+                                     for group, label, group_idx, match in matches)
+    expected = summary(matcher.iter_matches(content))
+    assert len(expected) >= 9
+    assert summary(matcher.iter_file(str(file_path), chunk_size=7)) == expected
+    assert summary(matcher.iter_file(str(file_path), chunk_size=len(content) // 3)) == expected
+
+
+# ================== get( / post( 调用参数 ==================
+# 原来的表项是递归正则 (get)\(((?:[^()]|(?R))++)\)：(?R) 递归的是整个模式，括号内的嵌套
+# 括号必须本身也是 get( 调用，所以 a.get(Object(c.d)("/api/x")) 这类参数里有其他调用的写法
+# 整体不匹配。extract_call_argument 对任意嵌套的括号计数，这些调用现在会提取出第一个字符串。
+LEGACY_GET = regex.compile(r'(?i)(get)\(((?:[^()]|(?R))++)\)', regex.DOTALL)
+LEGACY_FIRST_STRING = regex.compile(r'''['"]([^'"]*?(?:\\.[^'"]*?)*?)['"]''')
+
+
+def legacy_call_argument(code):
+    """原递归正则加 extract_first_string 的结果"""
+    match = LEGACY_GET.search(code)
+    if match is None:
+        return None
+    string = LEGACY_FIRST_STRING.search(match.group(2))
+    return string.group(1) if string else None
+
+
+def call_argument(code):
+    return extract_call_argument(code, code.index("get(") + len("get("))
+
+
+@pytest.mark.parametrize("code, expected", [
+    ('a.get("/api/user")', "/api/user"),
+    ("axios.get('/api/list', {params: p})", "/api/list"),
+    ('get(get("/api/inner"))', "/api/inner"),
+])
+def test_flat_calls_unchanged(code, expected):
+    assert legacy_call_argument(code) == expected
+    assert call_argument(code) == (expected, "ok")
+
+
+@pytest.mark.parametrize("code, expected", [
+    # 参数是其他函数调用的结果（webpack 的 Object(c.d)(...) 包装）
+    ('a.get(Object(c.d)("/api/x"))', "/api/x"),
+    ('n.get(Object(r.a)(e), "/api/y")', "/api/y"),
+    ('t.get(f(e), "/api/z")', "/api/z"),
+    # 取第一个字符串，不论它位于哪一层括号
+    ('t.get(f("x"), "/api/w")', "x"),
+])
+def test_nested_calls_now_extracted(code, expected):
+    assert legacy_call_argument(code) is None
+    assert call_argument(code) == (expected, "ok")
+
+
+def test_call_without_string():
+    assert call_argument("a.get(e, t)") == (None, "none")
+    assert call_argument("a.get(f(e))") == (None, "none")
+
+
+def test_limits():
+    deep = "get(" + "(" * 40 + '"/api/deep"' + ")" * 41
+    assert call_argument(deep) == (None, "limit")
+    assert extract_call_argument(deep, 4, max_depth=64) == ("/api/deep", "ok")
+    long = "get(" + "e," * 3000 + '"/api/far")'
+    assert call_argument(long) == (None, "limit")
+    assert extract_call_argument(long, 4, max_span=8192) == ("/api/far", "ok")
+
+
+def test_bytes_content():
+    code = b'a.get(Object(c.d)("/api/x"))'
+    assert extract_call_argument(code, code.index(b"get(") + 4) == (b"/api/x", "ok")
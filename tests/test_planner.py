@@ -0,0 +1,61 @@
+"""请求规划：URL 规范化与去重"""
+import sys
+
+import pytest
+
+from jsapi.planner import FetchPlanner, canonicalize_url, join_url
+from jsapi.link_extract import parse_js_links
+from jsapi.chunk_discovery import discover_references
+
+MALFORMED_URLS = [
+    "//cdn.example.com:80a/x.js",
+    "http://[::1/x.js",
+    "http://example.com:99999/x.js",
+]
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTP://Example.COM:80/a.js#x") == "http://example.com/a.js"
+    assert canonicalize_url("https://example.com:8443") == "https://example.com:8443/"
+
+
+@pytest.mark.parametrize("url", MALFORMED_URLS)
+def test_canonicalize_malformed_url_returned_as_is(url):
+    assert canonicalize_url(url) == url
+
+
+def test_plan_keeps_going_after_malformed_urls():
+    planner = FetchPlanner()
+    planned = planner.plan(MALFORMED_URLS + ["http://example.com/app.js", "http://example.com:80/app.js"])
+    assert planned == MALFORMED_URLS + ["http://example.com/app.js"]
+    assert planner.plan_hash_routes(["http://[::1/#/a"]) == []
+
+
+def test_join_url_drops_only_unparsable_reference():
+    assert join_url("http://example.com/a/", "http://[::1/x.js") is None
+    assert join_url("http://example.com/a/", "b.js") == "http://example.com/a/b.js"
+
+
+def test_page_links_survive_malformed_script_src():
+    html = "".join(f'<script src="{url}"></script>' for url in MALFORMED_URLS + ["/app.js"])
+    links = parse_js_links(html, "http://example.com/", "htmlparser")
+    assert "http://example.com/app.js" in links
+    assert "http://[::1/x.js" not in links
+
+
+def test_discovery_survives_malformed_import():
+    chunks, map_urls, _ = discover_references(
+        'import("//[::1/y.js");import("./ok.js");\n//# sourceMappingURL=http://[::1/a.map',
+        "http://example.com/app.js", "http://example.com/")
+    assert chunks == {"http://example.com/ok.js"}
+    assert map_urls == []
+
+
+def test_hash_routes_planned_with_renderer():
+    from jsapi.crawler import CommandRenderer, construct_path_urls
+    renderer = CommandRenderer(f'"{sys.executable}" -c "import sys; print(sys.argv[1])"')
+    planner = FetchPlanner(renderer)
+    _, hash_url = construct_path_urls("http://example.com/app/index.html", "user/list")
+    assert hash_url == "http://example.com/app/index.html#/user/list"
+    assert planner.plan_hash_routes([hash_url, hash_url]) == [hash_url]
+    assert renderer(hash_url).strip() == hash_url
@@ -0,0 +1,186 @@
+"""自适应请求调度：窗口调整、Retry-After、熔断，以及 ScheduledAdapter 的许可归还"""
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+from requests.exceptions import ChunkedEncodingError, ConnectionError
+
+from jsapi import crawler, scheduler
+from jsapi.crawler import ScheduledAdapter
+from jsapi.scheduler import (AdaptiveScheduler, CircuitOpenError, DeadlineExceeded, OK, FAILED, THROTTLED,
+                             BREAKER_THRESHOLD, MAX_RETRY_AFTER, parse_retry_after)
+
+HOST = "example.com"
+
+
+class StubAdapter:
+    """按顺序返回 outcomes 中的响应状态码或抛出其中的异常，并记录每次的 timeout"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def send(self, request, **kwargs):
+        self.timeouts.append(kwargs.get('timeout'))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        return SimpleNamespace(status_code=status, headers=headers, close=lambda: None)
+
+    def close(self):
+        pass
+
+
+def make_adapter(*outcomes, **settings):
+    sched = AdaptiveScheduler(**settings)
+    stub = StubAdapter(*outcomes)
+    return ScheduledAdapter(stub, sched), sched, stub
+
+
+def send(adapter, **kwargs):
+    return adapter.send(SimpleNamespace(url=f"http://{HOST}/app.js"), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(crawler, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt: 0)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(" 120 ") == 120.0
+    assert parse_retry_after("999999") == MAX_RETRY_AFTER
+    now = time.time()
+    assert 25 <= parse_retry_after(formatdate(now + 30, usegmt=True), now) <= 30
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now) == 0.0
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+
+def test_window_grows_on_success_and_halves_on_throttle():
+    sched = AdaptiveScheduler(initial_window=4)
+    state = sched.host(HOST)
+    sched.acquire(HOST)
+    sched.release(HOST, OK)
+    assert state.window == 5  # 慢启动阶段每个成功响应加 1
+    sched.acquire(HOST)
+    sched.release(HOST, THROTTLED, retry_after=1.0)
+    assert state.window == 2.5
+    assert state.threshold == 2.5
+    assert state.blocked_until > time.monotonic()
+    # 越过慢启动阈值后每个窗口只加 1
+    state.blocked_until = 0.0
+    sched.acquire(HOST)
+    sched.release(HOST, OK)
+    assert state.window == pytest.approx(2.5 + 1 / 2.5)
+    assert state.in_flight == 0
+
+
+def test_slow_responses_reduce_window():
+    sched = AdaptiveScheduler(initial_window=8)
+    state = sched.host(HOST)
+    for _ in range(3):
+        sched.acquire(HOST)
+        sched.release(HOST, OK, latency=0.1)
+    window = state.window
+    sched.acquire(HOST)
+    sched.release(HOST, OK, latency=10.0)
+    assert state.window == window / 2
+    assert sched.stats["slowdowns"] == 1
+
+
+def test_acquire_waits_for_window_until_deadline():
+    sched = AdaptiveScheduler(initial_window=1)
+    sched.acquire(HOST)
+    with pytest.raises(DeadlineExceeded):
+        sched.acquire(HOST, deadline=time.monotonic() + 0.05)
+    sched.release(HOST, OK)
+    sched.acquire(HOST, deadline=time.monotonic() + 0.05)
+
+
+def test_breaker_opens_probes_and_closes():
+    sched = AdaptiveScheduler()
+    state = sched.host(HOST)
+    for _ in range(BREAKER_THRESHOLD):
+        sched.acquire(HOST)
+        sched.release(HOST, FAILED)
+    assert state.open_until > time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        sched.acquire(HOST)
+
+    # 到期后只放行一个试探请求；试探失败时重新熔断且时长加倍
+    cooldown = state.cooldown
+    state.open_until = time.monotonic() - 1
+    sched.acquire(HOST)
+    with pytest.raises(CircuitOpenError):
+        sched.acquire(HOST)
+    sched.release(HOST, FAILED)
+    assert state.cooldown == 2 * cooldown
+    assert not state.probing
+
+    # 试探成功时解除熔断
+    state.open_until = time.monotonic() - 1
+    sched.acquire(HOST)
+    sched.release(HOST, OK)
+    assert state.open_until == 0.0
+    assert state.failures == 0
+    sched.acquire(HOST)
+    sched.release(HOST, OK)
+
+
+def test_adapter_retries_connection_errors():
+    adapter, sched, stub = make_adapter(ConnectionError("reset"), ConnectionError("reset"), 200)
+    assert send(adapter).status_code == 200
+    assert sched.stats["retries"] == 2
+    assert sched.host(HOST).in_flight == 0
+
+
+def test_adapter_returns_last_response_when_retries_run_out():
+    adapter, sched, stub = make_adapter(502, 502, retries=1)
+    assert send(adapter).status_code == 502
+    assert stub.outcomes == []
+    assert sched.host(HOST).in_flight == 0
+
+
+def test_adapter_waits_out_retry_after():
+    adapter, sched, stub = make_adapter((429, {"Retry-After": "0"}), 200, initial_window=4)
+    assert send(adapter).status_code == 200
+    assert sched.stats["throttled"] == 1
+    assert sched.host(HOST).window < 4
+
+
+@pytest.mark.parametrize("error", [ChunkedEncodingError("truncated"), KeyboardInterrupt()])
+def test_adapter_releases_slot_on_other_exceptions(error):
+    adapter, sched, stub = make_adapter(*[error] * 5, initial_window=4)
+    for _ in range(5):
+        with pytest.raises(type(error)):
+            send(adapter)
+    state = sched.host(HOST)
+    assert state.in_flight == 0
+    assert len(stub.timeouts) == 5  # 不重试
+
+
+def test_adapter_releases_failed_probe():
+    adapter, sched, stub = make_adapter(ChunkedEncodingError("truncated"), 200)
+    state = sched.host(HOST)
+    state.open_until = time.monotonic() - 1
+    with pytest.raises(ChunkedEncodingError):
+        send(adapter)
+    assert not state.probing
+    assert state.open_until > time.monotonic()
+    state.open_until = time.monotonic() - 1
+    assert send(adapter).status_code == 200
+    assert state.open_until == 0.0
+
+
+def test_adapter_caps_timeout_tuple_with_none():
+    adapter, sched, stub = make_adapter(200, 200, deadline=5.0)
+    send(adapter, timeout=(3, None))
+    connect, read = stub.timeouts[0]
+    assert connect == 3
+    assert 0 < read <= 5.0
+    send(adapter, timeout=30)
+    assert stub.timeouts[1] <= 5.0
@@ -0,0 +1,20 @@
+"""内容寻址存储"""
+import os
+
+from jsapi.store import JsStore
+from jsapi.scanner import iter_js_files
+
+
+def test_target_directory_resolves_pooled_files(tmp_path):
+    pool = JsStore(str(tmp_path / "_shared"))
+    first = JsStore(str(tmp_path / "a"), pool=pool)
+    second = JsStore(str(tmp_path / "b"), pool=pool)
+    shared_path, _ = first.put("http://a.example/app.js", b'url: "/api/a"')
+    second.put("http://b.example/app.js", b'url: "/api/b"')
+    first.save()
+    second.save()
+
+    assert os.listdir(tmp_path / "a") == [JsStore.INDEX_NAME]
+    assert list(iter_js_files(str(tmp_path / "a"))) == [shared_path]
+    # 遍历整个批量输出目录时每个内容文件只出现一次
+    assert len(list(iter_js_files(str(tmp_path)))) == 2